@@ -1,11 +1,26 @@
 import streamlit as st
 import json
+from collections import deque
 from workflow_generator import generate_workflow, validate_workflow
+from workflow_patch import refine_workflow
+from load_simulator import simulate_load, format_load_report
+from workflow_store import WorkflowStore, REUSE_THRESHOLD, request_entities
+from node_registry import get_node_type, ACTION_ICONS, DEFAULT_COLOR
+from graph_layout import apply_layout
 from streamlit_agraph import agraph, Node, Edge, Config
 
 # Page config
 st.set_page_config(page_title="Agentic Flow Builder", page_icon="🤖", layout="wide")
 
+
+@st.cache_resource
+def get_workflow_store():
+    """
+    One store (and embedding model) per server process
+    """
+    return WorkflowStore()
+
+
 # Custom CSS for better styling
 st.markdown("""
 <style>
@@ -31,38 +46,27 @@ st.markdown("""
 def create_visual_graph(workflow_json):
     """
     Parses the workflow JSON and creates a visual graph with better styling.
+    Coordinates come from the server-side layered layout, so the browser
+    does not need to run a physics simulation.
     """
     nodes = []
     edges = []
 
+    if any(not isinstance(n.get("position"), list) for n in workflow_json.get("nodes", [])):
+        apply_layout(workflow_json)
+
     if "nodes" in workflow_json:
         for node_data in workflow_json["nodes"]:
-            # Different colors for different node types
-            if 'Trigger' in node_data['type']:
-                color = "#2196f3"  # Blue for triggers
-                shape = "diamond"
-            elif 'whatsApp' in node_data['type'] or 'telegram' in node_data['type']:
-                color = "#25D366"  # WhatsApp green
-                shape = "box"
-            elif 'email' in node_data['type']:
-                color = "#EA4335"  # Gmail red
-                shape = "box"
-            elif 'slack' in node_data['type']:
-                color = "#4A154B"  # Slack purple
-                shape = "box"
-            elif 'googleSheets' in node_data['type']:
-                color = "#0F9D58"  # Google green
-                shape = "box"
-            else:
-                color = "#757575"  # Default gray
-                shape = "box"
-
+            # Colour and shape come from the node registry (blue diamonds for triggers)
+            node_type = get_node_type(node_data['type'])
             nodes.append(Node(
                 id=node_data["name"],
                 label=node_data["name"],
-                shape=shape,
-                color=color,
-                size=25
+                shape=node_type.shape if node_type else "box",
+                color=node_type.color if node_type else DEFAULT_COLOR,
+                size=25,
+                x=node_data["position"][0],
+                y=node_data["position"][1]
             ))
 
     if "connections" in workflow_json:
@@ -77,7 +81,7 @@ def create_visual_graph(workflow_json):
         width=800,
         height=400,
         directed=True,
-        physics=True,
+        physics=False,
         hierarchical=False,
         nodeHighlightBehavior=True,
         highlightColor="#F7A7A6",
@@ -88,58 +92,31 @@ def create_visual_graph(workflow_json):
 
 def simulate_workflow_execution(workflow_json):
     """
-    Simulate workflow execution for testing
+    Simulate workflow execution for testing. Walks the graph once from each
+    trigger and lets the node registry describe every node it reaches.
     """
     execution_log = []
-
-    # Find trigger nodes
-    trigger_nodes = [n for n in workflow_json.get('nodes', [])
-                     if 'Trigger' in n.get('type', '')]
-
-    for trigger in trigger_nodes:
+    nodes_by_name = {n['name']: n for n in workflow_json.get('nodes', [])}
+    successors = {}
+    for conn in workflow_json.get('connections', []):
+        successors.setdefault(conn['source'], []).append(conn['target'])
+
+    visited = set()
+    for trigger in nodes_by_name.values():
+        if 'Trigger' not in trigger.get('type', ''):
+            continue
         execution_log.append(f"🟢 **TRIGGER**: {trigger['name']} activated")
-
-        if trigger['type'] == 'n8n-nodes-base.scheduleTrigger':
-            cron = trigger['parameters'].get('cronExpression', 'Not set')
-            execution_log.append(f"   ⏰ Schedule: {cron}")
-        elif trigger['type'] == 'n8n-nodes-base.jotformTrigger':
-            execution_log.append(f"   📝 Form submission received")
-
-        # Find connected nodes
-        connections = [c for c in workflow_json.get('connections', [])
-                       if c['source'] == trigger['name']]
-
-        for conn in connections:
-            target_node = next((n for n in workflow_json['nodes']
-                                if n['name'] == conn['target']), None)
-            if target_node:
-                if target_node['type'] == 'n8n-nodes-base.whatsApp':
-                    phone = target_node['parameters'].get('phoneNumber', '[NO PHONE]')
-                    msg = target_node['parameters'].get('message', '[NO MESSAGE]')
-                    execution_log.append(f"📱 **WhatsApp** → {phone}")
-                    execution_log.append(f"   Message: \"{msg[:50]}...\"" if len(msg) > 50 else f"   Message: \"{msg}\"")
-
-                elif target_node['type'] == 'n8n-nodes-base.sendEmail':
-                    recipient = target_node['parameters'].get('recipient', '[NO RECIPIENT]')
-                    subject = target_node['parameters'].get('subject', '[NO SUBJECT]')
-                    execution_log.append(f"📧 **Email** → {recipient}")
-                    execution_log.append(f"   Subject: \"{subject}\"")
-
-                elif target_node['type'] == 'n8n-nodes-base.slack':
-                    channel = target_node['parameters'].get('channel', '[NO CHANNEL]')
-                    msg = target_node['parameters'].get('message', '[NO MESSAGE]')
-                    execution_log.append(f"💬 **Slack** → {channel}")
-                    execution_log.append(f"   Message: \"{msg[:50]}...\"" if len(msg) > 50 else f"   Message: \"{msg}\"")
-
-                elif target_node['type'] == 'n8n-nodes-base.googleSheets':
-                    operation = target_node['parameters'].get('operation', 'append')
-                    execution_log.append(f"📊 **Google Sheets** → {operation} data")
-
-                elif target_node['type'] == 'n8n-nodes-base.telegram':
-                    chat_id = target_node['parameters'].get('chatId', '[NO CHAT ID]')
-                    msg = target_node['parameters'].get('message', '[NO MESSAGE]')
-                    execution_log.append(f"✈️ **Telegram** → {chat_id}")
-                    execution_log.append(f"   Message: \"{msg[:50]}...\"" if len(msg) > 50 else f"   Message: \"{msg}\"")
+        visited.add(trigger['name'])
+        queue = deque([trigger['name']])
+        while queue:
+            node = nodes_by_name[queue.popleft()]
+            node_type = get_node_type(node.get('type', ''))
+            if node_type and node_type.simulate:
+                execution_log.extend(node_type.simulate(node))
+            for target in successors.get(node['name'], []):
+                if target in nodes_by_name and target not in visited:
+                    visited.add(target)
+                    queue.append(target)
 
     return execution_log
 
@@ -156,6 +133,20 @@ if "errors" not in st.session_state:
     st.session_state.errors = []
 if "warnings" not in st.session_state:
     st.session_state.warnings = []
+if "validator" not in st.session_state:
+    st.session_state.validator = None
+if "lineage_id" not in st.session_state:
+    st.session_state.lineage_id = None
+
+# Generation settings
+with st.sidebar:
+    st.markdown("### ⚙️ Generation Settings")
+    hedged = st.checkbox("⚡ Hedged generation", help="Race several LLM requests and keep the first valid workflow. Lower tail latency, higher cost.")
+    hedge_candidates = st.slider("Max candidates", 2, 4, 2, disabled=not hedged)
+    hedge_delay_s = st.slider("Hedge delay (s)", 0.0, 10.0, 4.0, 0.5, disabled=not hedged,
+                              help="Wait this long for a valid workflow before sending the next request (0 sends all at once)")
+    reuse_saved = st.checkbox("♻️ Reuse saved workflows", value=True,
+                              help="Answer requests similar to a previously generated workflow from the local store instead of calling the LLM")
 
 # Main input area
 col1, col2 = st.columns([4, 1])
@@ -184,13 +175,39 @@ with col2:
 # Generate workflow
 if generate_button:
     if user_query:
-        with st.spinner("🤖 The meta-agent is analyzing your request and building the workflow..."):
-            summary, workflow, errors, warnings = generate_workflow(user_query)
-            st.session_state.summary = summary
-            st.session_state.workflow = workflow
+        store = get_workflow_store()
+        matches = store.find_similar(user_query, top_k=3, min_score=REUSE_THRESHOLD) if reuse_saved else []
+        # Similar wording is not enough: node types, recipients, schedule and messages must be the same
+        entities = request_entities(user_query) if matches else None
+        match = next((m for m in matches if request_entities(m["request"]) == entities), None)
+        if matches and match is None:
+            st.info(f"ℹ️ A saved workflow for a similar request (\"{matches[0]['request']}\") uses different "
+                    "apps, recipients, schedule or message, so a new one is generated.")
+        if match:
+            errors, warnings = validate_workflow(match["workflow"])
+            st.session_state.summary = match["summary"]
+            st.session_state.workflow = match["workflow"]
             st.session_state.errors = errors
             st.session_state.warnings = warnings
-            st.success("✅ Workflow generated successfully!")
+            st.session_state.validator = None
+            st.session_state.lineage_id = match["lineage_id"]
+            st.success(f"♻️ Reused a saved workflow for a similar request (similarity {match['score']:.2f}): \"{match['request']}\"")
+        else:
+            with st.spinner("🤖 The meta-agent is analyzing your request and building the workflow..."):
+                summary, workflow, errors, warnings = generate_workflow(
+                    user_query,
+                    hedge_candidates=hedge_candidates if hedged else 1,
+                    hedge_delay_s=hedge_delay_s
+                )
+                st.session_state.summary = summary
+                st.session_state.workflow = workflow
+                st.session_state.errors = errors
+                st.session_state.warnings = warnings
+                st.session_state.validator = None
+                st.session_state.lineage_id = None
+                if workflow and not errors:
+                    st.session_state.lineage_id = store.save(user_query, summary, workflow)["lineage_id"]
+                st.success("✅ Workflow generated successfully!")
     else:
         st.warning("⚠️ Please enter a description of the workflow you want to build.")
 
@@ -234,11 +251,41 @@ if st.session_state.summary and st.session_state.workflow:
             for log in execution_log:
                 if log.startswith("🟢"):
                     st.success(log)
-                elif any(emoji in log for emoji in ["📱", "📧", "💬", "📊", "✈️"]):
+                elif log.startswith(ACTION_ICONS):
                     st.info(log)
                 else:
                     st.write(log)
 
+        st.markdown("#### 📈 Load Test")
+        st.caption("Replays synthetic trigger events through mock connectors with realistic latency, errors and rate limits.")
+        load_col1, load_col2 = st.columns(2)
+        with load_col1:
+            rate_per_hour = st.number_input("Trigger events per hour", min_value=1, value=10000, step=1000)
+        with load_col2:
+            duration_min = st.number_input("Traffic duration (minutes)", min_value=1, value=60, step=10)
+
+        has_cycles = any(error.startswith("Cycle detected") for error in st.session_state.errors or [])
+        if has_cycles:
+            st.info("The load test needs a workflow without cycles; fix the cycle errors above first.")
+        if st.button("📈 Run Load Test", disabled=has_cycles):
+            try:
+                with st.spinner("Simulating traffic..."):
+                    report = simulate_load(st.session_state.workflow, rate_per_hour, duration_min * 60)
+            except Exception as e:
+                st.error(f"❌ Load test failed: {e}")
+                report = None
+            if report is not None:
+                lines = format_load_report(report)
+                metric_col1, metric_col2, metric_col3 = st.columns(3)
+                metric_col1.metric("Completed events/sec", f"{report['completed_events_per_s']:.2f}")
+                metric_col2.metric("p99 end-to-end", f"{report['p99_latency_s']:.1f}s")
+                metric_col3.metric("Backlog growth", f"{report['backlog_growth_per_min']:+.1f}/min")
+                for line in lines:
+                    if "saturated" in line or line.startswith("Note:"):
+                        st.warning(line)
+                    else:
+                        st.write(line)
+
     with tab4:
         st.subheader("💾 Export Options")
 
@@ -276,5 +323,52 @@ if st.session_state.summary and st.session_state.workflow:
         with st.expander("👁️ Preview n8n JSON"):
             st.json(st.session_state.workflow)
 
+        if st.session_state.lineage_id is not None:
+            with st.expander("🕘 Version History"):
+                store = get_workflow_store()
+                for entry in reversed(store.history(st.session_state.lineage_id)):
+                    hist_col1, hist_col2 = st.columns([4, 1])
+                    hist_col1.write(f"**v{entry['version']}** — {entry['note'] or 'Generated'}")
+                    if hist_col2.button("Restore", key=f"restore_{entry['version']}"):
+                        restored = store.get_version(st.session_state.lineage_id, entry["version"])
+                        st.session_state.summary = restored["summary"]
+                        st.session_state.workflow = restored["workflow"]
+                        st.session_state.errors, st.session_state.warnings = validate_workflow(restored["workflow"])
+                        st.session_state.validator = None
+                        st.rerun()
+
+    # Iterative edits send only a patch instead of regenerating the whole workflow
+    st.markdown("### ✏️ Refine this workflow")
+    refine_col1, refine_col2 = st.columns([3, 1])
+    with refine_col1:
+        edit_instruction = st.text_input(
+            "Describe a change:",
+            placeholder="e.g., Send the email to ops@company.com instead and also post to #alerts on Slack"
+        )
+    with refine_col2:
+        st.markdown("<br>", unsafe_allow_html=True)  # Spacer
+        refine_button = st.button("✏️ Apply Edit", use_container_width=True)
+
+    if refine_button:
+        if edit_instruction:
+            with st.spinner("🤖 Applying your edit to the current workflow..."):
+                summary, workflow, errors, warnings, validator = refine_workflow(
+                    st.session_state.workflow,
+                    edit_instruction,
+                    summary=st.session_state.summary,
+                    validator=st.session_state.validator
+                )
+                st.session_state.summary = summary
+                st.session_state.workflow = workflow
+                st.session_state.errors = errors
+                st.session_state.warnings = warnings
+                st.session_state.validator = validator
+                if workflow and not errors and st.session_state.lineage_id is not None:
+                    get_workflow_store().save(f"{st.session_state.user_query}. {edit_instruction}", summary, workflow,
+                                              lineage_id=st.session_state.lineage_id, note=edit_instruction)
+            st.rerun()
+        else:
+            st.warning("⚠️ Please describe the change you want to make.")
+
 # Footer
 st.markdown("---")
\ No newline at end of file
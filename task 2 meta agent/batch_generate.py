@@ -0,0 +1,281 @@
+import os
+import re
+import csv
+import json
+import time
+import hashlib
+import random
+import asyncio
+import argparse
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError, APITimeoutError
+
+from workflow_generator import MODEL_NAME, GENERATION_PARAMS, build_generation_messages, parse_workflow_response
+from json_repair import get_repair_metrics
+
+PROGRESS_FILE = "progress.jsonl"
+SUMMARY_FILE = "summary.json"
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+SAFE_ID_PATTERN = re.compile(r"[A-Za-z0-9_-][A-Za-z0-9._-]{0,79}")
+
+
+class TokenBucket:
+    """
+    Async token bucket: allows `rate_per_minute` requests on average with bursts up to `capacity`.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: int = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1, int(rate_per_minute // 6))
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def output_filename(request_id: str) -> str:
+    """
+    File name for a request's result. Ids that are not plain file names (path separators,
+    "..", other characters) become a slug plus a short hash of the id, so they stay
+    inside the output directory and cannot collide with each other.
+    """
+    if SAFE_ID_PATTERN.fullmatch(request_id):
+        return f"{request_id}.json"
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "-", request_id).strip("-")[:60] or "request"
+    return f"{slug}-{hashlib.sha1(request_id.encode('utf-8')).hexdigest()[:8]}.json"
+
+
+def read_requests(path: str):
+    """
+    Yields (request_id, query) pairs from a JSONL or CSV file.
+    Accepted fields: id/request_id and query/request/description.
+    Repeated ids are skipped with a warning, since their results would overwrite each other.
+    """
+    def to_pair(row, line_number):
+        request_id = str(row.get("id") or row.get("request_id") or f"request-{line_number:05d}")
+        query = row.get("query") or row.get("request") or row.get("description")
+        return request_id, query
+
+    def rows(f):
+        if path.lower().endswith(".csv"):
+            for line_number, row in enumerate(csv.DictReader(f), 1):
+                yield to_pair(row, line_number)
+        else:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if line:
+                    yield to_pair(json.loads(line), line_number)
+
+    seen = set()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for request_id, query in rows(f):
+            if request_id in seen:
+                print(f"[WARN] Skipping duplicate request id '{request_id}'")
+                continue
+            seen.add(request_id)
+            yield request_id, query
+
+
+def load_progress(output_dir: str) -> dict:
+    """
+    Reads the progress log so an interrupted run can resume where it stopped.
+    Returns the latest summary entry per request id, in first-seen order.
+    """
+    progress = {}
+    progress_path = os.path.join(output_dir, PROGRESS_FILE)
+    if os.path.exists(progress_path):
+        with open(progress_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # partially written line from a crash
+                progress[entry["id"]] = entry
+    return progress
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (APIConnectionError, APITimeoutError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return False
+
+
+def retry_delay(error: Exception, attempt: int, base_delay: float, max_delay: float) -> float:
+    """
+    Exponential backoff with full jitter, honouring Retry-After when the server sends one.
+    """
+    if isinstance(error, APIStatusError):
+        retry_after = error.response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return float(retry_after) + random.uniform(0, base_delay)
+            except ValueError:
+                pass
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class BatchGenerator:
+    """
+    Generates workflows for many requests concurrently with a bounded worker pool,
+    a shared token bucket and retries on transient API errors.
+    """
+
+    def __init__(self, output_dir: str, concurrency: int = 8, rate_per_minute: float = 60,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 30.0):
+        load_dotenv()
+        # Retries happen in _call_llm only, so every attempt goes through the token bucket
+        self.client = AsyncOpenAI(base_url="https://openrouter.ai/api/v1", api_key=os.getenv("OPENROUTER_API_KEY"),
+                                  max_retries=0)
+        self.output_dir = output_dir
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.progress_file = None
+        # Counters for this run; per-request results also include earlier runs when resuming
+        self.stats = {"processed": 0, "skipped": 0, "retries": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self.results = {}
+
+    async def _call_llm(self, user_query: str):
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            try:
+                response = await self.client.chat.completions.create(
+                    model=MODEL_NAME,
+                    messages=build_generation_messages(user_query),
+                    **GENERATION_PARAMS
+                )
+                if response.usage:
+                    self.stats["prompt_tokens"] += response.usage.prompt_tokens
+                    self.stats["completion_tokens"] += response.usage.completion_tokens
+                return response.choices[0].message.content
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                self.stats["retries"] += 1
+                delay = retry_delay(e, attempt, self.base_delay, self.max_delay)
+                print(f"[WARN] Transient error ({e.__class__.__name__}), retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+
+    async def _process(self, request_id: str, user_query: str):
+        started = time.perf_counter()
+        record = {"id": request_id, "query": user_query}
+        try:
+            response_content = await self._call_llm(user_query)
+            summary, workflow, errors, warnings = parse_workflow_response(user_query, response_content)
+            record.update(summary=summary, workflow=workflow, errors=errors, warnings=warnings)
+            if workflow is None:
+                status = "failed"
+            else:
+                status = "with_errors" if errors else "succeeded"
+        except Exception as e:
+            record.update(summary=None, workflow=None, errors=[f"{e.__class__.__name__}: {e}"], warnings=[])
+            status = "failed"
+
+        record["status"] = status
+        record["latency_s"] = round(time.perf_counter() - started, 3)
+        self.stats["processed"] += 1
+
+        # Each result is written as soon as it is ready so partial runs are usable
+        output_path = os.path.join(self.output_dir, output_filename(request_id))
+        with open(output_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2)
+        os.replace(output_path + ".tmp", output_path)
+
+        summary_entry = {"id": request_id, "file": os.path.basename(output_path), "status": status, "latency_s": record["latency_s"],
+                         "errors": len(record["errors"]), "warnings": len(record["warnings"])}
+        self.results[request_id] = summary_entry
+        self.progress_file.write(json.dumps(summary_entry) + "\n")
+        self.progress_file.flush()
+        print(f"[INFO] {request_id}: {status} ({record['latency_s']}s)")
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+                await self._process(*item)
+            finally:
+                queue.task_done()
+
+    async def run(self, requests, resume: bool = True):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.results = load_progress(self.output_dir) if resume else {}
+        completed = {request_id for request_id, entry in self.results.items() if entry.get("status") != "failed"}
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        started = time.perf_counter()
+
+        with open(os.path.join(self.output_dir, PROGRESS_FILE), "a", encoding="utf-8") as self.progress_file:
+            workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)]
+            for request_id, user_query in requests:
+                if request_id in completed or not user_query:
+                    self.stats["skipped"] += 1
+                    continue
+                await queue.put((request_id, user_query))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+
+        return self._write_summary(time.perf_counter() - started)
+
+    def _write_summary(self, elapsed: float):
+        """
+        Status counts and latencies cover every request in the progress log (the latest
+        attempt of each); processed, retries, tokens and throughput cover this run.
+        """
+        results = list(self.results.values())
+        processed = self.stats["processed"]
+        latencies = sorted(r["latency_s"] for r in results)
+        summary = {
+            **{status: sum(r["status"] == status for r in results) for status in ("succeeded", "with_errors", "failed")},
+            **self.stats,
+            "elapsed_s": round(elapsed, 2),
+            "workflows_per_minute": round(processed / elapsed * 60, 2) if elapsed > 0 else 0.0,
+            "p50_latency_s": latencies[len(latencies) // 2] if latencies else None,
+            "p95_latency_s": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+            "json_repair": get_repair_metrics(),
+            "results": results,
+        }
+        with open(os.path.join(self.output_dir, SUMMARY_FILE), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate workflows in bulk from a JSONL or CSV file of requests.")
+    parser.add_argument("input", help="JSONL or CSV file with 'id' and 'query' fields")
+    parser.add_argument("-o", "--output-dir", default="batch_output", help="Directory for per-request results")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Maximum in-flight requests")
+    parser.add_argument("-r", "--rate", type=float, default=60, help="Maximum requests per minute")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries on 429/5xx/network errors")
+    parser.add_argument("--no-resume", action="store_true", help="Regenerate requests already in the progress log")
+    args = parser.parse_args()
+
+    generator = BatchGenerator(args.output_dir, concurrency=args.concurrency,
+                               rate_per_minute=args.rate, max_retries=args.max_retries)
+    summary = asyncio.run(generator.run(read_requests(args.input), resume=not args.no_resume))
+
+    print("\n--- Batch Summary ---")
+    print(f"Processed: {summary['processed']} (skipped {summary['skipped']})")
+    print(f"Valid: {summary['succeeded']} | With errors: {summary['with_errors']} | Failed: {summary['failed']}")
+    print(f"Retries: {summary['retries']} | Tokens: {summary['prompt_tokens']} prompt / {summary['completion_tokens']} completion")
+    print(f"Throughput: {summary['workflows_per_minute']} workflows/min over {summary['elapsed_s']}s")
+    print(f"Results written to '{args.output_dir}/'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,501 @@
+import re
+import time
+import heapq
+import random
+from bisect import bisect_left
+from datetime import datetime, date, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# --- Cron parsing and validation ---
+
+FIELD_NAMES = ["minute", "hour", "day of month", "month", "day of week"]
+FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+MONTH_NAMES = {name: i for i, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1)}
+WEEKDAY_NAMES = {name: i for i, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])}
+MAX_SEARCH_DAYS = 366 * 8
+EPOCH = datetime(1970, 1, 1)
+
+
+class CronExpression:
+    """
+    A parsed five-field cron expression (minute hour day-of-month month day-of-week).
+    Raises ValueError with a readable message when the expression is invalid.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = " ".join(expression.split())
+        fields = self.expression.split(" ")
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression '{expression}' must have 5 fields, got {len(fields)}")
+
+        parsed = [self._parse_field(field, i) for i, field in enumerate(fields)]
+        self.minutes, self.hours, self.days, self.months, weekdays = (sorted(values) for values in parsed)
+        self.weekdays = sorted({0 if d == 7 else d for d in weekdays})
+        self.minute_set, self.hour_set = set(self.minutes), set(self.hours)
+        self.day_set, self.month_set, self.weekday_set = set(self.days), set(self.months), set(self.weekdays)
+        # Standard cron: if both day fields are restricted, either may match
+        self.day_restricted = fields[2] != "*"
+        self.weekday_restricted = fields[4] != "*"
+
+    @staticmethod
+    def _parse_value(value: str, index: int) -> int:
+        names = MONTH_NAMES if index == 3 else WEEKDAY_NAMES if index == 4 else {}
+        if value.lower() in names:
+            return names[value.lower()]
+        if not value.isdigit():
+            raise ValueError(f"Invalid {FIELD_NAMES[index]} value '{value}'")
+        number = int(value)
+        low, high = FIELD_RANGES[index]
+        if not low <= number <= high:
+            raise ValueError(f"{FIELD_NAMES[index].capitalize()} value {number} is outside {low}-{high}")
+        return number
+
+    def _parse_field(self, field: str, index: int) -> set:
+        low, high = FIELD_RANGES[index]
+        values = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step_text = part.split("/", 1)
+                if not step_text.isdigit() or int(step_text) == 0:
+                    raise ValueError(f"Invalid step '{step_text}' in {FIELD_NAMES[index]} field")
+                step = int(step_text)
+                # A step wider than the field only ever matches its start, e.g. */90 minutes fires hourly
+                if step > (high if index != 4 else 6) - low:
+                    raise ValueError(f"Step {step} does not fit the {FIELD_NAMES[index]} field ({low}-{high})")
+            if part == "*":
+                start, end = low, high if index != 4 else 6
+            elif "-" in part:
+                start_text, end_text = part.split("-", 1)
+                start, end = self._parse_value(start_text, index), self._parse_value(end_text, index)
+                if start > end:
+                    raise ValueError(f"Invalid range '{part}' in {FIELD_NAMES[index]} field")
+            else:
+                start = self._parse_value(part, index)
+                end = high if step > 1 else start
+            values.update(range(start, end + 1, step))
+        return values
+
+    def matches_day(self, day: date) -> bool:
+        if day.month not in self.month_set:
+            return False
+        day_match = day.day in self.day_set
+        weekday_match = (day.isoweekday() % 7) in self.weekday_set
+        if self.day_restricted and self.weekday_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+    def next_fire_times(self, count: int = 5, start: datetime = None, tz: str = "UTC") -> list:
+        """
+        Returns the next `count` fire times after `start` as timezone-aware datetimes in `tz`.
+        """
+        zone = get_timezone(tz)
+        start = start or datetime.now(timezone.utc)
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        start = start.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        results = []
+        fires = self.iter_fire_timestamps(start, start + timedelta(days=MAX_SEARCH_DAYS), tz)
+        for timestamp in fires:
+            results.append(datetime.fromtimestamp(timestamp, zone))
+            if len(results) == count:
+                break
+        if not results:
+            raise ValueError(f"Cron expression '{self.expression}' never fires")
+        return results
+
+    def iter_fire_times(self, start: datetime, end: datetime, tz: str = "UTC"):
+        """
+        Yields fire times in [start, end) as UTC datetimes.
+        """
+        for timestamp in self.iter_fire_timestamps(start, end, tz):
+            yield datetime.fromtimestamp(timestamp, timezone.utc)
+
+    def iter_fire_timestamps(self, start: datetime, end: datetime, tz: str = "UTC"):
+        """
+        Yields fire times in [start, end) as integer epoch seconds.
+
+        Days that cannot match are skipped with one set lookup. On days without a
+        DST transition the UTC offset is constant, so each fire time is plain
+        arithmetic; only transition days build datetimes to skip non-existent
+        wall-clock times and resolve repeated ones.
+        """
+        zone = get_timezone(tz)
+        start_timestamp = start.timestamp()
+        end_timestamp = end.timestamp()
+        day = start.astimezone(zone).date()
+        one_day = timedelta(days=1)
+
+        while True:
+            midnight = datetime(day.year, day.month, day.day)
+            offset = zone.utcoffset(midnight)
+            local_base = (midnight - EPOCH).total_seconds()
+            if local_base - offset.total_seconds() >= end_timestamp:
+                return
+            if self.matches_day(day):
+                if zone.utcoffset(midnight + one_day) == offset:
+                    base = local_base - offset.total_seconds()
+                    first_hour = bisect_left(self.hours, int((start_timestamp - base) // 3600)) if base < start_timestamp else 0
+                    for hour in self.hours[first_hour:]:
+                        hour_base = base + hour * 3600
+                        for minute in self.minutes:
+                            timestamp = hour_base + minute * 60
+                            if timestamp < start_timestamp:
+                                continue
+                            if timestamp >= end_timestamp:
+                                return
+                            yield int(timestamp)
+                else:
+                    for hour in self.hours:
+                        for minute in self.minutes:
+                            fire = datetime(day.year, day.month, day.day, hour, minute, tzinfo=zone)
+                            if fire.astimezone(timezone.utc).astimezone(zone).replace(tzinfo=None) != fire.replace(tzinfo=None):
+                                continue
+                            timestamp = fire.timestamp()
+                            if timestamp < start_timestamp:
+                                continue
+                            if timestamp >= end_timestamp:
+                                return
+                            yield int(timestamp)
+            day += one_day
+
+
+def get_timezone(name: str):
+    if not name or name.upper() in ("UTC", "GMT", "Z"):
+        return timezone.utc
+    offset = re.fullmatch(r"(?:UTC|GMT)\s*([+-])(\d{1,2})(?::?(\d{2}))?", name.strip(), re.IGNORECASE)
+    if offset:
+        sign = 1 if offset.group(1) == "+" else -1
+        return timezone(sign * timedelta(hours=int(offset.group(2)), minutes=int(offset.group(3) or 0)))
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone '{name}'")
+
+
+def validate_cron(expression: str, tz: str = "UTC"):
+    """
+    Returns None if the expression and timezone are valid, otherwise an error message.
+    """
+    try:
+        CronExpression(expression).next_fire_times(1, tz=tz)
+        return None
+    except ValueError as e:
+        return str(e)
+
+
+def next_fire_times(expression: str, count: int = 5, start: datetime = None, tz: str = "UTC") -> list:
+    return CronExpression(expression).next_fire_times(count, start, tz)
+
+
+# --- Natural language to cron ---
+
+TIMEZONE_ALIASES = {
+    "utc": "UTC", "gmt": "UTC",
+    "myt": "Asia/Kuala_Lumpur", "malaysia time": "Asia/Kuala_Lumpur", "sgt": "Asia/Singapore",
+    "ist": "Asia/Kolkata", "jst": "Asia/Tokyo", "hkt": "Asia/Hong_Kong", "wib": "Asia/Jakarta",
+    "aest": "Australia/Sydney", "aedt": "Australia/Sydney",
+    "est": "America/New_York", "edt": "America/New_York",
+    "cst": "America/Chicago", "cdt": "America/Chicago",
+    "mst": "America/Denver", "mdt": "America/Denver",
+    "pst": "America/Los_Angeles", "pdt": "America/Los_Angeles",
+    "bst": "Europe/London", "cet": "Europe/Paris", "cest": "Europe/Paris",
+}
+# Ordinary words ("the central team") only count as timezones right after a time or before "time"
+REGION_TIMEZONES = {"eastern": "America/New_York", "central": "America/Chicago",
+                    "mountain": "America/Denver", "pacific": "America/Los_Angeles"}
+WEEKDAY_WORDS = {"sunday": 0, "monday": 1, "tuesday": 2, "wednesday": 3, "thursday": 4, "friday": 5, "saturday": 6,
+                 "sun": 0, "mon": 1, "tue": 2, "tues": 2, "wed": 3, "thu": 4, "thur": 4, "thurs": 4, "fri": 5, "sat": 6}
+PART_OF_DAY_HOURS = {"morning": 9, "noon": 12, "midday": 12, "afternoon": 14, "evening": 18, "night": 20, "midnight": 0}
+
+TIME_PATTERN = re.compile(r"\b(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm|a\.m\.|p\.m\.)(?![a-z])|\b([01]?\d|2[0-3]):([0-5]\d)\b", re.IGNORECASE)
+INTERVAL_PATTERN = re.compile(r"\bevery\s+(\d+|other)?\s*(minute|min|hour|hr|day|week|wk|month)s?\b", re.IGNORECASE)
+# Shorthand with no single cron form; "quarterly" is rewritten to "every 3 months" before matching
+UNSUPPORTED_INTERVAL_PATTERN = re.compile(r"\b(?:bi-?weekly|fortnightly|(?:every|each)\s+fortnight|bi-?monthly|semi-?monthly)\b", re.IGNORECASE)
+WEEKDAY_PATTERN = re.compile(r"\b(" + "|".join(sorted(WEEKDAY_WORDS, key=len, reverse=True)) + r")s?\b", re.IGNORECASE)
+DAY_OF_MONTH_PATTERN = re.compile(r"\b(?:on\s+the\s+)?(\d{1,2})(?:st|nd|rd|th)\b(?:\s+(?:of\s+)?(?:every|each|the)\s+month)?", re.IGNORECASE)
+IANA_PATTERN = re.compile(r"\b([A-Z][a-z]+/[A-Za-z_]+(?:/[A-Za-z_]+)?)\b")
+OFFSET_PATTERN = re.compile(r"\b((?:UTC|GMT)\s*[+-]\s*\d{1,2}(?::?\d{2})?)\b", re.IGNORECASE)
+_region_alternation = "|".join(REGION_TIMEZONES)
+_zone_suffix = r"(?:\s+(?:(?:standard|daylight)\s+)?time(?:\s*zone)?)"
+ALIAS_PATTERN = re.compile(
+    r"\b(?P<alias>" + "|".join(sorted(TIMEZONE_ALIASES, key=len, reverse=True)) + r")\b"
+    r"|(?:\b\d{1,2}(?:[:.]\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.)|\b\d{1,2}:\d{2})\s*(?P<after_time>" + _region_alternation + r")\b" + _zone_suffix + "?"
+    r"|\b(?P<named>" + _region_alternation + r")" + _zone_suffix + r"\b",
+    re.IGNORECASE
+)
+PART_OF_DAY_PATTERN = re.compile(r"\b(" + "|".join(PART_OF_DAY_HOURS) + r")\b", re.IGNORECASE)
+
+
+def parse_timezone(text: str) -> str:
+    match = IANA_PATTERN.search(text)
+    if match:
+        try:
+            ZoneInfo(match.group(1))
+            return match.group(1)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    match = OFFSET_PATTERN.search(text)
+    if match:
+        return re.sub(r"\s+", "", match.group(1)).upper()
+    match = ALIAS_PATTERN.search(text)
+    if match:
+        if match.group("alias"):
+            return TIMEZONE_ALIASES[match.group("alias").lower()]
+        return REGION_TIMEZONES[(match.group("after_time") or match.group("named")).lower()]
+    return "UTC"
+
+
+def parse_time_of_day(text: str):
+    """
+    Returns (hour, minute) for the first time mentioned, or None.
+    """
+    match = TIME_PATTERN.search(text)
+    if match:
+        if match.group(3):
+            hour, minute = int(match.group(1)), int(match.group(2) or 0)
+            if hour > 12 or minute > 59:
+                return None
+            is_pm = match.group(3).lower().startswith("p")
+            if is_pm and hour != 12:
+                hour += 12
+            elif not is_pm and hour == 12:
+                hour = 0
+            return hour, minute
+        return int(match.group(4)), int(match.group(5))
+    match = PART_OF_DAY_PATTERN.search(text)
+    if match:
+        return PART_OF_DAY_HOURS[match.group(1).lower()], 0
+    return None
+
+
+def parse_natural_schedule(text: str):
+    """
+    Converts a natural-language schedule into (cron_expression, timezone).
+    Covers times with minutes, weekdays/weekends, specific weekdays, intervals
+    ("every 15 minutes", "every 2 hours", "every 3 months"), monthly days and
+    timezone mentions.
+    Raises ValueError for intervals one cron expression cannot fire at exactly:
+    steps that do not divide their field evenly ("every 45 minutes", "every 7 hours")
+    and multi-day or multi-week intervals ("every 2 days", "every other week"),
+    which a cron step would restart at each month or week boundary.
+    """
+    lowered = re.sub(r"\bquarterly\b", "every 3 months", text.lower())
+    lowered = re.sub(r"\bevery\s+(?:1|one)\s+", "every ", lowered)
+    tz = parse_timezone(text)
+    time_of_day = parse_time_of_day(text)
+    hour, minute = time_of_day if time_of_day else (9, 0)
+
+    unsupported = UNSUPPORTED_INTERVAL_PATTERN.search(lowered)
+    if unsupported:
+        raise ValueError(f"'{unsupported.group(0)}' cannot be expressed as a single cron schedule")
+
+    interval = INTERVAL_PATTERN.search(lowered)
+    if interval:
+        amount = 2 if interval.group(1) == "other" else int(interval.group(1) or 1)
+        unit = interval.group(2)
+        if amount == 0:
+            raise ValueError(f"'{interval.group(0)}' is not a valid interval")
+        # Whole multiples move to the next field; a step must divide its field (60 minutes,
+        # 24 hours, 12 months) or the gap across the field boundary is shorter than the rest
+        if unit.startswith("min") and amount % 60 == 0:
+            unit, amount = "hour", amount // 60
+        if unit.startswith("h") and amount % 24 == 0:
+            unit, amount = "day", amount // 24
+        if unit == "month" and amount % 12 == 0:
+            raise ValueError(f"'{interval.group(0)}' cannot be expressed as a single cron schedule")
+        if unit.startswith("min") and 60 % amount == 0:
+            return ("* * * * *" if amount == 1 else f"*/{amount} * * * *"), tz
+        if unit.startswith("h") and 24 % amount == 0:
+            start_minute = minute if time_of_day else 0
+            return (f"{start_minute} * * * *" if amount == 1 else f"{start_minute} */{amount} * * *"), tz
+        if unit == "month" and 12 % amount == 0 and amount > 1:
+            day_match = DAY_OF_MONTH_PATTERN.search(lowered)
+            day_of_month = int(day_match.group(1)) if day_match and 1 <= int(day_match.group(1)) <= 31 else 1
+            return f"{minute} {hour} {day_of_month} */{amount} *", tz
+        if amount > 1:
+            raise ValueError(f"'{interval.group(0)}' cannot be expressed as a single cron schedule")
+        # "every day", "every week", "every month" fall through to the rules below
+
+    if re.search(r"\bhourly\b", lowered):
+        return "0 * * * *", tz
+
+    if re.search(r"\bweekdays?\b|\bwork\s*days?\b|\bbusiness\s+days?\b|monday\s+(?:to|through|-)\s+friday", lowered):
+        return f"{minute} {hour} * * 1-5", tz
+    if re.search(r"\bweekends?\b", lowered):
+        return f"{minute} {hour} * * 0,6", tz
+
+    weekdays = sorted({WEEKDAY_WORDS[m.lower()] for m in WEEKDAY_PATTERN.findall(lowered)})
+    if weekdays:
+        return f"{minute} {hour} * * {','.join(str(d) for d in weekdays)}", tz
+
+    if re.search(r"\bmonthly\b|\bevery\s+month\b|\beach\s+month\b|\bof\s+(?:every|each|the)\s+month\b", lowered):
+        day_match = DAY_OF_MONTH_PATTERN.search(lowered)
+        day_of_month = int(day_match.group(1)) if day_match and 1 <= int(day_match.group(1)) <= 31 else 1
+        return f"{minute} {hour} {day_of_month} * *", tz
+
+    if re.search(r"\bweekly\b|\bevery\s+(?:week|wk)\b|\beach\s+week\b", lowered):
+        return f"{minute} {hour} * * 1", tz
+
+    return f"{minute} {hour} * * *", tz
+
+
+def describe_cron(expression: str) -> str:
+    """
+    Short human-readable description of common cron shapes.
+    """
+    minute, hour, day_of_month, month, day_of_week = expression.split()
+    if hour == "*" or hour.startswith("*/"):
+        every = "hour" if hour == "*" else f"{hour[2:]} hours"
+        if minute == "*":
+            return "Every minute"
+        if minute.startswith("*/"):
+            return f"Every {minute[2:]} minutes"
+        return f"Every {every} at minute {minute}"
+    if not (hour.isdigit() and minute.isdigit()):
+        return f"Cron schedule '{expression}'"
+    time_label = f"{int(hour) % 12 or 12}:{int(minute):02d} {'PM' if int(hour) >= 12 else 'AM'}"
+    if day_of_week == "1-5":
+        return f"Every weekday at {time_label}"
+    if day_of_week == "0,6":
+        return f"Every weekend day at {time_label}"
+    if day_of_week != "*":
+        names = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+        days = [names[int(d) % 7] for d in day_of_week.split(",") if d.isdigit()]
+        return f"Every {', '.join(days)} at {time_label}" if days else f"Cron schedule '{expression}'"
+    if day_of_month.startswith("*/"):
+        return f"Every {day_of_month[2:]} days at {time_label}"
+    if month.startswith("*/") and day_of_month.isdigit():
+        return f"Every {month[2:]} months on day {day_of_month} at {time_label}"
+    if day_of_month != "*":
+        return f"Every month on day {day_of_month} at {time_label}"
+    return f"Every day at {time_label}"
+
+
+# --- Schedule simulation ---
+
+class ScheduleSimulator:
+    """
+    Projects many scheduled workflows over a time window with a min-heap of next
+    fire times, tracking overlapping executions overall and per connector.
+    """
+
+    def __init__(self, schedules: list):
+        """
+        `schedules` items: {"id", "cron", "timezone", "duration_s", "connectors"}.
+        """
+        self.schedules = schedules
+
+    def run(self, start: datetime, end: datetime) -> dict:
+        # Heap entries use epoch seconds; comparing ints is much cheaper than datetimes
+        fire_heap = []
+        for index, schedule in enumerate(self.schedules):
+            fires = CronExpression(schedule["cron"]).iter_fire_timestamps(start, end, schedule.get("timezone", "UTC"))
+            first = next(fires, None)
+            if first is not None:
+                fire_heap.append((first, index, fires))
+        heapq.heapify(fire_heap)
+
+        running = []
+        running_by_connector = {}
+        peak_concurrent, peak_at = 0, None
+        connector_peaks = {}
+        per_minute = {}
+        executions = 0
+        durations = [s.get("duration_s", 30) for s in self.schedules]
+        connectors = [set(s.get("connectors", [])) for s in self.schedules]
+
+        while fire_heap:
+            fire_time, index, fires = fire_heap[0]
+            finish_time = fire_time + durations[index]
+            executions += 1
+            per_minute[fire_time] = per_minute.get(fire_time, 0) + 1
+
+            while running and running[0] <= fire_time:
+                heapq.heappop(running)
+            heapq.heappush(running, finish_time)
+            if len(running) > peak_concurrent:
+                peak_concurrent, peak_at = len(running), fire_time
+
+            for connector in connectors[index]:
+                connector_running = running_by_connector.setdefault(connector, [])
+                while connector_running and connector_running[0] <= fire_time:
+                    heapq.heappop(connector_running)
+                heapq.heappush(connector_running, finish_time)
+                if len(connector_running) > connector_peaks.get(connector, (0, None))[0]:
+                    connector_peaks[connector] = (len(connector_running), fire_time)
+
+            following = next(fires, None)
+            if following is None:
+                heapq.heappop(fire_heap)
+            else:
+                heapq.heapreplace(fire_heap, (following, index, fires))
+
+        to_datetime = lambda timestamp: datetime.fromtimestamp(timestamp, timezone.utc) if timestamp is not None else None
+        busiest_minute, busiest_starts = max(per_minute.items(), key=lambda item: item[1]) if per_minute else (None, 0)
+        return {
+            "schedules": len(self.schedules),
+            "executions": executions,
+            "peak_concurrent": peak_concurrent,
+            "peak_at": to_datetime(peak_at),
+            "busiest_minute": to_datetime(busiest_minute),
+            "busiest_minute_starts": busiest_starts,
+            "connector_peaks": {name: {"concurrent": count, "at": to_datetime(at)} for name, (count, at) in connector_peaks.items()},
+        }
+
+
+def schedules_from_workflows(workflows: list, duration_s: float = 30) -> list:
+    """
+    Extracts simulator schedules from workflow JSONs with scheduleTrigger nodes.
+    """
+    schedules = []
+    for workflow_index, workflow in enumerate(workflows):
+        connectors = [n["type"].split(".")[-1] for n in workflow.get("nodes", []) if "Trigger" not in n.get("type", "")]
+        for node in workflow.get("nodes", []):
+            if node.get("type") == "n8n-nodes-base.scheduleTrigger":
+                parameters = node.get("parameters", {})
+                schedules.append({
+                    "id": f"{workflow_index}:{node.get('name')}",
+                    "cron": parameters.get("cronExpression", "0 9 * * *"),
+                    "timezone": parameters.get("timezone", "UTC"),
+                    "duration_s": duration_s,
+                    "connectors": connectors,
+                })
+    return schedules
+
+
+if __name__ == "__main__":
+    for phrase in ["9:30 PM daily", "every 15 minutes", "every 2 hours", "weekdays at 8am MYT",
+                   "every Monday and Thursday at 14:45 America/New_York", "on the 15th of every month at noon",
+                   "every hour", "weekly", "every day at 7 AM GMT+8", "every 3 months on the 1st"]:
+        cron, tz = parse_natural_schedule(phrase)
+        fires = next_fire_times(cron, 3, datetime(2025, 3, 8, tzinfo=timezone.utc), tz)
+        print(f"{phrase!r:55} -> {cron:18} {tz:20} next: {', '.join(f.strftime('%a %d %H:%M') for f in fires)}")
+
+    print("\nInvalid:", validate_cron("61 9 * * *"), "|", validate_cron("0 9 30 2 *"), "|", validate_cron("*/90 * * * *"))
+
+    # Benchmark next-fire computation and the schedule simulator
+    rng = random.Random(7)
+    start = time.perf_counter()
+    for _ in range(10_000):
+        next_fire_times("*/5 9-17 * * 1-5", 10, datetime(2025, 1, 1, tzinfo=timezone.utc), "Asia/Kuala_Lumpur")
+    print(f"\n10k x next-10 fire times: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    zones = ["UTC", "Asia/Kuala_Lumpur", "America/New_York", "Europe/London"]
+    connectors = ["whatsApp", "sendEmail", "slack", "googleSheets", "telegram"]
+    schedules = []
+    for i in range(5_000):
+        cron = rng.choice([f"{rng.choice([0, 0, 0, 15, 30, 45])} {rng.randint(7, 18)} * * *", f"*/{rng.choice([15, 30, 60])} * * * *",
+                           f"0 {rng.randint(8, 10)} * * 1-5", f"0 9 {rng.randint(1, 28)} * *"]).replace("*/60", "0")
+        schedules.append({"id": str(i), "cron": cron, "timezone": rng.choice(zones),
+                          "duration_s": rng.uniform(5, 120), "connectors": rng.sample(connectors, 2)})
+    window_start = datetime(2025, 1, 6, tzinfo=timezone.utc)
+    start = time.perf_counter()
+    report = ScheduleSimulator(schedules).run(window_start, window_start + timedelta(days=7))
+    elapsed = time.perf_counter() - start
+    print(f"Simulated {report['schedules']} schedules / {report['executions']} executions over 7 days in {elapsed:.2f}s")
+    print(f"Peak concurrent executions: {report['peak_concurrent']} at {report['peak_at']}")
+    print(f"Busiest minute: {report['busiest_minute']} with {report['busiest_minute_starts']} starts")
+    for connector, peak in sorted(report["connector_peaks"].items()):
+        print(f"   {connector:14} peak {peak['concurrent']} at {peak['at']}")
@@ -0,0 +1,312 @@
+import re
+import time
+
+from workflow_generator import extract_contact_info
+from node_registry import NODE_TYPES
+from cron_engine import (parse_natural_schedule, describe_cron, TIME_PATTERN, WEEKDAY_PATTERN, PART_OF_DAY_PATTERN,
+                         IANA_PATTERN, OFFSET_PATTERN, ALIAS_PATTERN)
+
+CONFIDENCE_THRESHOLD = 0.8
+
+# Trigger phrases (node type, pattern, node name, summary line) and action phrases
+# (node type, pattern, base node name), declared per node type in node_registry
+TRIGGER_RULES = [(name, *node_type.fast_path) for name, node_type in NODE_TYPES.items()
+                 if node_type.fast_path and node_type.is_trigger]
+ACTION_RULES = [(name, *node_type.fast_path) for name, node_type in NODE_TYPES.items()
+                if node_type.fast_path and not node_type.is_trigger]
+
+# Anything conditional, delayed or multi-step needs the LLM to plan function/wait nodes
+UNSUPPORTED_PATTERN = re.compile(
+    r"\bif\b|\bunless\b|\botherwise\b|\bonly\b|\bexcept\b|\bwait\b|\bdelay\b|\blater\b|\bafter\s+\d|"
+    r"\bcondition|\bfilter|\btransform|\bapi\b|\bhttp|\bcrm\b(?!\s+(?:lead|deal|contact|record))|\bwebhook\b.*\bwebhook\b|\bor\b",
+    re.IGNORECASE
+)
+CLAUSE_SPLIT_PATTERN = re.compile(r"\s*(?:,\s*(?:and\s+)?(?:then\s+)?|;\s*|\band\s+then\b|\bthen\b|\band\s+(?=(?:also\s+)?(?:an?\s+)?(?:send|notify|message|email|e-mail|post|add|append|update|log|alert|whats\s?app|slack|telegram)))\s*", re.IGNORECASE)
+SCHEDULE_FILLER_PATTERN = re.compile(
+    r"(?:\b(?:at|on|in|every|each|other|daily|hourly|weekly|monthly|weekdays?|weekends?|minutes?|hours?|days?|time)\b\s*)+"
+    r"(?:\band\b(?=\s*(?:,|$)))?|^\s*(?:and|,)\s*|\b(?:and|,)\s*(?=,|$)", re.IGNORECASE)
+# Schedule wording strip_schedule_words() cannot account for ("for 3 weeks", "twice a day",
+# "every other week"); if any is left, the cron may not say what the user asked for
+SCHEDULE_RESIDUE_PATTERN = re.compile(
+    r"\b(?:\d+\s*(?:min(?:ute)?s?|h(?:ou)?rs?|days?)|weeks?|wks?|months?|years?|yearly|annually|fortnight(?:ly)?|"
+    r"quarter(?:ly)?|bi-?(?:weekly|monthly)|twice|times|until|starting|other|every|each)\b", re.IGNORECASE)
+# Confidence lost when a message body is generated instead of taken from the request
+DEFAULT_MESSAGE_PENALTY = 0.1
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s().-]{6,}\d")
+QUOTED_PATTERN = re.compile(r"“([^”]{3,})”|\"([^\"]{3,})\"|(?<!\w)'([^']{3,})'(?!\w)")
+# Unquoted message text runs to the end of its clause
+SAYING_PATTERN = re.compile(r"\b(?:saying|that\s+says|with\s+(?:the\s+)?(?:message|text))\s*:?\s+(?!\ue000)"
+                            r"(.+?)(?=\s*(?:[,;]|\band\s+then\b|\bthen\b|$))", re.IGNORECASE)
+PAYLOAD_TOKEN_PATTERN = re.compile("\ue000(.)")
+# Sheet operations the fast path builds; any other verb (delete, clear, read...) goes to the LLM
+SHEET_VERB_PATTERN = re.compile(r"\b(?:append|add|log|update)(?:s|ed|ing)?\b", re.IGNORECASE)
+OTHER_SHEET_VERB_PATTERN = re.compile(
+    r"\b(?:delete|remove|clear|erase|read|get|fetch|look\s+up|lookup|find|search|copy|export|download|sort|"
+    r"rename|create|replace|overwrite|duplicate|insert|write|save|record|store|put)(?:s|d|ed|ing)?\b", re.IGNORECASE)
+CHAT_ID_PATTERN = re.compile(r"chat\s*id\s*:?\s*(-?\d+)|(@[A-Za-z0-9_]{3,})", re.IGNORECASE)
+
+fast_path_metrics = {
+    "requests": 0,
+    "fast_path_hits": 0,
+    "llm_fallbacks": 0,
+    "fallback_reasons": {},
+    "total_plan_time_ms": 0.0,
+}
+
+
+class FastPathPlan:
+    """
+    Result of the rule-based planner. `workflow` is None when the request was not understood.
+    """
+
+    def __init__(self, confidence=0.0, summary=None, workflow=None, reason=None):
+        self.confidence = confidence
+        self.summary = summary
+        self.workflow = workflow
+        self.reason = reason
+
+    @property
+    def accepted(self):
+        return self.workflow is not None and self.confidence >= CONFIDENCE_THRESHOLD
+
+
+def strip_schedule_words(text: str) -> str:
+    """
+    Removes times, weekdays and timezones that parse_natural_schedule already consumed.
+    """
+    # Aliases go first: "9am central" is matched together with its time
+    for pattern in (ALIAS_PATTERN, TIME_PATTERN, IANA_PATTERN, OFFSET_PATTERN, WEEKDAY_PATTERN, PART_OF_DAY_PATTERN):
+        text = pattern.sub(" ", text)
+    text = SCHEDULE_FILLER_PATTERN.sub(" ", text)
+    return re.sub(r"\s+", " ", text).strip(" ,.")
+
+
+def extract_phone(text: str):
+    matches = PHONE_PATTERN.findall(text)
+    phones = []
+    for match in matches:
+        digits = re.sub(r"\D", "", match)
+        if len(digits) >= 8:
+            phones.append(("+" if match.strip().startswith("+") else "") + digits)
+    return phones
+
+
+def mask_payloads(text: str):
+    """
+    Replaces quoted and "saying ..." message text with placeholder tokens, so schedule
+    stripping, clause splitting and action matching never look inside a message body.
+    Returns (masked text, payloads); extract_message() maps a token back to its payload.
+    """
+    payloads = []
+
+    def token(payload):
+        payloads.append(payload)
+        return "\ue000" + chr(0xe100 + len(payloads) - 1)
+
+    text = QUOTED_PATTERN.sub(lambda match: token(next(group for group in match.groups() if group)), text)
+    # Only the text after "saying" is masked; the keyword stays in its clause
+    text = SAYING_PATTERN.sub(lambda match: match.group(0)[:match.start(1) - match.start()] + token(match.group(1)), text)
+    return text, payloads
+
+
+def extract_message(clause: str, payloads: list):
+    token = PAYLOAD_TOKEN_PATTERN.search(clause)
+    return payloads[ord(token.group(1)) - 0xe100] if token else None
+
+
+def match_triggers(user_query: str):
+    matched = []
+    for rule in TRIGGER_RULES:
+        match = rule[1].search(user_query)
+        if match:
+            matched.append((rule, match))
+    return matched
+
+
+def build_action(node_type: str, clause: str, trigger_context: str, payloads: list):
+    """
+    Builds parameters for one action clause (with payloads masked by mask_payloads()).
+    Returns (parameters, summary line, confidence penalty).
+    """
+    contacts = extract_contact_info(clause)
+    message = extract_message(clause, payloads)
+    penalty = 0.0 if message else DEFAULT_MESSAGE_PENALTY
+    default_note = "" if message else " (default message)"
+
+    if node_type == "n8n-nodes-base.whatsApp":
+        phones = extract_phone(clause)
+        if len(phones) > 1:
+            return None, None, 1.0
+        phone = phones[0] if phones else "[PHONE_NUMBER]"
+        penalty += 0.0 if phones else 0.1
+        parameters = {"phoneNumber": phone, "message": message or f"New update: {trigger_context}"}
+        return parameters, f"Send WhatsApp to {phone}{default_note}", penalty
+
+    if node_type == "n8n-nodes-base.telegram":
+        chat_match = CHAT_ID_PATTERN.search(clause)
+        chat_id = (chat_match.group(1) or chat_match.group(2)) if chat_match else "[CHAT_ID]"
+        penalty += 0.0 if chat_match else 0.1
+        parameters = {"chatId": chat_id, "message": message or f"New update: {trigger_context}"}
+        return parameters, f"Send Telegram message to {chat_id}{default_note}", penalty
+
+    if node_type == "n8n-nodes-base.slack":
+        if len(contacts["channels"]) > 1:
+            return None, None, 1.0
+        channel = "#" + contacts["channels"][0] if contacts["channels"] else "[CHANNEL]"
+        penalty += 0.0 if contacts["channels"] else 0.1
+        parameters = {"channel": channel, "message": message or f"New update: {trigger_context}"}
+        return parameters, f"Send Slack notification to {channel}{default_note}", penalty
+
+    if node_type == "n8n-nodes-base.googleSheets":
+        verbs = {verb.lower() for verb in SHEET_VERB_PATTERN.findall(clause)}
+        if not verbs or OTHER_SHEET_VERB_PATTERN.search(clause):
+            return None, None, 1.0
+        operation = "update" if any(verb.startswith("update") for verb in verbs) else "append"
+        parameters = {"sheetId": "[SHEET_ID]", "operation": operation, "data": "[TRIGGER_DATA]"}
+        return parameters, f"{operation.title()} row in Google Sheets", 0.0
+
+    if node_type == "n8n-nodes-base.sendEmail":
+        if len(contacts["emails"]) > 1:
+            return None, None, 1.0
+        recipient = contacts["emails"][0] if contacts["emails"] else "[EMAIL_ADDRESS]"
+        penalty += 0.0 if contacts["emails"] else 0.1
+        parameters = {"recipient": recipient, "subject": f"Notification: {trigger_context}",
+                      "body": message or f"This is an automated notification. {trigger_context}."}
+        return parameters, f"Send email to {recipient}{default_note}", penalty
+
+    return None, None, 1.0
+
+
+def plan_workflow(user_query: str) -> FastPathPlan:
+    """
+    Rule-based planner for simple "When X, send Y to Z" and "Every day at 9 AM, do Y"
+    requests. Returns a FastPathPlan with a confidence score; callers should only
+    use the workflow when plan.accepted is True.
+    """
+    user_query, payloads = mask_payloads(user_query)
+    if UNSUPPORTED_PATTERN.search(user_query):
+        return FastPathPlan(reason="conditional or unsupported step")
+
+    triggers = match_triggers(user_query)
+    if not triggers:
+        return FastPathPlan(reason="no trigger recognised")
+    if len(triggers) > 1:
+        return FastPathPlan(reason="multiple triggers")
+    (trigger_type, _, trigger_name, trigger_summary), trigger_match = triggers[0]
+
+    trigger_parameters = {}
+    if trigger_type == "n8n-nodes-base.scheduleTrigger":
+        try:
+            cron, timezone = parse_natural_schedule(user_query)
+        except ValueError:
+            return FastPathPlan(reason="schedule has no single cron form")
+        trigger_parameters = {"cronExpression": cron, "timezone": timezone}
+        schedule = describe_cron(cron)
+        trigger_summary = trigger_summary.format(schedule=schedule + ("" if timezone == "UTC" else f" ({timezone})"))
+        trigger_name = "Daily Schedule" if cron.endswith(" * * *") and cron.split()[1].isdigit() else "Schedule"
+    trigger_context = trigger_summary.split(": ", 1)[1]
+
+    # Everything outside the trigger phrase should be a list of actions
+    remainder = (user_query[:trigger_match.start()] + " " + user_query[trigger_match.end():]).strip(" ,.")
+    if trigger_type == "n8n-nodes-base.scheduleTrigger":
+        remainder = strip_schedule_words(remainder)
+        if SCHEDULE_RESIDUE_PATTERN.search(remainder):
+            return FastPathPlan(reason="schedule not fully understood")
+    clauses = [c.strip(" ,.") for c in CLAUSE_SPLIT_PATTERN.split(remainder) if c and c.strip(" ,.")]
+    sequential = bool(re.search(r"\bthen\b", remainder, re.IGNORECASE))
+    if not clauses:
+        return FastPathPlan(reason="no actions recognised")
+
+    confidence = 1.0
+    nodes = [{"name": trigger_name, "type": trigger_type, "parameters": trigger_parameters}]
+    connections = []
+    summary = [trigger_summary]
+    name_counts = {}
+
+    for clause in clauses:
+        matched_types = [rule for rule in ACTION_RULES if rule[1].search(clause)]
+        if len(matched_types) != 1:
+            if re.fullmatch(r"(?:please|also|too|automatically|immediately|right away|for me)?", clause, re.IGNORECASE):
+                continue
+            return FastPathPlan(reason="ambiguous or unknown action clause")
+
+        node_type, _, base_name = matched_types[0]
+        parameters, action_summary, penalty = build_action(node_type, clause, trigger_context, payloads)
+        if parameters is None:
+            if node_type == "n8n-nodes-base.googleSheets":
+                return FastPathPlan(reason="unsupported Google Sheets operation")
+            return FastPathPlan(reason="action needs more than one recipient")
+        confidence -= penalty
+
+        name_counts[base_name] = name_counts.get(base_name, 0) + 1
+        name = base_name if name_counts[base_name] == 1 else f"{base_name} {name_counts[base_name]}"
+        source = nodes[-1]["name"] if sequential and len(nodes) > 1 else trigger_name
+        nodes.append({"name": name, "type": node_type, "parameters": parameters})
+        connections.append({"source": source, "target": name})
+        summary.append(f"Action {len(summary)}: {action_summary}")
+
+    if len(nodes) == 1:
+        return FastPathPlan(reason="no actions recognised")
+
+    workflow = {"nodes": nodes, "connections": connections}
+    return FastPathPlan(confidence=round(max(confidence, 0.0), 2), summary=summary, workflow=workflow)
+
+
+def try_fast_path(user_query: str):
+    """
+    Runs the planner and records coverage metrics. Returns the plan if it is
+    confident enough to skip the LLM, otherwise None.
+    """
+    started = time.perf_counter()
+    plan = plan_workflow(user_query)
+    fast_path_metrics["requests"] += 1
+    fast_path_metrics["total_plan_time_ms"] += (time.perf_counter() - started) * 1000
+
+    if plan.accepted:
+        fast_path_metrics["fast_path_hits"] += 1
+        return plan
+
+    reason = plan.reason or f"low confidence ({plan.confidence})"
+    fast_path_metrics["llm_fallbacks"] += 1
+    fast_path_metrics["fallback_reasons"][reason] = fast_path_metrics["fallback_reasons"].get(reason, 0) + 1
+    return None
+
+
+def get_fast_path_metrics() -> dict:
+    """
+    Coverage and latency of the rule-based fast path in this process.
+    """
+    requests = fast_path_metrics["requests"]
+    return {
+        **fast_path_metrics,
+        "coverage": fast_path_metrics["fast_path_hits"] / requests if requests else 0.0,
+        "avg_plan_time_ms": fast_path_metrics["total_plan_time_ms"] / requests if requests else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    test_queries = [
+        "When a Jotform is submitted, send a WhatsApp to +60123456789 and an email to admin@company.com",
+        "Every day at 9 AM, send a Slack message to #standup",
+        "Every day at 9 AM for 3 weeks, send a Slack message saying stand-up time to #standup",
+        "Every 2 weeks, send a Slack message to #payroll",
+        "Every day at 9:30 PM, update Google Sheets and then send a Slack summary to #reports",
+        "Every Monday and Thursday at 8 AM MYT, send a Telegram message to @ops_team",
+        "When a new lead is created, email sales@company.com",
+        "When payment webhook fires, update CRM, notify customer via WhatsApp, and alert finance team on Slack",
+        "If a form is submitted after hours, wait 2 hours and then WhatsApp the manager",
+    ]
+    for query in test_queries:
+        plan = plan_workflow(query)
+        print(f"'{query}'")
+        print(f"   confidence={plan.confidence} accepted={plan.accepted} reason={plan.reason}")
+        if plan.summary:
+            for line in plan.summary:
+                print(f"   {line}")
+
+    for _ in range(1000):
+        for query in test_queries:
+            try_fast_path(query)
+    metrics = get_fast_path_metrics()
+    print(f"\nCoverage: {metrics['coverage']:.0%} | avg plan time: {metrics['avg_plan_time_ms']:.3f} ms")
+    print(f"Fallback reasons: {metrics['fallback_reasons']}")
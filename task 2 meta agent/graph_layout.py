@@ -0,0 +1,279 @@
+import time
+import random
+from collections import defaultdict
+
+LAYER_SPACING = 250
+NODE_SPACING = 150
+CROSSING_SWEEPS = 8
+ALIGNMENT_PASSES = 4
+
+
+def _build_graph(workflow_json):
+    """
+    Returns (names, successors) using the first node for each name and ignoring
+    connections to unknown nodes and self-loops.
+    """
+    names = []
+    seen = set()
+    for node in workflow_json.get("nodes", []):
+        if node.get("name") not in seen:
+            seen.add(node.get("name"))
+            names.append(node.get("name"))
+
+    successors = defaultdict(list)
+    edges = set()
+    for conn in workflow_json.get("connections", []):
+        source, target = conn.get("source"), conn.get("target")
+        if source in seen and target in seen and source != target and (source, target) not in edges:
+            edges.add((source, target))
+            successors[source].append(target)
+    return names, successors
+
+
+def _remove_cycles(names, successors, triggers):
+    """
+    Reverses back edges found by an iterative DFS (started from triggers first)
+    so the graph becomes a DAG.
+    """
+    state = {}
+    dag = defaultdict(list)
+    roots = [n for n in names if n in triggers] + [n for n in names if n not in triggers]
+    for root in roots:
+        if root in state:
+            continue
+        state[root] = 1
+        stack = [(root, iter(successors.get(root, ())))]
+        while stack:
+            current, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                state[current] = 2
+                stack.pop()
+            elif state.get(child) == 1:
+                dag[child].append(current)  # back edge, reversed
+            else:
+                dag[current].append(child)
+                if child not in state:
+                    state[child] = 1
+                    stack.append((child, iter(successors.get(child, ()))))
+    return dag
+
+
+def _assign_layers(names, dag):
+    """
+    Longest-path layering in topological order (Kahn), so every edge points to a later layer.
+    """
+    indegree = {name: 0 for name in names}
+    for source in dag:
+        for target in dag[source]:
+            indegree[target] += 1
+    layer = {name: 0 for name in names}
+    queue = [name for name in names if indegree[name] == 0]
+    while queue:
+        current = queue.pop()
+        for target in dag.get(current, ()):
+            layer[target] = max(layer[target], layer[current] + 1)
+            indegree[target] -= 1
+            if indegree[target] == 0:
+                queue.append(target)
+    return layer
+
+
+def _split_long_edges(names, dag, layer):
+    """
+    Inserts dummy nodes so every edge spans exactly one layer.
+    Returns (layers, down, up) where down/up are adjacency lists between consecutive layers.
+    """
+    layers = defaultdict(list)
+    for name in names:
+        layers[layer[name]].append(name)
+
+    down = defaultdict(list)
+    up = defaultdict(list)
+    dummy_count = 0
+    for source in names:
+        for target in dag.get(source, ()):
+            previous = source
+            for intermediate_layer in range(layer[source] + 1, layer[target]):
+                dummy = ("__dummy__", dummy_count)
+                dummy_count += 1
+                layers[intermediate_layer].append(dummy)
+                down[previous].append(dummy)
+                up[dummy].append(previous)
+                previous = dummy
+            down[previous].append(target)
+            up[target].append(previous)
+
+    ordered = [layers[i] for i in range(max(layers) + 1)] if layers else []
+    return ordered, down, up
+
+
+def _count_crossings(upper, lower, down):
+    """
+    Counts crossings between two adjacent layers in O(E log V) with a Fenwick tree.
+    """
+    lower_position = {node: i for i, node in enumerate(lower)}
+    targets = []
+    for node in upper:
+        targets.extend(sorted(lower_position[t] for t in down.get(node, ())))
+    tree = [0] * (len(lower) + 1)
+    crossings = 0
+    for seen, position in enumerate(targets):
+        # edges already seen that end strictly to the right of this one
+        index = position + 1
+        not_greater = 0
+        while index > 0:
+            not_greater += tree[index]
+            index -= index & -index
+        crossings += seen - not_greater
+        index = position + 1
+        while index <= len(lower):
+            tree[index] += 1
+            index += index & -index
+    return crossings
+
+
+def _total_crossings(layers, down):
+    return sum(_count_crossings(layers[i], layers[i + 1], down) for i in range(len(layers) - 1))
+
+
+def _reduce_crossings(layers, down, up, sweeps=CROSSING_SWEEPS):
+    """
+    Barycenter heuristic with alternating downward and upward sweeps, keeping the best ordering.
+    """
+    best = [list(layer) for layer in layers]
+    best_crossings = _total_crossings(layers, down)
+    for sweep in range(sweeps):
+        if best_crossings == 0:
+            break
+        downward = sweep % 2 == 0
+        indices = range(1, len(layers)) if downward else range(len(layers) - 2, -1, -1)
+        for i in indices:
+            fixed = layers[i - 1] if downward else layers[i + 1]
+            neighbours = up if downward else down
+            fixed_position = {node: p for p, node in enumerate(fixed)}
+            current_position = {node: p for p, node in enumerate(layers[i])}
+
+            def barycenter(node):
+                adjacent = neighbours.get(node)
+                if not adjacent:
+                    return current_position[node]
+                return sum(fixed_position[n] for n in adjacent) / len(adjacent)
+
+            layers[i].sort(key=barycenter)
+        crossings = _total_crossings(layers, down)
+        if crossings < best_crossings:
+            best_crossings = crossings
+            best = [list(layer) for layer in layers]
+    return best, best_crossings
+
+
+def _place_layer(layer_nodes, desired):
+    """
+    Places nodes in order as close to their desired coordinates as the minimum spacing allows.
+    """
+    forward = []
+    for node in layer_nodes:
+        y = desired[node] if not forward else max(desired[node], forward[-1] + NODE_SPACING)
+        forward.append(y)
+    backward = []
+    for node in reversed(layer_nodes):
+        y = desired[node] if not backward else min(desired[node], backward[-1] - NODE_SPACING)
+        backward.append(y)
+    backward.reverse()
+    return {node: (a + b) / 2 for node, a, b in zip(layer_nodes, forward, backward)}
+
+
+def _assign_coordinates(layers, down, up):
+    """
+    Starts from centred layers, then pulls each node towards the mean of its
+    neighbours in alternating directions while keeping the crossing-reduced order.
+    """
+    y = {}
+    for layer_nodes in layers:
+        offset = (len(layer_nodes) - 1) * NODE_SPACING / 2
+        for i, node in enumerate(layer_nodes):
+            y[node] = i * NODE_SPACING - offset
+
+    for iteration in range(ALIGNMENT_PASSES):
+        downward = iteration % 2 == 0
+        indices = range(1, len(layers)) if downward else range(len(layers) - 2, -1, -1)
+        neighbours = up if downward else down
+        for i in indices:
+            desired = {}
+            for node in layers[i]:
+                adjacent = neighbours.get(node)
+                desired[node] = sum(y[n] for n in adjacent) / len(adjacent) if adjacent else y[node]
+            y.update(_place_layer(layers[i], desired))
+    return y
+
+
+def compute_layout(workflow_json):
+    """
+    Layered (Sugiyama-style) layout: cycle removal, longest-path layering,
+    dummy nodes for long edges, barycenter crossing reduction and coordinate
+    assignment. Returns ({node name: [x, y]}, crossings).
+    """
+    names, successors = _build_graph(workflow_json)
+    if not names:
+        return {}, 0
+    triggers = {n.get("name") for n in workflow_json.get("nodes", []) if "Trigger" in n.get("type", "")}
+
+    dag = _remove_cycles(names, successors, triggers)
+    layer = _assign_layers(names, dag)
+    layers, down, up = _split_long_edges(names, dag, layer)
+    layers, crossings = _reduce_crossings(layers, down, up)
+    y = _assign_coordinates(layers, down, up)
+
+    min_y = min(y[name] for name in names)
+    positions = {name: [layer[name] * LAYER_SPACING, int(round(y[name] - min_y))] for name in names}
+    return positions, crossings
+
+
+def apply_layout(workflow_json):
+    """
+    Computes the layout and writes it into each node's "position". Returns the workflow.
+    """
+    positions, _ = compute_layout(workflow_json)
+    for node in workflow_json.get("nodes", []):
+        if node.get("name") in positions:
+            node["position"] = list(positions[node["name"]])
+    return workflow_json
+
+
+def build_layered_workflow(node_count, width=12, seed=3):
+    """
+    Synthetic workflow shaped like real automations: triggers fanning out into
+    branches that occasionally merge or skip a layer.
+    """
+    rng = random.Random(seed)
+    nodes = [{"name": f"Trigger {i}", "type": "n8n-nodes-base.webhookTrigger"} for i in range(max(1, width // 4))]
+    previous = [n["name"] for n in nodes]
+    older = []
+    connections = []
+    while len(nodes) < node_count:
+        current = []
+        for _ in range(min(rng.randint(width // 2, width), node_count - len(nodes))):
+            name = f"Action {len(nodes)}"
+            nodes.append({"name": name, "type": "n8n-nodes-base.slack"})
+            current.append(name)
+            pool = older if older and rng.random() < 0.1 else previous
+            for source in rng.sample(pool, min(len(pool), rng.choice([1, 1, 1, 2]))):
+                connections.append({"source": source, "target": name})
+        older, previous = previous, current
+    return {"nodes": nodes, "connections": connections}
+
+
+if __name__ == "__main__":
+    for size in (10, 100, 1_000, 5_000, 20_000):
+        workflow = build_layered_workflow(size)
+        names, successors = _build_graph(workflow)
+        dag = _remove_cycles(names, successors, set())
+        initial_layers, down, _ = _split_long_edges(names, dag, _assign_layers(names, dag))
+        initial_crossings = _total_crossings(initial_layers, down)
+
+        start = time.perf_counter()
+        positions, crossings = compute_layout(workflow)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"{size:>6} nodes / {len(workflow['connections']):>6} edges: layout in {elapsed_ms:8.1f} ms, "
+              f"crossings {initial_crossings} -> {crossings}")
@@ -0,0 +1,596 @@
+import time
+import random
+from collections import Counter, defaultdict, deque
+
+from node_registry import TRIGGER_MARKER, get_node_type
+
+MAX_REPORTED_CYCLES = 5
+
+
+def is_trigger(node):
+    return TRIGGER_MARKER in node.get("type", "")
+
+
+def check_node_parameters(node):
+    """
+    Checks a single node against its parameter schema. Returns (errors, warnings).
+    """
+    errors = []
+    warnings = []
+    name = node.get("name", "<unnamed>")
+    type_name = node.get("type", "")
+    node_type = get_node_type(type_name)
+
+    if node_type is None:
+        warnings.append(f"Node '{name}' uses unsupported type '{type_name}'")
+        return errors, warnings
+
+    parameters = node.get("parameters") or {}
+    if not isinstance(parameters, dict):
+        errors.append(f"Node '{name}' has invalid parameters (expected an object)")
+        return errors, warnings
+
+    for key, types, readable in node_type.required:
+        value = parameters.get(key)
+        if value is None or value == "":
+            warnings.append(f"{node_type.label} node '{name}' missing {readable}")
+        elif not isinstance(value, types) or isinstance(value, bool):
+            warnings.append(f"{node_type.label} node '{name}' has invalid {readable}: {value!r}")
+        elif key in node_type.allowed_values and value not in node_type.allowed_values[key]:
+            warnings.append(f"{node_type.label} node '{name}' has unsupported {readable} '{value}'")
+
+    for key, types, readable in node_type.optional:
+        value = parameters.get(key)
+        if value is not None and not isinstance(value, types):
+            warnings.append(f"{node_type.label} node '{name}' has invalid {readable}: {value!r}")
+
+    for check in node_type.checks:
+        problem = check(parameters)
+        if problem:
+            errors.append(f"{node_type.label} node '{name}': {problem}")
+
+    return errors, warnings
+
+
+class WorkflowGraphValidator:
+    """
+    Linear-time structural validator for workflow graphs.
+
+    A full validation runs in O(V + E). apply_changes() then updates the state
+    for one edit: only the touched nodes are re-checked, and topology changes
+    update reachability downstream of the changed edges and the strongly
+    connected components that contain them, instead of the whole graph.
+    Cycles are reported per strongly connected component, so the full and the
+    incremental pass report the same cycles whatever order edges were added in.
+    """
+
+    def __init__(self, workflow_json=None):
+        self.nodes = {}
+        self.duplicates = {}
+        self.triggers = set()
+        self._positions = {}  # name -> index of its first node in the workflow's node list
+        self._node_count = 0
+        self.successors = defaultdict(set)
+        self.predecessors = defaultdict(set)
+        self.repeated_edges = {}  # (source, target) -> connections beyond the first
+        self.dangling = {}  # (source, target) -> connections with a missing endpoint
+        self.node_issues = {}  # name -> (errors, warnings), only nodes with issues
+        self.structure_warnings = {}  # name -> warnings about its connections, only nodes with issues
+        self.reachable = set()
+        self.component = {}  # name -> component id, only for components of two or more nodes
+        self.members = {}  # component id -> names
+        self.self_loops = set()
+        self._next_component = 0
+        if workflow_json is not None:
+            self.validate(workflow_json)
+
+    # --- Full validation ---
+
+    def validate(self, workflow_json):
+        """
+        Validates the whole workflow from scratch. Returns (errors, warnings).
+        """
+        self._index_nodes(workflow_json)
+        self.node_issues = {}
+        for name, node in self.nodes.items():
+            self._check_node(name, node)
+        self._index_edges(workflow_json)
+        self._compute_reachability()
+        self.component, self.members = {}, {}
+        self._set_components(self._strongly_connected(self.nodes, whole_graph=True))
+        self.structure_warnings = {}
+        for name in self.nodes:
+            self._check_structure(name)
+        return self.report()
+
+    def _index_nodes(self, workflow_json):
+        self.nodes = {}
+        self.duplicates = {}
+        nodes = workflow_json.get("nodes", [])
+        self._index_positions(nodes)
+        for node in nodes:
+            name = node.get("name")
+            if name in self.nodes:
+                self.duplicates[name] = self.duplicates.get(name, 1) + 1
+            else:
+                self.nodes[name] = node
+        self.triggers = {name for name, node in self.nodes.items() if is_trigger(node)}
+
+    def _index_positions(self, nodes):
+        self._positions = {}
+        for position, node in enumerate(nodes):
+            self._positions.setdefault(node.get("name"), position)
+        self._node_count = len(nodes)
+
+    def _locate(self, nodes, names):
+        """
+        Returns ({name: first node}, {name: node count}) for `names`. When the list
+        length is unchanged and every name is still at its recorded position (a
+        parameter or type edit), no other node is looked at; otherwise one scan.
+        """
+        if len(nodes) == self._node_count:
+            found = {}
+            for name in names:
+                position = self._positions.get(name)
+                if name in self.duplicates or position is None or nodes[position].get("name") != name:
+                    break
+                found[name] = nodes[position]
+            else:
+                return found, dict.fromkeys(found, 1)
+        self._index_positions(nodes)
+        found, counts = {}, {}
+        for node in nodes:
+            name = node.get("name")
+            if name in names:
+                counts[name] = counts.get(name, 0) + 1
+                found.setdefault(name, node)
+        return found, counts
+
+    def _index_edges(self, workflow_json):
+        self.successors = defaultdict(set)
+        self.predecessors = defaultdict(set)
+        self.repeated_edges = {}
+        self.dangling = {}
+        self.self_loops = set()
+        nodes, successors, predecessors = self.nodes, self.successors, self.predecessors
+        for conn in workflow_json.get("connections", []):
+            source, target = conn.get("source"), conn.get("target")
+            if source not in nodes or target not in nodes:
+                self.dangling[(source, target)] = self.dangling.get((source, target), 0) + 1
+                continue
+            targets = successors[source]
+            if target in targets:
+                self.repeated_edges[(source, target)] = self.repeated_edges.get((source, target), 0) + 1
+                continue
+            targets.add(target)
+            predecessors[target].add(source)
+            if source == target:
+                self.self_loops.add(source)
+
+    def _add_edge(self, source, target):
+        """
+        Records one connection. Returns True if it created a new edge in the graph.
+        """
+        edge = (source, target)
+        if source not in self.nodes or target not in self.nodes:
+            self.dangling[edge] = self.dangling.get(edge, 0) + 1
+            return False
+        if target in self.successors.get(source, ()):
+            self.repeated_edges[edge] = self.repeated_edges.get(edge, 0) + 1
+            return False
+        self.successors[source].add(target)
+        self.predecessors[target].add(source)
+        if source == target:
+            self.self_loops.add(source)
+        return True
+
+    def _remove_edge(self, source, target):
+        """
+        Forgets one connection. Returns True if the edge left the graph.
+        """
+        edge = (source, target)
+        if edge in self.dangling:
+            self.dangling[edge] -= 1
+            if not self.dangling[edge]:
+                del self.dangling[edge]
+            return False
+        if edge in self.repeated_edges:
+            self.repeated_edges[edge] -= 1
+            if not self.repeated_edges[edge]:
+                del self.repeated_edges[edge]
+            return False
+        if target not in self.successors.get(source, ()):
+            return False
+        self.successors[source].discard(target)
+        self.predecessors[target].discard(source)
+        if source == target:
+            self.self_loops.discard(source)
+        return True
+
+    def _check_node(self, name, node):
+        issues = check_node_parameters(node)
+        if issues[0] or issues[1]:
+            self.node_issues[name] = issues
+        else:
+            self.node_issues.pop(name, None)
+
+    def _check_structure(self, name):
+        warnings = []
+        if name in self.triggers:
+            if self.predecessors.get(name):
+                warnings.append(f"Trigger '{name}' has incoming connections")
+            if not self.successors.get(name):
+                warnings.append(f"Trigger '{name}' is not connected to any action")
+        elif name in self.nodes and name not in self.reachable:
+            warnings.append(f"Node '{name}' is not reachable from any trigger")
+        if warnings:
+            self.structure_warnings[name] = warnings
+        else:
+            self.structure_warnings.pop(name, None)
+
+    def _compute_reachability(self):
+        self.reachable = set(self.triggers)
+        self._propagate_reachability(list(self.triggers))
+
+    def _propagate_reachability(self, stack, changed=None):
+        while stack:
+            current = stack.pop()
+            for target in self.successors.get(current, ()):
+                if target not in self.reachable:
+                    self.reachable.add(target)
+                    stack.append(target)
+                    if changed is not None:
+                        changed.add(target)
+
+    def _recheck_reachability(self, starts, changed):
+        """
+        After removals: drops reachability downstream of `starts`, then restores it
+        for the nodes in that region that still have a path from a trigger.
+        """
+        region = set()
+        stack = [name for name in starts if name in self.reachable]
+        while stack:
+            current = stack.pop()
+            if current in region:
+                continue
+            region.add(current)
+            stack.extend(t for t in self.successors.get(current, ()) if t in self.reachable and t not in region)
+        self.reachable -= region
+        seeds = [name for name in region if name in self.triggers
+                 or (name in self.nodes and any(p in self.reachable for p in self.predecessors.get(name, ())))]
+        self.reachable.update(seeds)
+        self._propagate_reachability(seeds)
+        changed.update(name for name in region if name not in self.reachable)
+
+    # --- Cycles (strongly connected components) ---
+
+    def _strongly_connected(self, names, whole_graph=False):
+        """
+        Iterative Tarjan over the subgraph induced by `names` (a set or dict).
+        Returns the member sets of its strongly connected components of two or more nodes.
+        """
+        successors = self.successors
+        index, low, on_stack, stack, result = {}, {}, set(), [], []
+        for root in names:
+            if root in index:
+                continue
+            if not successors.get(root):
+                index[root] = len(index)  # no successors, so on no cycle
+                continue
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(successors[root]))]
+            while work:
+                node, targets = work[-1]
+                for target in targets:
+                    if not whole_graph and target not in names:
+                        continue
+                    target_index = index.get(target)
+                    if target_index is None:
+                        index[target] = low[target] = len(index)
+                        stack.append(target)
+                        on_stack.add(target)
+                        work.append((target, iter(successors.get(target, ()))))
+                        break
+                    if target in on_stack and target_index < low[node]:
+                        low[node] = target_index
+                else:
+                    work.pop()
+                    node_low = low[node]
+                    if work:
+                        parent = work[-1][0]
+                        if node_low < low[parent]:
+                            low[parent] = node_low
+                    if node_low == index[node]:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        members = {member}
+                        while member != node:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            members.add(member)
+                        if len(members) > 1:
+                            result.append(members)
+        return result
+
+    def _set_components(self, components):
+        for members in components:
+            component_id = self._next_component
+            self._next_component += 1
+            self.members[component_id] = members
+            for name in members:
+                self.component[name] = component_id
+
+    def _split_components(self, component_ids):
+        """
+        Removed edges or nodes can only split the components that contained them.
+        """
+        for component_id in component_ids:
+            members = self.members.pop(component_id, None)
+            if members is None:
+                continue
+            for name in members:
+                del self.component[name]
+            self._set_components(self._strongly_connected({name for name in members if name in self.nodes}))
+
+    def _merge_components(self, source, target):
+        """
+        A new edge source -> target merges every component on a path target -> source.
+        """
+        if source == target or (source in self.component and self.component.get(target) == self.component[source]):
+            return
+        downstream = {target}
+        stack = [target]
+        while stack:
+            for successor in self.successors.get(stack.pop(), ()):
+                if successor not in downstream:
+                    downstream.add(successor)
+                    stack.append(successor)
+        if source not in downstream:
+            return
+        merged = {source}
+        stack = [source]
+        while stack:
+            for predecessor in self.predecessors.get(stack.pop(), ()):
+                if predecessor in downstream and predecessor not in merged:
+                    merged.add(predecessor)
+                    stack.append(predecessor)
+        for component_id in {self.component[name] for name in merged if name in self.component}:
+            del self.members[component_id]
+        self._set_components([merged])
+
+    def _cycle_through(self, start, members):
+        """
+        Shortest cycle from `start` back to itself inside one component, visiting
+        successors in sorted order so every pass reports the same path.
+        """
+        if start in self.successors.get(start, ()):
+            return [start, start]
+        parents = {}
+        queue = deque([start])
+        while queue:
+            current = queue.popleft()
+            for target in sorted(self.successors.get(current, ()), key=str):
+                if target == start:
+                    path = [current]
+                    while path[-1] != start:
+                        path.append(parents[path[-1]])
+                    return [start] + path[::-1][1:] + [start]
+                if target in members and target not in parents:
+                    parents[target] = current
+                    queue.append(target)
+        return [start, start]
+
+    def cycle_groups(self):
+        """
+        One member set per group of nodes that lie on a cycle, ordered by their first name.
+        """
+        groups = list(self.members.values())
+        groups.extend({name} for name in self.self_loops if name not in self.component)
+        return sorted(groups, key=lambda members: min(map(str, members)))
+
+    # --- Incremental validation ---
+
+    def apply_changes(self, workflow_json, touched_nodes=(), added_edges=(), removed_edges=()):
+        """
+        Re-validates after an edit. `touched_nodes` are names of nodes that were
+        added, removed or modified; edges are (source, target) tuples, one per
+        connection added or removed. Returns (errors, warnings).
+        """
+        touched_nodes = set(touched_nodes)
+        # An edge added and removed within the same edit cancels out
+        added, removed = Counter(map(tuple, added_edges)), Counter(map(tuple, removed_edges))
+        added_edges, removed_edges = list((added - removed).elements()), list((removed - added).elements())
+        changed = set(touched_nodes)
+        split = set()
+        recheck = []
+
+        current, counts = self._locate(workflow_json.get("nodes", []), touched_nodes) if touched_nodes else ({}, {})
+
+        for source, target in removed_edges:
+            if self._remove_edge(source, target):
+                changed.update((source, target))
+                recheck.append(target)
+                if source in self.component and self.component.get(target) == self.component[source]:
+                    split.add(self.component[source])
+
+        added_nodes = []
+        for name in touched_nodes:
+            node = current.get(name)
+            if counts.get(name, 0) > 1:
+                self.duplicates[name] = counts[name]
+            else:
+                self.duplicates.pop(name, None)
+            if node is None:
+                if name in self.nodes:
+                    self._remove_node(name, changed, split, recheck)
+                continue
+            if name not in self.nodes:
+                added_nodes.append(name)
+            was_trigger = name in self.triggers
+            self.nodes[name] = node
+            self._check_node(name, node)
+            if is_trigger(node):
+                self.triggers.add(name)
+                if name not in self.reachable:
+                    self.reachable.add(name)
+                    self._propagate_reachability([name], changed)
+            elif was_trigger:
+                self.triggers.discard(name)
+                recheck.append(name)
+
+        self._split_components(split)
+        self._recheck_reachability(recheck, changed)
+
+        new_edges = [(s, t) for s, t in added_edges if self._add_edge(s, t)]
+        if added_nodes:
+            # Connections that named these nodes before they existed now resolve
+            names = set(added_nodes)
+            for edge in [edge for edge in self.dangling if names.intersection(edge)]:
+                if edge[0] in self.nodes and edge[1] in self.nodes:
+                    count = self.dangling.pop(edge)
+                    for _ in range(count):
+                        if self._add_edge(*edge):
+                            new_edges.append(edge)
+        for source, target in new_edges:
+            changed.update((source, target))
+            self._merge_components(source, target)
+            if source in self.reachable and target not in self.reachable:
+                self.reachable.add(target)
+                self._propagate_reachability([target], changed)
+
+        for name in changed:
+            self._check_structure(name)
+        return self.report()
+
+    def _remove_node(self, name, changed, split, recheck):
+        del self.nodes[name]
+        self.node_issues.pop(name, None)
+        self.structure_warnings.pop(name, None)
+        self.triggers.discard(name)
+        if name in self.component:
+            split.add(self.component[name])
+        # Connections the edit did not remove now point at a missing node
+        for target in list(self.successors.get(name, ())):
+            count = 1 + self.repeated_edges.get((name, target), 0)
+            for _ in range(count):
+                self._remove_edge(name, target)
+            self.dangling[(name, target)] = self.dangling.get((name, target), 0) + count
+            changed.add(target)
+            recheck.append(target)
+        for source in list(self.predecessors.get(name, ())):
+            count = 1 + self.repeated_edges.get((source, name), 0)
+            for _ in range(count):
+                self._remove_edge(source, name)
+            self.dangling[(source, name)] = self.dangling.get((source, name), 0) + count
+            changed.add(source)
+        self.successors.pop(name, None)
+        self.predecessors.pop(name, None)
+        self.self_loops.discard(name)
+        recheck.append(name)
+
+    # --- Reporting ---
+
+    def report(self):
+        """
+        Collects the current errors and warnings. Only nodes with issues are visited.
+        """
+        errors = []
+        warnings = []
+
+        if not self.triggers:
+            errors.append("Workflow must have at least one trigger node")
+
+        for name, count in self.duplicates.items():
+            errors.append(f"Duplicate node name '{name}' used by {count} nodes")
+
+        for (source, target), count in self.dangling.items():
+            message = (f"Connection source '{source}' not found" if source not in self.nodes
+                       else f"Connection target '{target}' not found")
+            errors.extend([message] * count)
+
+        groups = self.cycle_groups()
+        for members in groups[:MAX_REPORTED_CYCLES]:
+            cycle = self._cycle_through(min(members, key=str), members)
+            errors.append(f"Cycle detected: {' → '.join(map(str, cycle))}")
+        if len(groups) > MAX_REPORTED_CYCLES:
+            errors.append(f"... and {len(groups) - MAX_REPORTED_CYCLES} more cycles")
+
+        for node_errors, node_warnings in self.node_issues.values():
+            errors.extend(node_errors)
+            warnings.extend(node_warnings)
+        for structure_warnings in self.structure_warnings.values():
+            warnings.extend(structure_warnings)
+
+        return errors, warnings
+
+
+def validate_workflow_graph(workflow_json):
+    """
+    One-shot structural validation. Returns (errors, warnings).
+    """
+    return WorkflowGraphValidator().validate(workflow_json)
+
+
+def build_synthetic_workflow(node_count, trigger_ratio=0.01, fan_out=3, seed=42):
+    """
+    Builds a random layered DAG workflow for benchmarking.
+    """
+    rng = random.Random(seed)
+    action_types = ["n8n-nodes-base.whatsApp", "n8n-nodes-base.sendEmail", "n8n-nodes-base.slack",
+                    "n8n-nodes-base.googleSheets", "n8n-nodes-base.wait"]
+    trigger_count = max(1, int(node_count * trigger_ratio))
+    nodes = []
+    connections = []
+    for i in range(node_count):
+        if i < trigger_count:
+            nodes.append({"name": f"Trigger {i}", "type": "n8n-nodes-base.webhookTrigger", "parameters": {}})
+            continue
+        nodes.append({
+            "name": f"Action {i}",
+            "type": rng.choice(action_types),
+            "parameters": {"phoneNumber": "+1234567890", "message": "Hi", "amount": 1, "unit": "hours"}
+        })
+        for _ in range(rng.randint(1, fan_out)):
+            source = nodes[rng.randrange(i)]["name"]
+            connections.append({"source": source, "target": f"Action {i}"})
+    return {"nodes": nodes, "connections": connections}
+
+
+if __name__ == "__main__":
+    # Benchmark full and incremental validation on synthetic workflows
+    for size in (100, 1_000, 10_000, 50_000):
+        workflow = build_synthetic_workflow(size)
+        edges = len(workflow["connections"])
+
+        start = time.perf_counter()
+        validator = WorkflowGraphValidator()
+        errors, warnings = validator.validate(workflow)
+        full_ms = (time.perf_counter() - start) * 1000
+
+        # Parameter-only edit of one node
+        workflow["nodes"][-1]["parameters"]["message"] = "Updated"
+        start = time.perf_counter()
+        validator.apply_changes(workflow, touched_nodes=[workflow["nodes"][-1]["name"]])
+        param_edit_ms = (time.perf_counter() - start) * 1000
+
+        # Adding an edge that closes a cycle
+        last_name = workflow["nodes"][-1]["name"]
+        back_edge = (last_name, next(iter(validator.predecessors[last_name])))
+        workflow["connections"].append({"source": back_edge[0], "target": back_edge[1]})
+        start = time.perf_counter()
+        errors, _ = validator.apply_changes(workflow, added_edges=[back_edge])
+        edge_edit_ms = (time.perf_counter() - start) * 1000
+
+        # Removing it again
+        workflow["connections"].pop()
+        start = time.perf_counter()
+        removed_errors, removed_warnings = validator.apply_changes(workflow, removed_edges=[back_edge])
+        removal_ms = (time.perf_counter() - start) * 1000
+        full_errors, full_warnings = validate_workflow_graph(workflow)
+        matches = sorted(removed_errors) == sorted(full_errors) and sorted(removed_warnings) == sorted(full_warnings)
+
+        print(f"{size:>6} nodes / {edges:>6} edges: full {full_ms:8.2f} ms | "
+              f"param edit {param_edit_ms:6.3f} ms | edge edit {edge_edit_ms:6.3f} ms | edge removal {removal_ms:6.3f} ms | "
+              f"cycle found: {any('Cycle' in e for e in errors)} | matches full pass: {matches}")
@@ -0,0 +1,175 @@
+import os
+import time
+import asyncio
+import argparse
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+
+from workflow_generator import (
+    MODEL_NAME, GENERATION_PARAMS, build_generation_messages, parse_workflow_response, failed_generation
+)
+
+DEFAULT_CANDIDATES = 2
+DEFAULT_HEDGE_DELAY_S = 4.0
+
+hedge_metrics = {
+    "requests": 0,
+    "calls": 0,
+    "cancelled": 0,
+    "valid": 0,
+    "prompt_tokens": 0,
+    "completion_tokens": 0,
+    "winners_by_candidate": {},
+    "latencies_s": [],
+}
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else None
+
+
+async def _generate_candidate(client, messages, user_query: str, index: int):
+    response = await client.chat.completions.create(model=MODEL_NAME, messages=messages, **GENERATION_PARAMS)
+    if response.usage:
+        hedge_metrics["prompt_tokens"] += response.usage.prompt_tokens
+        hedge_metrics["completion_tokens"] += response.usage.completion_tokens
+    return index, parse_workflow_response(user_query, response.choices[0].message.content)
+
+
+async def generate_workflow_hedged(user_query: str, candidates: int = DEFAULT_CANDIDATES,
+                                   hedge_delay_s: float = DEFAULT_HEDGE_DELAY_S, client: AsyncOpenAI = None):
+    """
+    Sends up to `candidates` generation requests and returns the first one that
+    parses and passes validate_workflow with no errors, cancelling the rest.
+    With hedge_delay_s > 0 each extra request is only fired if no valid result
+    has arrived by then (or a candidate failed); with 0 all are sent at once.
+    Returns (summary, workflow_json, errors, warnings).
+    """
+    owns_client = client is None
+    if owns_client:
+        load_dotenv()
+        client = AsyncOpenAI(base_url="https://openrouter.ai/api/v1", api_key=os.getenv("OPENROUTER_API_KEY"))
+
+    messages = build_generation_messages(user_query)
+    started = time.perf_counter()
+    pending = set()
+    launched = 0
+    winner = None
+    fallback = None
+
+    def launch():
+        nonlocal launched
+        pending.add(asyncio.create_task(_generate_candidate(client, messages, user_query, launched)))
+        launched += 1
+
+    launch()
+    while launched < candidates and not hedge_delay_s:
+        launch()
+
+    try:
+        while pending:
+            timeout = None
+            if launched < candidates:
+                timeout = max(0.0, started + hedge_delay_s * launched - time.perf_counter())
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                print(f"[INFO] No valid workflow after {hedge_delay_s * launched:.1f}s, sending hedge request {launched + 1}...")
+                launch()
+                continue
+
+            pending -= done
+            for task in done:
+                try:
+                    index, result = task.result()
+                except Exception as e:
+                    print(f"[WARN] Candidate request failed ({e.__class__.__name__}: {e})")
+                    continue
+                summary, workflow_json, errors, warnings = result
+                if workflow_json is not None and not errors:
+                    winner = (index, result)
+                    break
+                if workflow_json is not None and (fallback is None or len(errors) < len(fallback[2])):
+                    fallback = result
+
+            if winner:
+                break
+            if not pending and launched < candidates:
+                launch()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if owns_client:
+            await client.close()
+
+    elapsed = time.perf_counter() - started
+    hedge_metrics["requests"] += 1
+    hedge_metrics["calls"] += launched
+    hedge_metrics["cancelled"] += len(pending)
+    hedge_metrics["latencies_s"].append(elapsed)
+
+    if winner:
+        index, result = winner
+        hedge_metrics["valid"] += 1
+        hedge_metrics["winners_by_candidate"][index] = hedge_metrics["winners_by_candidate"].get(index, 0) + 1
+        print(f"[INFO] Candidate {index + 1} of {launched} won after {elapsed:.2f}s.")
+        return result
+    print(f"[WARN] None of the {launched} candidates produced a valid workflow.")
+    return fallback or failed_generation()
+
+
+def get_hedge_metrics() -> dict:
+    """
+    Latency versus cost of hedged generation in this process: extra calls and
+    tokens per request against p50/p95 latency. Cancelled calls may still be
+    billed by the provider, so `calls_per_request` is the upper bound on cost.
+    """
+    requests = hedge_metrics["requests"]
+    latencies = hedge_metrics["latencies_s"]
+    return {
+        **{k: v for k, v in hedge_metrics.items() if k != "latencies_s"},
+        "calls_per_request": hedge_metrics["calls"] / requests if requests else 0.0,
+        "completion_tokens_per_request": hedge_metrics["completion_tokens"] / requests if requests else 0.0,
+        "valid_rate": hedge_metrics["valid"] / requests if requests else 0.0,
+        "p50_latency_s": _percentile(latencies, 0.5),
+        "p95_latency_s": _percentile(latencies, 0.95),
+    }
+
+
+async def _run_benchmark(queries, candidates, hedge_delay_s):
+    load_dotenv()
+    client = AsyncOpenAI(base_url="https://openrouter.ai/api/v1", api_key=os.getenv("OPENROUTER_API_KEY"))
+    try:
+        for query in queries:
+            await generate_workflow_hedged(query, candidates, hedge_delay_s, client=client)
+    finally:
+        await client.close()
+
+
+def main():
+    from batch_generate import read_requests
+
+    parser = argparse.ArgumentParser(description="Measure hedged workflow generation: cost versus tail latency.")
+    parser.add_argument("input", help="JSONL or CSV file with 'id' and 'query' fields")
+    parser.add_argument("-n", "--candidates", type=int, default=DEFAULT_CANDIDATES, help="Maximum requests per workflow")
+    parser.add_argument("-d", "--hedge-delay", type=float, default=DEFAULT_HEDGE_DELAY_S,
+                        help="Seconds before each extra request (0 sends all candidates at once)")
+    parser.add_argument("--limit", type=int, default=20, help="Number of requests to run")
+    args = parser.parse_args()
+
+    queries = [query for _, query in read_requests(args.input)][:args.limit]
+    asyncio.run(_run_benchmark(queries, args.candidates, args.hedge_delay))
+
+    metrics = get_hedge_metrics()
+    print("\n--- Hedged Generation ---")
+    print(f"Policy: up to {args.candidates} candidates, hedge delay {args.hedge_delay}s")
+    print(f"Valid: {metrics['valid']}/{metrics['requests']} | Winners by candidate: {metrics['winners_by_candidate']}")
+    print(f"Cost: {metrics['calls_per_request']:.2f} calls and {metrics['completion_tokens_per_request']:.0f} completion tokens per workflow "
+          f"({metrics['cancelled']} cancelled)")
+    if metrics["requests"]:
+        print(f"Latency: p50 {metrics['p50_latency_s']:.2f}s | p95 {metrics['p95_latency_s']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
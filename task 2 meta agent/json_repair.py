@@ -0,0 +1,242 @@
+import json
+
+CLOSERS = {"{": "}", "[": "]"}
+MAX_BACKOFF_ATTEMPTS = 5
+
+repair_metrics = {
+    "responses": 0,
+    "clean_parses": 0,
+    "repaired": 0,
+    "continuations": 0,
+    "continuation_successes": 0,
+    "hard_failures": 0,
+    "repairs": {},
+}
+
+
+class JSONRepairError(ValueError):
+    """
+    `truncated` is True when the output ended inside an unclosed structure, i.e. a
+    continuation of the same response could still complete it.
+    """
+
+    def __init__(self, message: str, truncated: bool = False):
+        super().__init__(message)
+        self.truncated = truncated
+
+
+def strip_code_fences(text: str) -> str:
+    cleaned = text.strip()
+    if cleaned.startswith('```json'):
+        cleaned = cleaned[7:]
+    if cleaned.startswith('```'):
+        cleaned = cleaned[3:]
+    if cleaned.endswith('```'):
+        cleaned = cleaned[:-3]
+    return cleaned.strip()
+
+
+def _next_significant(text: str, index: int) -> str:
+    while index < len(text) and text[index] in " \t\r\n":
+        index += 1
+    return text[index] if index < len(text) else ""
+
+
+def _keeps_elements_whole(stack) -> bool:
+    # Closing here would leave a partial object inside an array (e.g. a connection with
+    # no target); open objects that are values of other objects may be closed
+    return "{" not in stack[stack.index("[") + 1:] if "[" in stack else True
+
+
+def _close(out, stack) -> str:
+    text = "".join(out).rstrip()
+    if text.endswith(","):
+        text = text[:-1]
+    return text + "".join(CLOSERS[opener] for opener in reversed(stack))
+
+
+def repair_json(text: str):
+    """
+    Tolerant single-pass repair of LLM JSON output. Skips prose around the
+    outermost object, escapes stray quotes and raw newlines inside strings,
+    drops trailing commas and closes output that was cut off mid-way. Truncated
+    output is cut back to the last complete array element, so partial elements and
+    partial strings are dropped rather than closed.
+    Returns (data, repairs, truncated). Raises JSONRepairError if nothing usable remains.
+    """
+    start = text.find("{")
+    if start == -1:
+        raise JSONRepairError("No JSON object found in the response")
+    repairs = set()
+    if text[:start].strip().strip("`").strip().lower() not in ("", "json"):
+        repairs.add("leading_prose")
+
+    out = []
+    stack = []
+    safe_points = []  # (length of out, stack) where the output could be cut and closed
+    in_string = False
+    escape = False
+    finished = False
+    index = start
+    while index < len(text):
+        char = text[index]
+        if in_string:
+            if escape:
+                out.append(char)
+                escape = False
+            elif char == "\\":
+                out.append(char)
+                escape = True
+            elif char == '"':
+                if _next_significant(text, index + 1) in (",", "}", "]", ":", ""):
+                    out.append(char)
+                    in_string = False
+                else:
+                    out.append('\\"')
+                    repairs.add("unescaped_quote")
+            elif char in "\n\r\t":
+                out.append({"\n": "\\n", "\r": "\\r", "\t": "\\t"}[char])
+                repairs.add("control_character")
+            else:
+                out.append(char)
+        elif char == '"':
+            out.append(char)
+            in_string = True
+        elif char in CLOSERS:
+            stack.append(char)
+            out.append(char)
+            if char == "[":
+                safe_points.append((len(out), list(stack)))
+        elif char in "}]":
+            while out and out[-1] in " \t\r\n":
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+                repairs.add("trailing_comma")
+            expected = CLOSERS[stack.pop()]
+            if char != expected:
+                repairs.add("mismatched_bracket")
+            out.append(expected)
+            if not stack:
+                finished = True
+                break
+            safe_points.append((len(out), list(stack)))
+        elif char == ",":
+            safe_points.append((len(out), list(stack)))
+            out.append(char)
+        else:
+            out.append(char)
+        index += 1
+
+    if finished:
+        if text[index + 1:].strip().strip("`").strip():
+            repairs.add("trailing_prose")
+        try:
+            return json.loads("".join(out)), sorted(repairs), False
+        except json.JSONDecodeError as e:
+            raise JSONRepairError(f"Could not repair JSON: {e}") from e
+
+    # Output was cut off: back off to the latest cut point that keeps array elements whole
+    repairs.add("truncated")
+    cut_points = [point for point in safe_points if _keeps_elements_whole(point[1])]
+    for length, snapshot in reversed(cut_points[-MAX_BACKOFF_ATTEMPTS:]):
+        try:
+            return json.loads(_close(out[:length], snapshot)), sorted(repairs), True
+        except json.JSONDecodeError:
+            continue
+    raise JSONRepairError("Could not close truncated JSON", truncated=True)
+
+
+def _record_repairs(repairs):
+    for repair in repairs:
+        repair_metrics["repairs"][repair] = repair_metrics["repairs"].get(repair, 0) + 1
+
+
+def load_model_json(content: str, is_complete=None, request_continuation=None):
+    """
+    Parses LLM output, repairing it locally when json.loads fails. Truncated
+    output is completed with `request_continuation(partial)` (which should return
+    only the missing tail) when available, and otherwise accepted only if
+    `is_complete(data)` holds. Raises JSONRepairError on a hard failure.
+    """
+    repair_metrics["responses"] += 1
+    try:
+        data = json.loads(strip_code_fences(content))
+        repair_metrics["clean_parses"] += 1
+        return data
+    except json.JSONDecodeError:
+        pass
+
+    try:
+        data, repairs, truncated = repair_json(content)
+    except JSONRepairError as e:
+        # Complete but unrepairable output would not be fixed by asking for more of it
+        if not e.truncated:
+            repair_metrics["hard_failures"] += 1
+            raise
+        data, repairs, truncated = None, [], True
+
+    if not truncated:
+        repair_metrics["repaired"] += 1
+        _record_repairs(repairs)
+        print(f"[INFO] Repaired LLM JSON locally ({', '.join(repairs) or 'fences'}).")
+        return data
+
+    if request_continuation is not None:
+        repair_metrics["continuations"] += 1
+        print("[INFO] LLM output was cut off, requesting only the missing tail...")
+        try:
+            tail = request_continuation(content)
+            continued, continued_repairs, still_truncated = repair_json(content + strip_code_fences(tail or ""))
+            if not still_truncated and (is_complete is None or is_complete(continued)):
+                repair_metrics["continuation_successes"] += 1
+                _record_repairs(continued_repairs)
+                return continued
+        except JSONRepairError:
+            pass
+        except Exception as e:
+            print(f"[ERROR] Continuation request failed. Error: {e}")
+
+    if data is not None and (is_complete is None or is_complete(data)):
+        repair_metrics["repaired"] += 1
+        _record_repairs(repairs)
+        print(f"[INFO] Closed truncated LLM JSON locally ({', '.join(repairs)}).")
+        return data
+
+    repair_metrics["hard_failures"] += 1
+    raise JSONRepairError("LLM output could not be repaired or completed")
+
+
+def get_repair_metrics() -> dict:
+    """
+    How often LLM output needed repair in this process and how many full
+    regenerations that avoided.
+    """
+    responses = repair_metrics["responses"]
+    failures = responses - repair_metrics["clean_parses"]
+    return {
+        **repair_metrics,
+        "hard_failure_rate": repair_metrics["hard_failures"] / responses if responses else 0.0,
+        "round_trips_saved": repair_metrics["repaired"] + repair_metrics["continuation_successes"],
+        "wasted_round_trips": repair_metrics["hard_failures"] + repair_metrics["continuations"] - repair_metrics["continuation_successes"],
+        "repair_success_rate": (failures - repair_metrics["hard_failures"]) / failures if failures else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    samples = {
+        "clean": '{"summary": ["Trigger: Jotform"], "workflow": {"nodes": [], "connections": []}}',
+        "fenced with prose": 'Here is your workflow:\n```json\n{"summary": ["a"], "workflow": {"nodes": [1], "connections": []}}\n```\nLet me know!',
+        "trailing commas": '{"summary": ["a", "b",], "workflow": {"nodes": [{"name": "X",},], "connections": [],},}',
+        "unescaped quotes": '{"summary": ["Send "Hello" to the team"], "workflow": {"nodes": [{"name": "Slack", "parameters": {"message": "Say "hi"\nthere"}}], "connections": []}}',
+        "truncated in string": '{"summary": ["a"], "workflow": {"nodes": [{"name": "Slack", "parameters": {"message": "Good morn',
+        "truncated after element": '{"summary": ["a"], "workflow": {"nodes": [{"name": "A"}], "connections": [{"source": "A", "target": "B"}',
+        "truncated after key": '{"summary": ["a"], "workflow": {"nodes": [{"name": "A"}, {"name": "B"}], "connections": [{"source": "A", "tar',
+        "missing comma": '{"summary": ["a"] "workflow": {"nodes": [], "connections": []}}',
+    }
+    for label, sample in samples.items():
+        try:
+            print(f"{label:>20}: {json.dumps(load_model_json(sample))}")
+        except JSONRepairError as e:
+            print(f"{label:>20}: FAILED ({e})")
+    print(get_repair_metrics())
@@ -0,0 +1,298 @@
+import re
+
+from cron_engine import validate_cron, next_fire_times, parse_natural_schedule
+
+TRIGGER_MARKER = "Trigger"
+DEFAULT_COLOR = "#757575"  # Default gray
+
+
+class NodeType:
+    """
+    Everything the meta agent knows about one n8n node type: how it is drawn,
+    how the prompt describes it and detects it in a request, its parameter
+    schema, its fast-path rule, how it is filled from entities in the user
+    request, how it appears in the test simulation and its mock connector load
+    profile.
+    """
+
+    def __init__(self, type_name, label, description, color=DEFAULT_COLOR, shape="box", icon=None,
+                 keywords=None, guidelines=(), required=(), optional=(), hints=None, allowed_values=None,
+                 checks=(), fast_path=None, enrich=None, simulate=None, load_profile=None):
+        self.type_name = type_name
+        self.label = label
+        # One-line catalogue entry in the system prompt
+        self.description = description
+        self.is_trigger = TRIGGER_MARKER in type_name
+        self.color = "#2196f3" if self.is_trigger else color  # Blue for triggers
+        self.shape = "diamond" if self.is_trigger else shape
+        self.icon = icon
+        # Cheap local detection of requests that involve this node type
+        self.keywords = re.compile(keywords, re.IGNORECASE) if keywords else None
+        # Extraction and timing guidelines that only matter when the node type is in play
+        self.guidelines = list(guidelines)
+        # (parameter, accepted types, human-readable name)
+        self.required = list(required)
+        self.optional = list(optional)
+        # Prompt wording per parameter; defaults to the human-readable name
+        self.hints = hints or {}
+        self.allowed_values = allowed_values or {}
+        # Callables returning an error message for invalid parameter values
+        self.checks = list(checks)
+        # Fast-path phrase: (pattern, node name) for actions, (pattern, node name, summary line) for triggers
+        self.fast_path = (re.compile(fast_path[0], re.IGNORECASE),) + tuple(fast_path[1:]) if fast_path else None
+        # enrich(parameters, context) fills missing values from the request
+        self.enrich = enrich
+        # simulate(node) returns log lines for the test run
+        self.simulate = simulate
+        # latency (median, p99) in seconds, error rate, workers and rate limit per second
+        self.load_profile = load_profile
+
+    def parameter_spec(self) -> str:
+        """
+        The prompt's parameter lines, derived from the schema so required,
+        optional and allowed values are stated once.
+        """
+        lines = []
+        for parameters, suffix in ((self.required, ""), (self.optional, " (optional)")):
+            for parameter, _, name in parameters:
+                allowed = [f'"{value}"' for value in self.allowed_values.get(parameter, ())]
+                allowed = ", ".join(allowed[:-1]) + " or " + allowed[-1] if len(allowed) > 1 else "".join(allowed)
+                text = self.hints.get(parameter) or allowed or name[0].upper() + name[1:]
+                if allowed and parameter in self.hints:
+                    text += ": " + allowed
+                lines.append(f"- {parameter}: {text}{suffix}")
+        return "\n".join(lines)
+
+
+NODE_TYPES = {}
+
+
+def register(node_type: NodeType) -> NodeType:
+    NODE_TYPES[node_type.type_name] = node_type
+    return node_type
+
+
+def get_node_type(type_name: str):
+    return NODE_TYPES.get(type_name)
+
+
+def short_name(type_name: str) -> str:
+    return type_name.split(".")[-1]
+
+
+# --- Enrichment rules ---
+
+def new_enrichment_context(user_query: str, extracted: dict) -> dict:
+    """
+    Shared state for one enrichment pass: each entity list is consumed in node order.
+    """
+    return {"query": user_query, "extracted": extracted, "cursors": {}}
+
+
+def fill_from(key, entity, placeholder, formatter=lambda value: value):
+    """
+    Fills `key` from the next unused extracted `entity` when it is missing or still a placeholder.
+    """
+    def enrich(parameters, context):
+        current = parameters.get(key)
+        if current and placeholder not in str(current):
+            return
+        values = context["extracted"].get(entity, [])
+        index = context["cursors"].get(entity, 0)
+        if index < len(values):
+            parameters[key] = formatter(values[index])
+            context["cursors"][entity] = index + 1
+    return enrich
+
+
+def enrich_schedule(parameters, context):
+    # If the cron is the prompt's default, derive it from the user query
+    if parameters.get("cronExpression") == "0 9 * * *":
+        try:
+            cron, timezone = parse_natural_schedule(context["query"])
+        except ValueError:
+            return  # the interval has no single cron form; keep the model's schedule
+        parameters["cronExpression"] = cron
+        if timezone != "UTC" and parameters.get("timezone", "UTC") == "UTC":
+            parameters["timezone"] = timezone
+
+
+# --- Test-run simulators ---
+
+def _preview(message: str) -> str:
+    return f"   Message: \"{message[:50]}...\"" if len(message) > 50 else f"   Message: \"{message}\""
+
+
+def simulate_schedule(node):
+    parameters = node.get("parameters", {})
+    cron = parameters.get("cronExpression", "Not set")
+    timezone = parameters.get("timezone") or "UTC"
+    lines = [f"   ⏰ Schedule: {cron} ({timezone})"]
+    try:
+        next_runs = next_fire_times(cron, 3, tz=timezone)
+        lines.append(f"   📅 Next runs: {', '.join(run.strftime('%a %d %b %H:%M') for run in next_runs)}")
+    except (ValueError, AttributeError) as e:
+        lines.append(f"   ⚠️ Invalid schedule: {e}")
+    return lines
+
+
+def simulate_message(icon, label, target_key, missing):
+    def simulate(node):
+        parameters = node.get("parameters", {})
+        return [f"{icon} **{label}** → {parameters.get(target_key, missing)}",
+                _preview(str(parameters.get("message", "[NO MESSAGE]")))]
+    return simulate
+
+
+def simulate_email(node):
+    parameters = node.get("parameters", {})
+    return [f"📧 **Email** → {parameters.get('recipient', '[NO RECIPIENT]')}",
+            f"   Subject: \"{parameters.get('subject', '[NO SUBJECT]')}\""]
+
+
+# --- Registrations ---
+
+register(NodeType(
+    "n8n-nodes-base.jotformTrigger", "Jotform", "When a Jotform is submitted",
+    keywords=r"jot\s?form|form (?:is )?submi|submission",
+    fast_path=(r"\b(?:when(?:ever)?|once|after|if)\s+(?:a\s+|the\s+|my\s+|new\s+)*(?:jot\s?form|form)\s+(?:is\s+|gets\s+)?(?:submitted|filled|completed)|"
+               r"\bon\s+(?:a\s+|new\s+)*(?:jot\s?form|form)\s+submission",
+               "Form Submitted", "Trigger: Jotform submission received"),
+    simulate=lambda node: ["   📝 Form submission received"],
+))
+register(NodeType(
+    "n8n-nodes-base.scheduleTrigger", "Schedule", "Time-based triggers (daily, hourly, etc.)",
+    keywords=r"every|daily|weekly|monthly|hourly|each (?:day|week|month|morning|evening)|"
+             r"\b\d{1,2}(?::\d{2})?\s*(?:am|pm)\b|morning|evening|midnight|noon|schedule|cron",
+    guidelines=[
+        "- Times: Convert \"9 AM\" to \"0 9 * * *\", \"every hour\" to \"0 * * * *\"",
+        "- For recurring checks: Use separate workflow with scheduleTrigger",
+    ],
+    required=[("cronExpression", (str,), "cron expression")],
+    optional=[("timezone", (str,), "timezone")],
+    hints={"cronExpression": "Use standard cron format", "timezone": "Default to \"UTC\" if not specified"},
+    checks=[
+        lambda parameters: validate_cron(parameters["cronExpression"], parameters.get("timezone") or "UTC")
+        if isinstance(parameters.get("cronExpression"), str) and parameters["cronExpression"] else None
+    ],
+    fast_path=(r"\b(?:every|each|on)\s+(?:other\s+|\d+\s+)?(?:day|morning|evening|night|hour|minute|week|weekday|weekend|month|"
+               r"monday|tuesday|wednesday|thursday|friday|saturday|sunday)s?\b|\b(?:daily|hourly|weekly|monthly)\b",
+               "Schedule", "Trigger: {schedule}"),
+    enrich=enrich_schedule,
+    simulate=simulate_schedule,
+))
+register(NodeType(
+    "n8n-nodes-base.webhookTrigger", "Webhook", "When webhook/API receives data",
+    keywords=r"webhook|api (?:call|request|receives)|endpoint|payment|stripe",
+    fast_path=(r"\b(?:when(?:ever)?|once|if)\s+(?:a\s+|the\s+|our\s+|my\s+)*(?:[\w-]+\s+)?webhook\s+(?:fires|is\s+(?:called|triggered|received)|receives|gets)",
+               "Webhook Received", "Trigger: Webhook received"),
+))
+register(NodeType(
+    "n8n-nodes-base.crmTrigger", "CRM trigger", "When CRM record is created/updated",
+    keywords=r"(?:crm|lead|deal|contact|record)s? (?:is |are )?(?:created|updated|added|changes)|new (?:lead|deal|contact)",
+    fast_path=(r"\b(?:when(?:ever)?|once|if)\s+(?:a\s+|the\s+)*new\s+(?:crm\s+)?(?:lead|deal|contact|record)\s+(?:is\s+)?(?:created|added)|"
+               r"\b(?:when(?:ever)?|once|if)\s+(?:a\s+|the\s+)*(?:crm\s+)?(?:lead|deal|contact|record)\s+is\s+(?:created|added|updated)",
+               "CRM Record Changed", "Trigger: CRM record created/updated"),
+))
+register(NodeType(
+    "n8n-nodes-base.emailTrigger", "Email trigger", "When email is received",
+    keywords=r"(?:email|e-mail|mail) (?:is |arrives|comes in)?\s*received|receive an? (?:email|e-mail)|incoming (?:email|mail)|inbox",
+    fast_path=(r"\b(?:when(?:ever)?|once|if)\s+(?:i\s+|we\s+)?(?:receive|get)\s+(?:an?\s+|new\s+)*e-?mail|"
+               r"\b(?:when(?:ever)?|once|if)\s+(?:an?\s+|new\s+)*e-?mail\s+(?:is\s+)?(?:received|arrives|comes\s+in)",
+               "Email Received", "Trigger: New email received"),
+))
+
+register(NodeType(
+    "n8n-nodes-base.whatsApp", "WhatsApp", "Send WhatsApp message", color="#25D366", icon="📱",  # WhatsApp green
+    keywords=r"whats\s?app",
+    guidelines=["- Phone numbers: Look for patterns like +1234567890, (123) 456-7890"],
+    required=[("phoneNumber", (str,), "phone number"), ("message", (str,), "message")],
+    hints={"message": "The message content"},
+    fast_path=(r"whats\s?app", "WhatsApp Message"),
+    enrich=fill_from("phoneNumber", "phones", "[PHONE", lambda phone: '+' + phone.lstrip('+').replace('-', '').replace(' ', '')),
+    simulate=simulate_message("📱", "WhatsApp", "phoneNumber", "[NO PHONE]"),
+    load_profile={"latency_s": (0.35, 2.0), "error_rate": 0.01, "concurrency": 20, "rate_limit_per_s": 80},
+))
+register(NodeType(
+    "n8n-nodes-base.sendEmail", "Email", "Send email", color="#EA4335", icon="📧",  # Gmail red
+    keywords=r"e-?mail|@|\bmail\b",
+    guidelines=["- Emails: Extract anything with @ symbol"],
+    required=[("recipient", (str,), "recipient"), ("subject", (str,), "subject"), ("body", (str,), "body")],
+    hints={"recipient": "Email address", "subject": "Email subject", "body": "Email content"},
+    fast_path=(r"\be-?mail\b|\bmail\b", "Send Email"),
+    enrich=fill_from("recipient", "emails", "[EMAIL"),
+    simulate=simulate_email,
+    load_profile={"latency_s": (0.5, 3.0), "error_rate": 0.005, "concurrency": 10, "rate_limit_per_s": 14},
+))
+register(NodeType(
+    "n8n-nodes-base.googleSheets", "Google Sheets", "Add/update Google Sheets", color="#0F9D58", icon="📊",  # Google green
+    keywords=r"sheet|spreadsheet|excel",
+    required=[("sheetId", (str,), "sheet ID"), ("operation", (str,), "operation")],
+    optional=[("data", (str, dict, list), "data")],
+    hints={"sheetId": "Use placeholder \"[SHEET_ID]\" if not provided", "data": "The data to add/update"},
+    allowed_values={"operation": ("append", "update")},
+    fast_path=(r"google\s+sheets?|spreadsheet|\bsheet\b", "Update Google Sheet"),
+    simulate=lambda node: [f"📊 **Google Sheets** → {node.get('parameters', {}).get('operation', 'append')} data"],
+    load_profile={"latency_s": (0.4, 2.5), "error_rate": 0.01, "concurrency": 4, "rate_limit_per_s": 1},
+))
+register(NodeType(
+    "n8n-nodes-base.httpRequest", "HTTP Request", "Make API calls", icon="🌐",
+    keywords=r"http|api\b|rest\b|post to|call (?:the|an|our) |url",
+    required=[("url", (str,), "URL")],
+    optional=[("method", (str,), "method")],
+    hints={"url": "The endpoint to call", "method": "\"GET\", \"POST\", \"PUT\" or \"DELETE\""},
+    simulate=lambda node: [f"🌐 **HTTP {node.get('parameters', {}).get('method', 'GET')}** → "
+                           f"{node.get('parameters', {}).get('url', '[NO URL]')}"],
+    load_profile={"latency_s": (0.15, 1.0), "error_rate": 0.02, "concurrency": 50, "rate_limit_per_s": None},
+))
+register(NodeType(
+    "n8n-nodes-base.slack", "Slack", "Send Slack message", color="#4A154B", icon="💬",  # Slack purple
+    keywords=r"slack|#[a-z0-9_-]+",
+    guidelines=["- Channels: For Slack/Telegram, look for #channel-name patterns"],
+    required=[("channel", (str,), "channel"), ("message", (str,), "message")],
+    hints={"channel": "Channel name (with or without #)", "message": "Message content"},
+    fast_path=(r"slack", "Slack Message"),
+    enrich=fill_from("channel", "channels", "[CHANNEL", lambda channel: '#' + channel),
+    simulate=simulate_message("💬", "Slack", "channel", "[NO CHANNEL]"),
+    load_profile={"latency_s": (0.25, 1.5), "error_rate": 0.005, "concurrency": 5, "rate_limit_per_s": 1},
+))
+register(NodeType(
+    "n8n-nodes-base.crm", "CRM", "Update CRM records", icon="🗂️",
+    keywords=r"\bcrm\b|hubspot|salesforce|pipedrive",
+    simulate=lambda node: [f"🗂️ **CRM** → {node.get('parameters', {}).get('operation', 'update')} record"],
+    load_profile={"latency_s": (0.3, 1.5), "error_rate": 0.01, "concurrency": 10, "rate_limit_per_s": 25},
+))
+register(NodeType(
+    "n8n-nodes-base.telegram", "Telegram", "Send Telegram message", color="#25D366", icon="✈️",
+    keywords=r"telegram",
+    guidelines=["- Channels: For Slack/Telegram, look for #channel-name patterns"],
+    required=[("chatId", (str, int), "chat ID"), ("message", (str,), "message")],
+    hints={"message": "The message content"},
+    fast_path=(r"telegram", "Telegram Message"),
+    simulate=simulate_message("✈️", "Telegram", "chatId", "[NO CHAT ID]"),
+    load_profile={"latency_s": (0.2, 1.2), "error_rate": 0.005, "concurrency": 10, "rate_limit_per_s": 30},
+))
+register(NodeType(
+    "n8n-nodes-base.function", "Function", "Execute custom code/conditions", icon="⚙️",
+    keywords=r"\bif\b|unless|only when|condition|otherwise|filter|transform|after[- ]hours|business hours",
+    guidelines=[
+        "- For \"after X hours\" conditions: Use function node with time checks",
+        "- Function nodes: Use for conditional logic, data transformation, complex decisions",
+    ],
+    required=[("jsCode", (str,), "JavaScript code")],
+    hints={"jsCode": "JavaScript code to execute"},
+    simulate=lambda node: ["⚙️ **Function** → custom code"],
+    load_profile={"latency_s": (0.002, 0.01), "error_rate": 0.0, "concurrency": 8, "rate_limit_per_s": None},
+))
+register(NodeType(
+    "n8n-nodes-base.wait", "Wait", "Wait/delay before next action", icon="⏳",
+    keywords=r"\bwait|delay|later|after \d+|then .* (?:minutes|hours|days)",
+    guidelines=["- For \"wait X hours then do Y\": Use wait node between actions"],
+    required=[("amount", (int, float), "amount"), ("unit", (str,), "unit")],
+    hints={"amount": "Number of time units to wait"},
+    allowed_values={"unit": ("seconds", "minutes", "hours", "days")},
+    simulate=lambda node: [f"⏳ **Wait** → {node.get('parameters', {}).get('amount', '?')} "
+                           f"{node.get('parameters', {}).get('unit', 'hours')}"],
+))
+
+ACTION_ICONS = tuple(node_type.icon for node_type in NODE_TYPES.values() if node_type.icon)
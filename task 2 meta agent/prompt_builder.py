@@ -0,0 +1,180 @@
+import os
+import re
+import json
+
+from node_registry import NODE_TYPES, short_name
+
+EXAMPLES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "example_workflows.json")
+
+# Static prefix: identical for every request so the provider can cache it.
+STATIC_PREFIX = """
+CRITICAL: Return ONLY valid JSON without any markdown formatting or code blocks. Do not wrap your response in ```json or any other markers.
+
+IMPORTANT: Do NOT use n8n expression syntax like {{$node[...].json}}. Instead, use placeholder values like "[FORM_DATA]", "[PHONE_FROM_FORM]", etc.
+
+You are an expert automation workflow builder. Your task is to convert a user's plain-text request into a single, structured JSON object.
+
+Your response MUST be a single JSON object containing TWO keys: "summary" and "workflow".
+
+--- PART 1: The "summary" Key ---
+Create a clear, step-by-step summary of the workflow:
+- Start with the trigger event
+- List each action in order
+- Include key parameters (phone numbers, emails, etc.)
+
+--- PART 2: The "workflow" Key ---
+Create the n8n-compatible JSON following these rules:
+
+1. **Multiple Triggers**: If the user mentions multiple trigger conditions, create separate trigger nodes
+2. **Parallel Actions**: Actions that should happen simultaneously connect to the same source
+3. **Sequential Actions**: Use intermediate nodes if actions must happen in order
+4. **Smart Defaults**: If parameters are missing, use reasonable placeholders like "[PHONE_NUMBER]"
+5. **Time Formats**: For scheduleTrigger, use cron format (e.g., "0 9 * * *" for 9 AM daily)
+6. **Node Names**: Every node name must be unique; connections reference nodes by name
+
+--- Parameter Extraction Guidelines ---
+- Messages: Use exact quotes if provided, otherwise create descriptive placeholders
+"""
+
+# Catalogue entries, guidelines, parameter specs and detection keywords live in node_registry
+NODE_PATTERNS = {name: node_type.keywords for name, node_type in NODE_TYPES.items() if node_type.keywords}
+
+TRIGGER_TYPES = [name for name, node_type in NODE_TYPES.items() if node_type.is_trigger]
+ACTION_TYPES = [name for name, node_type in NODE_TYPES.items() if not node_type.is_trigger]
+
+_example_library = None
+
+
+def detect_node_types(user_query: str) -> set:
+    """
+    Returns the node types a request is likely to need. Falls back to every
+    trigger (or every action) when none of that kind is recognised, so the
+    model is never left without a valid option.
+    """
+    detected = {node_type for node_type, pattern in NODE_PATTERNS.items() if pattern.search(user_query)}
+
+    # "every email" or "form submitted ... email us" should not pull in the email trigger
+    if "n8n-nodes-base.emailTrigger" in detected and not re.search(r"\bwhen\b|\bon\b|\bnew\b|incoming", user_query, re.IGNORECASE):
+        detected.discard("n8n-nodes-base.emailTrigger")
+
+    if not detected.intersection(TRIGGER_TYPES):
+        detected.update(TRIGGER_TYPES)
+    if not detected.intersection(ACTION_TYPES):
+        detected.update(ACTION_TYPES)
+    return detected
+
+
+def load_example_library(path: str = EXAMPLES_FILE) -> list:
+    """
+    Loads the stored few-shot workflows once per process.
+    """
+    global _example_library
+    if _example_library is None:
+        with open(path, "r", encoding="utf-8") as f:
+            _example_library = json.load(f)
+    return _example_library
+
+
+def select_example(node_types: set) -> dict:
+    """
+    Picks the stored workflow whose node types overlap most with the request (Jaccard).
+    """
+    best, best_score = None, -1.0
+    for example in load_example_library():
+        example_types = {node["type"] for node in example["output"]["workflow"]["nodes"]}
+        score = len(example_types & node_types) / len(example_types | node_types)
+        if score > best_score:
+            best, best_score = example, score
+    return best
+
+
+def strip_positions(output: dict) -> dict:
+    """
+    Node positions are computed locally by graph_layout, so the model need not emit them.
+    """
+    workflow = dict(output["workflow"])
+    workflow["nodes"] = [{k: v for k, v in node.items() if k != "position"} for node in workflow["nodes"]]
+    return {**output, "workflow": workflow}
+
+
+def format_node_catalogue(node_types) -> str:
+    """
+    The detected node types are listed in full (description, guidelines and
+    parameters); every other supported type stays available as a compact list so
+    a missed detection never forbids a node the request needs.
+    """
+    ordered = [t for t in NODE_TYPES if t in node_types]
+    others = [t for t in NODE_TYPES if t not in node_types]
+    if others:
+        intro = "Prefer the following node types, which match this request:"
+    else:
+        intro = "You can ONLY use the following node types:"
+    lines = ["--- Supported Node Types ---", intro, "", "**Trigger Nodes:**"]
+    lines += [f"- `{t}` - {NODE_TYPES[t].description}" for t in ordered if t in TRIGGER_TYPES]
+    lines += ["", "**Action Nodes:**"]
+    lines += [f"- `{t}` - {NODE_TYPES[t].description}" for t in ordered if t in ACTION_TYPES]
+    if others:
+        lines += ["", "**Also available** (use only if the request needs them; no other node types exist):"]
+        lines += ["; ".join(f"`{t}` ({NODE_TYPES[t].description})" for t in others)]
+
+    guidelines = []
+    for node_type in ordered:
+        for line in NODE_TYPES[node_type].guidelines:
+            if line not in guidelines:
+                guidelines.append(line)
+    if guidelines:
+        lines += ["", "--- Request-Specific Guidelines ---"] + guidelines
+
+    parameter_specs = [(t, NODE_TYPES[t].parameter_spec()) for t in ordered]
+    parameter_specs = [(t, spec) for t, spec in parameter_specs if spec]
+    if parameter_specs:
+        lines += ["", "--- Node Parameters ---", "Each node type requires specific parameters:"]
+        for node_type, spec in parameter_specs:
+            lines += ["", f"**{short_name(node_type)}**:", spec]
+    return "\n".join(lines)
+
+
+def build_system_prompt(user_query: str = None) -> str:
+    """
+    Assembles the system prompt: the static prefix first (cacheable), then the
+    full specs of the node types relevant to this request (the rest listed
+    compactly) and the one example closest to it. Without a query the full
+    catalogue is used.
+    """
+    node_types = detect_node_types(user_query) if user_query else set(NODE_TYPES)
+    example = select_example(node_types)
+    return (
+        STATIC_PREFIX
+        + "\n" + format_node_catalogue(node_types)
+        + "\n\n--- Example Output ---\n"
+        + json.dumps(strip_positions(example["output"]), separators=(",", ":"))
+        + "\n\nNow, process the user's request and create a comprehensive workflow.\n"
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (~4 characters per token) for reporting prompt savings.
+    """
+    return len(text) // 4
+
+
+if __name__ == "__main__":
+    full_prompt = build_system_prompt()
+    print(f"Full catalogue prompt: ~{estimate_tokens(full_prompt)} tokens")
+    print(f"Static cacheable prefix: ~{estimate_tokens(STATIC_PREFIX)} tokens\n")
+
+    test_queries = [
+        "Send a Slack message to #standup every morning",
+        "When a Jotform is submitted, send a WhatsApp to +60123456789 and an email to admin@company.com",
+        "Every day at 9 AM, update Google Sheets and send Slack summary",
+        "When payment webhook fires, update CRM, notify customer via WhatsApp, and alert finance team on Slack",
+    ]
+    for query in test_queries:
+        prompt = build_system_prompt(query)
+        node_types = sorted(t.split(".")[-1] for t in detect_node_types(query))
+        saved = 1 - estimate_tokens(prompt) / estimate_tokens(full_prompt)
+        uncached = estimate_tokens(prompt) - estimate_tokens(STATIC_PREFIX)
+        print(f"'{query}'")
+        print(f"   Nodes: {', '.join(node_types)}")
+        print(f"   Prompt: ~{estimate_tokens(prompt)} tokens ({saved:.0%} smaller), ~{uncached} outside the cached prefix")
@@ -0,0 +1,212 @@
+import os
+import copy
+import json
+from dotenv import load_dotenv
+from openai import OpenAI
+
+from graph_validator import WorkflowGraphValidator
+from graph_layout import apply_layout
+from workflow_generator import MODEL_NAME
+
+PATCH_SYSTEM_PROMPT = """
+CRITICAL: Return ONLY valid JSON without any markdown formatting or code blocks.
+
+You edit existing n8n-style automation workflows. You will receive the CURRENT WORKFLOW as JSON and an EDIT INSTRUCTION.
+Do NOT return the whole workflow. Return a JSON object with:
+- "patch": a list of operations that turn the current workflow into the edited one
+- "summary": ONLY if the steps changed, the full updated list of summary lines
+
+Operations address nodes by name (escape "/" in names as "~1" and "~" as "~0"):
+- {"op": "replace", "path": "/nodes/<name>/parameters/<key>", "value": ...}   change or set a parameter
+- {"op": "remove", "path": "/nodes/<name>/parameters/<key>"}                  delete a parameter
+- {"op": "replace", "path": "/nodes/<name>/name", "value": "<new name>"}      rename a node (connections follow)
+- {"op": "replace", "path": "/nodes/<name>/type", "value": "<node type>"}     change a node type
+- {"op": "add", "path": "/nodes/-", "value": {"name": ..., "type": ..., "parameters": {...}}}   add a node
+- {"op": "remove", "path": "/nodes/<name>"}                                   delete a node and its connections
+- {"op": "add", "path": "/connections/-", "value": {"source": ..., "target": ...}}
+- {"op": "remove", "path": "/connections", "value": {"source": ..., "target": ...}}
+
+Use only node types that already appear in n8n-nodes-base (e.g. n8n-nodes-base.slack, n8n-nodes-base.whatsApp,
+n8n-nodes-base.sendEmail, n8n-nodes-base.googleSheets, n8n-nodes-base.telegram, n8n-nodes-base.wait, n8n-nodes-base.function).
+Keep the patch minimal: touch only what the instruction asks for. Do not include "position" values.
+
+Example: {"patch": [{"op": "replace", "path": "/nodes/Send Email/parameters/recipient", "value": "ops@company.com"}]}
+"""
+
+
+class PatchError(ValueError):
+    pass
+
+
+def _unescape(segment: str) -> str:
+    return segment.replace("~1", "/").replace("~0", "~")
+
+
+def apply_workflow_patch(workflow_json, operations):
+    """
+    Applies name-addressed JSON-patch operations to a copy of the workflow.
+    Returns (new_workflow, touched_nodes, added_edges, removed_edges).
+    Raises PatchError if an operation is malformed or refers to a missing node.
+    """
+    workflow = copy.deepcopy(workflow_json)
+    workflow.setdefault("nodes", [])
+    workflow.setdefault("connections", [])
+    nodes_by_name = {node.get("name"): node for node in workflow["nodes"]}
+    touched = set()
+    added_edges = []
+    removed_edges = []
+
+    def remove_connections(predicate):
+        kept = []
+        for conn in workflow["connections"]:
+            if predicate(conn):
+                removed_edges.append((conn["source"], conn["target"]))
+            else:
+                kept.append(conn)
+        workflow["connections"] = kept
+
+    for operation in operations:
+        if not isinstance(operation, dict) or "op" not in operation or "path" not in operation:
+            raise PatchError(f"Malformed patch operation: {operation!r}")
+        op = operation["op"]
+        parts = [_unescape(p) for p in operation["path"].strip("/").split("/")]
+        value = operation.get("value")
+
+        if parts == ["nodes", "-"] and op == "add":
+            if not isinstance(value, dict) or not value.get("name") or not value.get("type"):
+                raise PatchError("New nodes need a name and a type")
+            if value["name"] in nodes_by_name:
+                raise PatchError(f"Node '{value['name']}' already exists")
+            node = {"name": value["name"], "type": value["type"], "parameters": value.get("parameters", {})}
+            workflow["nodes"].append(node)
+            nodes_by_name[node["name"]] = node
+            touched.add(node["name"])
+
+        elif parts[0] == "connections":
+            if not isinstance(value, dict) or "source" not in value or "target" not in value:
+                raise PatchError("Connection operations need a source and a target")
+            edge = (value["source"], value["target"])
+            if op == "add":
+                workflow["connections"].append({"source": edge[0], "target": edge[1]})
+                added_edges.append(edge)
+            elif op == "remove":
+                remove_connections(lambda c: (c["source"], c["target"]) == edge)
+            else:
+                raise PatchError(f"Unsupported connection operation '{op}'")
+
+        elif parts[0] == "nodes" and len(parts) >= 2:
+            name = parts[1]
+            node = nodes_by_name.get(name)
+            if node is None:
+                raise PatchError(f"Node '{name}' not found")
+            touched.add(name)
+
+            if len(parts) == 2 and op == "remove":
+                workflow["nodes"] = [n for n in workflow["nodes"] if n is not node]
+                del nodes_by_name[name]
+                remove_connections(lambda c: name in (c["source"], c["target"]))
+            elif parts[2:] == ["name"] and op == "replace":
+                if not value or value in nodes_by_name:
+                    raise PatchError(f"Cannot rename '{name}' to '{value}'")
+                node["name"] = value
+                nodes_by_name[value] = nodes_by_name.pop(name)
+                touched.add(value)
+                renamed = [c for c in workflow["connections"] if name in (c["source"], c["target"])]
+                remove_connections(lambda c: name in (c["source"], c["target"]))
+                for conn in renamed:
+                    edge = (value if conn["source"] == name else conn["source"],
+                            value if conn["target"] == name else conn["target"])
+                    workflow["connections"].append({"source": edge[0], "target": edge[1]})
+                    added_edges.append(edge)
+            elif parts[2:] == ["type"] and op == "replace":
+                node["type"] = value
+            elif len(parts) >= 4 and parts[2] == "parameters":
+                container = node.setdefault("parameters", {})
+                for key in parts[3:-1]:
+                    container = container.setdefault(key, {})
+                if op in ("add", "replace"):
+                    container[parts[-1]] = value
+                elif op == "remove":
+                    container.pop(parts[-1], None)
+                else:
+                    raise PatchError(f"Unsupported parameter operation '{op}'")
+            else:
+                raise PatchError(f"Unsupported operation '{op}' on '{operation['path']}'")
+        else:
+            raise PatchError(f"Unsupported path '{operation['path']}'")
+
+    return workflow, touched, added_edges, removed_edges
+
+
+def compact_workflow(workflow_json) -> str:
+    """
+    Minimal JSON for the prompt: no positions, no whitespace.
+    """
+    nodes = [{k: v for k, v in node.items() if k != "position"} for node in workflow_json.get("nodes", [])]
+    return json.dumps({"nodes": nodes, "connections": workflow_json.get("connections", [])}, separators=(",", ":"))
+
+
+def refine_workflow(workflow_json, instruction: str, summary=None, validator: WorkflowGraphValidator = None):
+    """
+    Asks the LLM for a compact patch instead of a full regeneration, applies it
+    locally and re-validates only the touched nodes.
+    Returns (summary, workflow_json, errors, warnings, validator).
+    """
+    load_dotenv()
+    client = OpenAI(base_url="https://openrouter.ai/api/v1", api_key=os.getenv("OPENROUTER_API_KEY"))
+    if validator is None:
+        validator = WorkflowGraphValidator(workflow_json)
+
+    print("[INFO] Requesting a workflow patch from the LLM...")
+    response = client.chat.completions.create(
+        model=MODEL_NAME,
+        messages=[
+            {"role": "system", "content": PATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": f"CURRENT WORKFLOW:\n{compact_workflow(workflow_json)}\n\nEDIT INSTRUCTION:\n{instruction}"}
+        ],
+        max_tokens=1024,
+        temperature=0.2,
+        response_format={"type": "json_object"}
+    )
+    if response.usage:
+        print(f"[INFO] Patch used {response.usage.prompt_tokens} prompt / {response.usage.completion_tokens} completion tokens.")
+
+    try:
+        response_data = json.loads(response.choices[0].message.content)
+        operations = response_data.get("patch", [])
+        new_workflow, touched, added_edges, removed_edges = apply_workflow_patch(workflow_json, operations)
+    except (json.JSONDecodeError, AttributeError, PatchError) as e:
+        print(f"[ERROR] Could not apply the workflow patch. Error: {e}")
+        return summary, workflow_json, [f"Could not apply the requested edit: {e}"], [], validator
+
+    errors, warnings = validator.apply_changes(new_workflow, touched, added_edges, removed_edges)
+    if not new_workflow["nodes"]:
+        errors = ["No nodes found in workflow"] + errors
+
+    if added_edges or removed_edges or any(n.get("position") is None for n in new_workflow["nodes"]):
+        apply_layout(new_workflow)
+
+    print(f"[INFO] Applied {len(operations)} patch operations touching {len(touched)} nodes.")
+    return response_data.get("summary") or summary, new_workflow, errors, warnings, validator
+
+
+if __name__ == "__main__":
+    workflow = {
+        "nodes": [
+            {"name": "Form Submitted", "type": "n8n-nodes-base.jotformTrigger", "parameters": {}},
+            {"name": "Send Email", "type": "n8n-nodes-base.sendEmail",
+             "parameters": {"recipient": "admin@company.com", "subject": "New form", "body": "[FORM_DATA]"}},
+        ],
+        "connections": [{"source": "Form Submitted", "target": "Send Email"}],
+    }
+    patch = [
+        {"op": "replace", "path": "/nodes/Send Email/parameters/recipient", "value": "ops@company.com"},
+        {"op": "add", "path": "/nodes/-", "value": {"name": "Slack Alert", "type": "n8n-nodes-base.slack",
+                                                    "parameters": {"channel": "#ops", "message": "New form!"}}},
+        {"op": "add", "path": "/connections/-", "value": {"source": "Form Submitted", "target": "Slack Alert"}},
+    ]
+    validator = WorkflowGraphValidator(workflow)
+    edited, touched, added, removed = apply_workflow_patch(workflow, patch)
+    print("Touched:", sorted(touched))
+    print("Validation:", validator.apply_changes(edited, touched, added, removed))
+    print(f"Patch size: {len(json.dumps(patch))} chars vs full workflow: {len(json.dumps(edited))} chars")
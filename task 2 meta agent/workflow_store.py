@@ -0,0 +1,249 @@
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+
+DEFAULT_DB_PATH = "workflows.db"
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+REUSE_THRESHOLD = 0.9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workflows (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    content_hash TEXT NOT NULL UNIQUE,
+    summary TEXT NOT NULL,
+    workflow TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS requests (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    request TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    workflow_id INTEGER NOT NULL REFERENCES workflows(id),
+    embedding BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (normalized, workflow_id)
+);
+CREATE TABLE IF NOT EXISTS workflow_versions (
+    lineage_id INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    workflow_id INTEGER NOT NULL REFERENCES workflows(id),
+    note TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (lineage_id, version)
+);
+CREATE INDEX IF NOT EXISTS idx_requests_normalized ON requests(normalized);
+"""
+
+
+def normalize_request(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def request_entities(text: str) -> dict:
+    """
+    The concrete values of a request: trigger and action node types, recipients,
+    schedule and message text. Requests that differ only in these embed almost
+    identically ("Slack" vs "Telegram"), so a saved workflow is only reused when
+    they are equal.
+    """
+    from workflow_generator import extract_contact_info
+    from cron_engine import parse_natural_schedule
+    from fast_path import mask_payloads, CHAT_ID_PATTERN
+    from prompt_builder import detect_node_types
+
+    masked, messages = mask_payloads(text)
+    contacts = extract_contact_info(masked)
+    try:
+        schedule = parse_natural_schedule(masked)
+    except ValueError as e:
+        schedule = str(e)  # names the unsupported phrase, so different ones still differ
+    return {
+        "node_types": sorted(detect_node_types(masked)),
+        "phones": sorted({re.sub(r"\D", "", phone) for phone in contacts["phones"]}),
+        "emails": sorted({email.lower() for email in contacts["emails"]}),
+        "channels": sorted({channel.lower() for channel in contacts["channels"]}),
+        "chats": sorted({chat_id or handle.lower() for chat_id, handle in CHAT_ID_PATTERN.findall(masked)}),
+        "schedule": schedule,
+        "messages": messages,
+    }
+
+
+def canonical_workflow(workflow_json) -> str:
+    """
+    Layout-independent canonical JSON: positions dropped, nodes sorted by name,
+    connections sorted, keys sorted. Identical graphs give identical strings.
+    """
+    nodes = sorted(
+        ({k: v for k, v in node.items() if k != "position"} for node in workflow_json.get("nodes", [])),
+        key=lambda node: (str(node.get("name")), str(node.get("type")))
+    )
+    connections = sorted((str(c.get("source")), str(c.get("target"))) for c in workflow_json.get("connections", []))
+    return json.dumps({"nodes": nodes, "connections": connections}, sort_keys=True, separators=(",", ":"))
+
+
+def content_hash(workflow_json) -> str:
+    return hashlib.sha256(canonical_workflow(workflow_json).encode("utf-8")).hexdigest()
+
+
+class WorkflowStore:
+    """
+    SQLite repository of generated workflows: deduplicated by content hash,
+    versioned per lineage (a generation and its refinements), and searchable by
+    the similarity of the original request through an in-memory embedding matrix.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, model=None):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self._model = model
+        self._load_index()
+
+    @property
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(EMBEDDING_MODEL)
+        return self._model
+
+    def _embed(self, text: str) -> np.ndarray:
+        return self.model.encode(text, normalize_embeddings=True).astype(np.float32)
+
+    def _load_index(self):
+        rows = self.conn.execute("SELECT id, workflow_id, embedding FROM requests ORDER BY id").fetchall()
+        self._request_ids = [row["id"] for row in rows]
+        self._workflow_ids = [row["workflow_id"] for row in rows]
+        self._matrix = np.vstack([np.frombuffer(row["embedding"], dtype=np.float32) for row in rows]) if rows else None
+
+    def save(self, request: str, summary, workflow_json, lineage_id: int = None, note: str = None) -> dict:
+        """
+        Stores a workflow (reusing the existing row if the graph is identical),
+        links the request to it and appends a version to the lineage.
+        A new lineage is started when lineage_id is None.
+        """
+        digest = content_hash(workflow_json)
+        now = time.time()
+        embedding = self._embed(request)
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT id FROM workflows WHERE content_hash = ?", (digest,)).fetchone()
+            is_new = row is None
+            if is_new:
+                workflow_id = self.conn.execute(
+                    "INSERT INTO workflows (content_hash, summary, workflow, created_at) VALUES (?, ?, ?, ?)",
+                    (digest, json.dumps(summary), json.dumps(workflow_json), now)
+                ).lastrowid
+            else:
+                workflow_id = row["id"]
+
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO requests (request, normalized, workflow_id, embedding, created_at) VALUES (?, ?, ?, ?, ?)",
+                (request, normalize_request(request), workflow_id, embedding.tobytes(), now)
+            )
+            if cursor.rowcount:
+                self._request_ids.append(cursor.lastrowid)
+                self._workflow_ids.append(workflow_id)
+                self._matrix = embedding[None, :] if self._matrix is None else np.vstack([self._matrix, embedding])
+
+            if lineage_id is None:
+                lineage_id = (self.conn.execute("SELECT MAX(lineage_id) FROM workflow_versions").fetchone()[0] or 0) + 1
+            version = (self.conn.execute(
+                "SELECT MAX(version) FROM workflow_versions WHERE lineage_id = ?", (lineage_id,)
+            ).fetchone()[0] or 0) + 1
+            self.conn.execute(
+                "INSERT INTO workflow_versions (lineage_id, version, workflow_id, note, created_at) VALUES (?, ?, ?, ?, ?)",
+                (lineage_id, version, workflow_id, note, now)
+            )
+        return {"workflow_id": workflow_id, "lineage_id": lineage_id, "version": version, "is_new": is_new}
+
+    def _workflow(self, workflow_id: int) -> dict:
+        row = self.conn.execute("SELECT summary, workflow FROM workflows WHERE id = ?", (workflow_id,)).fetchone()
+        return {"workflow_id": workflow_id, "summary": json.loads(row["summary"]), "workflow": json.loads(row["workflow"])}
+
+    def _lineage_of(self, workflow_id: int):
+        row = self.conn.execute(
+            "SELECT lineage_id FROM workflow_versions WHERE workflow_id = ? ORDER BY created_at DESC LIMIT 1", (workflow_id,)
+        ).fetchone()
+        return row["lineage_id"] if row else None
+
+    def find_similar(self, request: str, top_k: int = 3, min_score: float = 0.0) -> list:
+        """
+        Stored workflows whose original request is most similar to `request`,
+        best first. An exact (normalized) text match is answered without embedding.
+        """
+        exact = self.conn.execute(
+            "SELECT request, workflow_id FROM requests WHERE normalized = ? ORDER BY id DESC LIMIT 1",
+            (normalize_request(request),)
+        ).fetchone()
+        if exact:
+            match = self._workflow(exact["workflow_id"])
+            return [{**match, "score": 1.0, "request": exact["request"], "lineage_id": self._lineage_of(exact["workflow_id"])}]
+        if self._matrix is None:
+            return []
+
+        scores = self._matrix @ self._embed(request)
+        results = []
+        seen = set()
+        for index in np.argsort(-scores):
+            if scores[index] < min_score or len(results) >= top_k:
+                break
+            workflow_id = self._workflow_ids[index]
+            if workflow_id in seen:
+                continue
+            seen.add(workflow_id)
+            stored_request = self.conn.execute(
+                "SELECT request FROM requests WHERE id = ?", (self._request_ids[index],)
+            ).fetchone()["request"]
+            results.append({**self._workflow(workflow_id), "score": float(scores[index]), "request": stored_request,
+                            "lineage_id": self._lineage_of(workflow_id)})
+        return results
+
+    def history(self, lineage_id: int) -> list:
+        rows = self.conn.execute(
+            "SELECT version, workflow_id, note, created_at FROM workflow_versions WHERE lineage_id = ? ORDER BY version",
+            (lineage_id,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_version(self, lineage_id: int, version: int) -> dict:
+        row = self.conn.execute(
+            "SELECT workflow_id FROM workflow_versions WHERE lineage_id = ? AND version = ?", (lineage_id, version)
+        ).fetchone()
+        return self._workflow(row["workflow_id"]) if row else None
+
+    def stats(self) -> dict:
+        count = lambda table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        return {"workflows": count("workflows"), "requests": count("requests"), "versions": count("workflow_versions")}
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import random
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    store = WorkflowStore(db_path)
+    channels = ["#general", "#sales", "#ops", "#alerts", "#reports"]
+    actions = ["send a Slack message to {c}", "post a summary to {c}", "alert {c} on Slack"]
+    triggers = ["When a Jotform is submitted", "Every day at {h} AM", "When a payment webhook fires", "When an email arrives"]
+    rng = random.Random(1)
+
+    started = time.perf_counter()
+    for i in range(500):
+        channel = rng.choice(channels)
+        request = f"{rng.choice(triggers).format(h=rng.randint(6, 11))}, {rng.choice(actions).format(c=channel)}"
+        workflow = {"nodes": [{"name": "Trigger", "type": "n8n-nodes-base.webhookTrigger", "parameters": {}},
+                              {"name": "Slack", "type": "n8n-nodes-base.slack", "parameters": {"channel": channel}}],
+                    "connections": [{"source": "Trigger", "target": "Slack"}]}
+        store.save(request, [request], workflow)
+    print(f"Saved 500 requests in {time.perf_counter() - started:.2f}s -> {store.stats()}")
+
+    for query in ["When a form is submitted, message #sales on Slack", "Every day at 9 AM, send a Slack message to #ops"]:
+        started = time.perf_counter()
+        matches = store.find_similar(query, top_k=1)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"{elapsed_ms:6.1f} ms  {query!r} -> {matches[0]['request']!r} (score {matches[0]['score']:.3f})")
@@ -1,19 +1,43 @@
 import streamlit as st
 import asyncio
+import time
 from chatbot import generate_contextual_response
+from conversation_context import ConversationContext
+from query_engine import get_retriever
 
 st.set_page_config(page_title="Bob's Shoe Recommender", page_icon="👟", layout="centered")
 
+
+@st.cache_resource(show_spinner="Getting Bob ready... 👟")
+def load_retriever():
+    """
+    Loads the embedding model and Pinecone index once per server process and warms them up
+    """
+    retriever = get_retriever()
+    retriever.warm_up()
+    return retriever
+
+
+load_retriever()
+
 st.title("👟 Bob's Shoe Recommender")
 
 if "messages" not in st.session_state:
     st.session_state.messages = []
 if "last_product" not in st.session_state:
     st.session_state.last_product = None
+if "conversation" not in st.session_state:
+    st.session_state.conversation = ConversationContext()
+
+stream_responses = st.sidebar.checkbox("⚡ Stream Bob's replies", value=True,
+                                       help="Show the answer word by word as it is generated")
+# Re-rendering markdown on every token is wasteful, so the streamed text refreshes at most this often
+STREAM_REFRESH_S = 0.05
 
 if st.button("Clear Conversation History"):
     st.session_state.messages = []
     st.session_state.last_product = None
+    st.session_state.conversation.reset()
     st.rerun()
 
 if not st.session_state.messages:
@@ -30,13 +54,30 @@ if prompt := st.chat_input("What kind of shoe are you looking for?"):
 
     with st.chat_message("assistant"):
         message_placeholder = st.empty()
+        timing_placeholder = st.empty()
+
+    streamed = {"text": "", "rendered_at": 0.0}
+
+    def render_token(token: str):
+        streamed["text"] += token
+        if time.perf_counter() - streamed["rendered_at"] >= STREAM_REFRESH_S:
+            message_placeholder.markdown(streamed["text"] + "▌")
+            streamed["rendered_at"] = time.perf_counter()
+
     with st.spinner("Bob is thinking... 🤔"):
         try:
-            final_answer, product_to_remember = asyncio.run(generate_contextual_response(
+            final_answer, product_to_remember, timing = asyncio.run(generate_contextual_response(
                 st.session_state.messages,
-                st.session_state.last_product
+                st.session_state.last_product,
+                st.session_state.conversation,
+                on_token=render_token if stream_responses else None
             ))
             message_placeholder.markdown(final_answer)
+            if timing["ttft_s"] is not None:
+                timing_placeholder.caption(f"⚡ First token in {timing['ttft_s']:.2f}s · "
+                                           f"full reply in {timing['total_s']:.2f}s")
+            else:
+                timing_placeholder.caption(f"⚡ Full reply in {timing['total_s']:.2f}s")
             st.session_state.messages.append({"role": "assistant", "content": final_answer})
 
             if product_to_remember:
@@ -0,0 +1,317 @@
+import os
+import csv
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import datetime
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+
+from data_parser import get_product_data, create_embedding_text
+from embed_and_store import product_metadata
+
+# Anchored to this directory so ingestion and the app share one manifest whatever the working directory
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog_manifest.db")
+CHUNK_SIZE = 500
+ENCODE_BATCH_SIZE = 64
+UPSERT_BATCH_SIZE = 100
+DELETE_BATCH_SIZE = 1000
+# Pinecone updates metadata one vector per request, so they are sent concurrently
+UPDATE_WORKERS = 8
+NUMERIC_FIELDS = ("price", "original_price")
+
+
+def iter_products(source: str = None):
+    """
+    Streams products one at a time from a .jsonl or .csv file, or from the built-in
+    catalog when no source is given. CSV `features` cells hold a JSON object.
+    """
+    if source is None:
+        yield from get_product_data()
+        return
+
+    if source.endswith(".csv"):
+        with open(source, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                for field in NUMERIC_FIELDS:
+                    row[field] = float(row[field]) if row.get(field) else 0
+                row["features"] = json.loads(row["features"]) if row.get("features") else {}
+                yield row
+    else:
+        with open(source, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"[WARN] Skipping line {line_number} of {source}: {e}")
+
+
+def iter_chunks(iterable, size: int = CHUNK_SIZE):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def content_hash(product: dict) -> str:
+    """
+    Hash of exactly what gets embedded; if it is unchanged, so is the vector.
+    """
+    return _hash(create_embedding_text(product))
+
+
+def metadata_hash(metadata: dict) -> str:
+    return _hash(json.dumps(metadata, sort_keys=True))
+
+
+def manifest_entry(product: dict) -> tuple:
+    """
+    (id, content hash, metadata hash) as recorded in the manifest for an indexed product.
+    """
+    return product["id"], content_hash(product), metadata_hash(product_metadata(product))
+
+
+def catalog_hash(products) -> str:
+    """
+    Order-independent hash of a whole catalog's embedding texts and metadata.
+    """
+    entries = sorted(":".join(manifest_entry(product)) for product in products)
+    return _hash("\n".join(entries))
+
+
+class CatalogManifest:
+    """
+    SQLite record of what the vector index holds: per-product content and metadata
+    hashes and the ingestion run that last saw each product, plus the catalog version
+    (bumped only by runs that changed the index) and the source it was indexed from.
+    """
+
+    def __init__(self, db_path: str = MANIFEST_PATH):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS products (
+                id TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                metadata_hash TEXT NOT NULL,
+                last_seen_run INTEGER NOT NULL,
+                updated_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_products_seen ON products (last_seen_run);
+            CREATE TABLE IF NOT EXISTS catalog_meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    def _get(self, key: str) -> int:
+        row = self.conn.execute("SELECT value FROM catalog_meta WHERE key = ?", (key,)).fetchone()
+        return int(row[0]) if row else 0
+
+    def _set(self, key: str, value):
+        self.conn.execute(
+            "INSERT INTO catalog_meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value", (key, str(value))
+        )
+        self.conn.commit()
+
+    @property
+    def version(self) -> int:
+        return self._get("version")
+
+    @property
+    def source(self):
+        """
+        Absolute path of the catalog file last indexed, or None for the built-in catalog.
+        """
+        row = self.conn.execute("SELECT value FROM catalog_meta WHERE key = 'source'").fetchone()
+        return row[0] if row and row[0] else None
+
+    def bump_version(self, source: str = None) -> int:
+        version = self.version + 1
+        self._set("updated_at", datetime.datetime.now().isoformat())
+        self._set("source", os.path.abspath(source) if source else "")
+        self._set("version", version)
+        notify_catalog_change(version)
+        return version
+
+    def start_run(self) -> int:
+        run = self._get("run") + 1
+        self._set("run", run)
+        return run
+
+    def lookup(self, ids: list) -> dict:
+        placeholders = ", ".join("?" * len(ids))
+        rows = self.conn.execute(
+            f"SELECT id, content_hash, metadata_hash FROM products WHERE id IN ({placeholders})", ids
+        ).fetchall()
+        return {product_id: (content, metadata) for product_id, content, metadata in rows}
+
+    def record(self, entries: list, run: int):
+        """
+        `entries` are (id, content hash, metadata hash); marks each as seen in `run`.
+        """
+        now = datetime.datetime.now().isoformat()
+        self.conn.executemany(
+            "INSERT INTO products (id, content_hash, metadata_hash, last_seen_run, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET last_seen_run = excluded.last_seen_run, "
+            "updated_at = CASE WHEN products.content_hash = excluded.content_hash AND products.metadata_hash = excluded.metadata_hash "
+            "THEN products.updated_at ELSE excluded.updated_at END, "
+            "content_hash = excluded.content_hash, metadata_hash = excluded.metadata_hash",
+            [(product_id, content, metadata, run, now) for product_id, content, metadata in entries]
+        )
+        self.conn.commit()
+
+    def unseen(self, run: int):
+        return [row[0] for row in self.conn.execute(
+            "SELECT id FROM products WHERE last_seen_run < ?", (run,)
+        )]
+
+    def forget(self, ids: list):
+        self.conn.executemany("DELETE FROM products WHERE id = ?", [(product_id,) for product_id in ids])
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+_catalog_listeners = []
+
+
+def on_catalog_change(callback):
+    """
+    Registers callback(version) to run in this process whenever any indexing path
+    (catalog_ingest, embed_and_store full or --bulk) bumps the catalog version.
+    Other processes notice the bump through the manifest file instead.
+    """
+    _catalog_listeners.append(callback)
+
+
+def notify_catalog_change(version: int):
+    for callback in list(_catalog_listeners):
+        callback(version)
+
+
+def get_catalog_version(db_path: str = MANIFEST_PATH) -> int:
+    if not os.path.exists(db_path):
+        return 0
+    manifest = CatalogManifest(db_path)
+    try:
+        return manifest.version
+    finally:
+        manifest.close()
+
+
+def get_catalog_source(db_path: str = MANIFEST_PATH):
+    if not os.path.exists(db_path):
+        return None
+    manifest = CatalogManifest(db_path)
+    try:
+        return manifest.source
+    finally:
+        manifest.close()
+
+
+def ingest_catalog(index, source: str = None, model=None, db_path: str = MANIFEST_PATH,
+                   chunk_size: int = CHUNK_SIZE, encode=None) -> dict:
+    """
+    Incrementally syncs `index` (a Pinecone Index, or anything with the same
+    upsert/update/delete methods) with the catalog in `source`:
+    new or changed products are embedded and upserted, products whose embedding
+    text is unchanged but whose price or other metadata changed get a metadata
+    update only, and products missing from the source are deleted. The catalog
+    version is bumped when anything changed. Work is committed chunk by chunk.
+    """
+    manifest = CatalogManifest(db_path)
+    run = manifest.start_run()
+    if encode is None:
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer('all-MiniLM-L6-v2')
+        encode = lambda texts: model.encode(texts, batch_size=ENCODE_BATCH_SIZE).tolist()
+
+    stats = {"seen": 0, "new": 0, "changed": 0, "metadata_only": 0, "unchanged": 0, "deleted": 0}
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(UPDATE_WORKERS) as pool:
+            for chunk in iter_chunks(iter_products(source), chunk_size):
+                known = manifest.lookup([product["id"] for product in chunk])
+                to_embed, to_update, entries = [], [], []
+                for product in chunk:
+                    metadata = product_metadata(product)
+                    hashes = (content_hash(product), metadata_hash(metadata))
+                    entries.append((product["id"], *hashes))
+                    previous = known.get(product["id"])
+                    if previous is None or previous[0] != hashes[0]:
+                        to_embed.append((product, metadata))
+                        stats["new" if previous is None else "changed"] += 1
+                    elif previous[1] != hashes[1]:
+                        to_update.append((product["id"], metadata))
+                        stats["metadata_only"] += 1
+                    else:
+                        stats["unchanged"] += 1
+
+                if to_embed:
+                    embeddings = encode([create_embedding_text(product) for product, _ in to_embed])
+                    vectors = [{"id": product["id"], "values": embedding, "metadata": metadata}
+                               for (product, metadata), embedding in zip(to_embed, embeddings)]
+                    for i in range(0, len(vectors), UPSERT_BATCH_SIZE):
+                        index.upsert(vectors=vectors[i:i + UPSERT_BATCH_SIZE])
+                if to_update:
+                    list(pool.map(lambda item: index.update(id=item[0], set_metadata=item[1]), to_update))
+
+                manifest.record(entries, run)
+                stats["seen"] += len(chunk)
+                print(f"[INFO] {stats['seen']} products processed "
+                      f"({stats['new']} new, {stats['changed']} changed, {stats['metadata_only']} metadata-only)")
+
+        removed = manifest.unseen(run)
+        for i in range(0, len(removed), DELETE_BATCH_SIZE):
+            batch = removed[i:i + DELETE_BATCH_SIZE]
+            index.delete(ids=batch)
+            manifest.forget(batch)
+        stats["deleted"] = len(removed)
+    finally:
+        # Bumped even when a run fails part-way, since earlier chunks may already be in the index
+        changed = stats["new"] + stats["changed"] + stats["metadata_only"] + stats["deleted"]
+        stats["version"] = manifest.bump_version(source) if changed else manifest.version
+        manifest.close()
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def export_catalog(path: str, products=None):
+    """
+    Writes the built-in catalog (or `products`) as JSONL, the format the pipeline streams.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        for product in products if products is not None else get_product_data():
+            f.write(json.dumps(product) + "\n")
+
+
+if __name__ == "__main__":
+    from embed_and_store import setup_pinecone, create_pinecone_index
+
+    parser = argparse.ArgumentParser(description="Incrementally sync the product catalog to Pinecone.")
+    parser.add_argument("source", nargs="?", help="catalog .jsonl or .csv (default: built-in catalog)")
+    parser.add_argument("--index", default="shoe-recommender-index")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--export", metavar="PATH", help="write the built-in catalog as JSONL and exit")
+    args = parser.parse_args()
+
+    if args.export:
+        export_catalog(args.export)
+        print(f"Exported the built-in catalog to {args.export}")
+    else:
+        try:
+            pinecone_client = setup_pinecone()
+            create_pinecone_index(pinecone_client, args.index)
+            result = ingest_catalog(pinecone_client.Index(args.index), args.source, chunk_size=args.chunk_size)
+            print(f"\n✓ Catalog synced in {result['seconds']:.1f}s (version {result['version']}): "
+                  f"{result['new']} new, {result['changed']} re-embedded, {result['metadata_only']} metadata updates, "
+                  f"{result['deleted']} deleted, {result['unchanged']} unchanged")
+        except Exception as e:
+            print(f"An error occurred: {e}")
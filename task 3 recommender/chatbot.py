@@ -1,61 +1,88 @@
 import os
 import json
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
 from query_engine import run_query
 import datetime
 import asyncio
+import time
 from crm import ShoeCRM
+from intent_classifier import get_classifier, context_from_history, classifier_metrics
+from slot_extractor import extract_slots
+from conversation_context import ConversationContext
 
+# Aggregates across all sessions; per-turn timing is returned by generate_contextual_response
+turn_metrics = {"turns": 0, "streamed_turns": 0, "total_ttft_s": 0.0, "total_turn_s": 0.0}
 
-async def generate_contextual_response(chat_history: list, last_retrieved_product: dict = None):
+
+async def generate_contextual_response(chat_history: list, last_retrieved_product: dict = None,
+                                       context: ConversationContext = None, on_token=None):
     """
     Enhanced response generator with mood detection, budget awareness, and personalization.
+    Mood detection, intent routing and a speculative product search run concurrently,
+    so a turn costs about two LLM round trips instead of four sequential steps.
+    The local classifier answers mood and intent when it is confident; the LLM is
+    only asked for the parts it is unsure about.
+    Prompts are built from `context` (a bounded window, summary and state) rather
+    than the whole transcript; pass the session's instance to keep it across turns.
+    With `on_token`, the answer is streamed and each text delta is passed to it as it
+    arrives; the full answer is still returned once the stream ends.
+    Returns (answer, product, timing), where timing holds this turn's "ttft_s"
+    (None if no token arrived) and "total_s".
     """
     load_dotenv()
-    client = OpenAI(base_url="https://openrouter.ai/api/v1", api_key=os.getenv("OPENROUTER_API_KEY"))
+    client = AsyncOpenAI(base_url="https://openrouter.ai/api/v1", api_key=os.getenv("OPENROUTER_API_KEY"))
+    started = time.perf_counter()
+
+    context = context or ConversationContext()
+    context.sync(chat_history)
+    last_retrieved_product = last_retrieved_product or context.state["product"]
 
     # Get the last user message
     last_user_message = chat_history[-1]['content']
+    slots = extract_slots(last_user_message)
+    budget_min, budget_max = slots.budget
+    search_filters = slots.filters()
+
+    classifier = await get_classifier()
+    prediction = classifier.predict(last_user_message, context_from_history(chat_history))
+    mood_source = "local" if prediction.mood_confident else "llm"
+    intent_source = "local" if prediction.intent_confident else "llm"
+    classifier_metrics["turns"] += 1
+    classifier_metrics["mood_local"] += mood_source == "local"
+    classifier_metrics["intent_local"] += intent_source == "local"
+    print(f"[INFO] Local classifier: {prediction.labels} (confidence {prediction.confidences})")
+
+    # Mood, routing and retrieval in parallel; the search result is discarded if the user is just replying
+    print("\n[INFO] Analyzing mood, routing intent and searching products concurrently...")
+    user_mood, intent, search_outcome = await asyncio.gather(
+        detect_user_mood(last_user_message, client) if mood_source == "llm" else _resolved(prediction.mood),
+        route_intent(context, client) if intent_source == "llm" else _resolved(prediction.intent),
+        speculative_search(last_user_message, budget_min, budget_max, search_filters)
+    )
+    print(f"[INFO] Detected intent: {intent} ({intent_source}), mood source: {mood_source}")
 
-    # Detect mood and context
-    print("\n[INFO] Analyzing user mood and context...")
-    user_mood = detect_user_mood(last_user_message, client)
-    budget_min, budget_max = extract_budget_from_text(last_user_message)
-
-    await ShoeCRM.log_event(
+    # CRM writes don't affect the answer, so they run alongside the final LLM call
+    crm_events = [ShoeCRM.log_event(
         "User Context Analysis",
         {
             "mood": user_mood,
-            "budget_range": f"RM{budget_min}-RM{budget_max}" if budget_min else "Not specified"
+            "mood_source": mood_source,
+            "search_filters": search_filters,
+            "budget_range": format_budget(budget_min, budget_max)
         },
         user_message=last_user_message,
         bot_response=None
-    )
-
-    # Routing logic
-    routing_prompt = f"Conversation History:\n{chat_history}\n\nDoes the user's LAST message contain a NEW request for a type of shoe? Answer with only 'SEARCH' or 'REPLY'."
-
-    print("\n[INFO] Routing user intent...")
-    routing_response = client.chat.completions.create(
-        model="deepseek/deepseek-chat",
-        messages=[{"role": "user", "content": routing_prompt}],
-        max_tokens=5
-    )
-    intent = routing_response.choices[0].message.content.strip().upper()
-    print(f"[INFO] Detected intent: {intent}")
+    )]
 
     product_context = ""
     product_to_remember = None
 
     if "SEARCH" in intent:
-        print("[INFO] Performing a new product search...")
-        # Pass budget range to search
-        retrieved_products = run_query(
-            last_user_message,
-            top_k=3,
-            budget_range=(budget_min, budget_max)
-        )
+        print("[INFO] Using the speculative product search...")
+        if isinstance(search_outcome, Exception):
+            raise search_outcome
+        retrieved_products = search_outcome
 
         if retrieved_products and retrieved_products['matches']:
             if user_mood.get("emotion") == "budget-conscious" and len(retrieved_products['matches']) > 1:
@@ -66,30 +93,31 @@ async def generate_contextual_response(chat_history: list, last_retrieved_produc
             else:
                 product_to_remember = retrieved_products['matches'][0]['metadata']
 
-            await ShoeCRM.log_event(
+            crm_events.append(ShoeCRM.log_event(
                 "Product Recommended",
                 {
                     "product_name": product_to_remember.get("name"),
                     "user_mood": user_mood.get("emotion"),
-                    "price": product_to_remember.get("price")
+                    "price": product_to_remember.get("price"),
+                    "budget_range": format_budget(budget_min, budget_max)
                 },
                 user_message=last_user_message,
                 bot_response=None
-            )
+            ))
         else:
-            await ShoeCRM.log_event(
+            crm_events.append(ShoeCRM.log_event(
                 "Search Failed",
                 {
-                    "budget_range": f"RM{budget_min}-RM{budget_max}" if budget_min else "None"
+                    "budget_range": format_budget(budget_min, budget_max)
                 },
                 user_message=last_user_message,
                 bot_response=None
-            )
+            ))
 
     elif "REPLY" in intent and last_retrieved_product:
-        print("[INFO] User is replying. Using last retrieved product as context.")
+        print("[INFO] User is replying. Discarding the speculative search and using last retrieved product as context.")
         product_to_remember = last_retrieved_product
-        await ShoeCRM.log_event(
+        crm_events.append(ShoeCRM.log_event(
             "User Follow-up Question",
             {
                 "context_product": last_retrieved_product.get("name"),
@@ -97,9 +125,11 @@ async def generate_contextual_response(chat_history: list, last_retrieved_produc
             },
             user_message=last_user_message,
             bot_response=None
-        )
+        ))
 
     product_context = format_product_context_for_llm(product_to_remember, user_mood)
+    context.update_state(product_to_remember, (budget_min, budget_max), user_mood, search_filters, intent)
+    budget_text = format_budget(*context.budget)
 
     system_prompt = f"""
     You are 'Bob', a friendly, emotional, and humorous shoe store assistant from Malaysia.
@@ -109,7 +139,9 @@ async def generate_contextual_response(chat_history: list, last_retrieved_produc
     User Emotion: {user_mood.get('emotion', 'casual')}
     Stress Level: {user_mood.get('stress_level', 'medium')}
     Shopping Urgency: {user_mood.get('urgency', 'browsing')}
-    Budget: {"RM" + str(budget_min) + "-RM" + str(budget_max) if budget_min else "Not specified"}
+    Budget: {budget_text}
+
+    {context.context_block()}
 
     --- YOUR ADAPTIVE BEHAVIOR ---
     Based on the user's emotional state, adjust your response:
@@ -137,23 +169,22 @@ async def generate_contextual_response(chat_history: list, last_retrieved_produc
     """
 
     messages_to_send = [{"role": "system", "content": system_prompt}]
-    messages_to_send.extend(chat_history)
+    messages_to_send.extend(context.window_messages())
 
     if product_context:
         messages_to_send.append({"role": "system", "content": f"CONTEXT: {product_context}"})
 
-    print("[INFO] Generating personalized response...")
-    final_response = client.chat.completions.create(
-        model="deepseek/deepseek-chat",
-        messages=messages_to_send,
-        temperature=0.7
+    print(f"[INFO] Generating personalized response... (prompt context: {context.stats()})")
+    (final_answer, ttft_s), *_ = await asyncio.gather(
+        complete_answer(client, messages_to_send, started, on_token),
+        *crm_events
     )
-    final_answer = final_response.choices[0].message.content
 
     # Check for conversation end
     farewells = ["thank you", "thanks", "ok tq", "terima kasih", "ok thanks", "bye", "goodbye"]
+    closing_events = []
     if any(farewell in last_user_message.lower() for farewell in farewells):
-        await ShoeCRM.log_event(
+        closing_events.append(ShoeCRM.log_event(
             "Conversation Ended",
             {
                 "total_messages": len(chat_history),
@@ -161,22 +192,103 @@ async def generate_contextual_response(chat_history: list, last_retrieved_produc
             },
             user_message=last_user_message,
             bot_response=final_answer
-        )
+        ))
 
-    await ShoeCRM.log_event(
+    closing_events.append(ShoeCRM.log_event(
         "Chat Interaction Complete",
         {
             "mood": user_mood.get("emotion"),
             "had_product_search": "SEARCH" in intent,
+            "intent_source": intent_source,
             "had_product_recommendation": product_to_remember is not None,
             "product_recommended": product_to_remember.get("name") if product_to_remember else None,
             "budget_mentioned": budget_min is not None
         },
         user_message=last_user_message,
         bot_response=final_answer
+    ))
+    await asyncio.gather(*closing_events)
+    await client.close()
+
+    total_s = time.perf_counter() - started
+    turn_metrics["turns"] += 1
+    turn_metrics["total_turn_s"] += total_s
+    ttft_text = f"{ttft_s:.2f}s" if ttft_s is not None else "n/a"
+    print(f"[INFO] Turn completed in {total_s:.2f}s (first token after {ttft_text})")
+    return final_answer, product_to_remember, {"ttft_s": ttft_s, "total_s": total_s}
+
+async def complete_answer(client: AsyncOpenAI, messages: list, turn_started: float, on_token=None) -> tuple:
+    """
+    Final answer call. Returns (answer, ttft_s), with time-to-first-token measured
+    from the start of the turn; without streaming, the first token arrives with the
+    whole answer. ttft_s is None if the stream produced no text.
+    """
+    def first_token():
+        ttft = time.perf_counter() - turn_started
+        turn_metrics["total_ttft_s"] += ttft
+        return ttft
+
+    if on_token is None:
+        response = await client.chat.completions.create(
+            model="deepseek/deepseek-chat",
+            messages=messages,
+            temperature=0.7
+        )
+        return response.choices[0].message.content, first_token()
+
+    turn_metrics["streamed_turns"] += 1
+    stream = await client.chat.completions.create(
+        model="deepseek/deepseek-chat",
+        messages=messages,
+        temperature=0.7,
+        stream=True
     )
+    parts = []
+    ttft = None
+    async for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if not delta:
+            continue
+        if not parts:
+            ttft = first_token()
+        parts.append(delta)
+        on_token(delta)
+    return "".join(parts), ttft
+
+def get_turn_metrics() -> dict:
+    turns = turn_metrics["turns"]
+    return {
+        **turn_metrics,
+        "avg_ttft_s": turn_metrics["total_ttft_s"] / turns if turns else 0.0,
+        "avg_turn_s": turn_metrics["total_turn_s"] / turns if turns else 0.0,
+    }
+
+async def _resolved(value):
+    return value
+
+async def route_intent(context: ConversationContext, client: AsyncOpenAI) -> str:
+    """
+    Decides whether the last message asks for a new product search or replies about the last one.
+    """
+    routing_prompt = context.routing_prompt()
 
-    return final_answer, product_to_remember
+    routing_response = await client.chat.completions.create(
+        model="deepseek/deepseek-chat",
+        messages=[{"role": "user", "content": routing_prompt}],
+        max_tokens=5
+    )
+    return routing_response.choices[0].message.content.strip().upper()
+
+async def speculative_search(query_text: str, budget_min, budget_max, filters: dict = None):
+    """
+    Runs the product search in a worker thread while the LLM calls are in flight.
+    Errors are returned rather than raised, since the result may not be needed.
+    """
+    try:
+        return await asyncio.to_thread(run_query, query_text, top_k=3, budget_range=(budget_min, budget_max), filters=filters)
+    except Exception as e:
+        print(f"[WARN] Speculative search failed: {e}")
+        return e
 
 def format_product_context_for_llm(product_data: dict, user_mood: dict = None) -> str:
     """
@@ -238,7 +350,7 @@ def format_product_context_for_llm(product_data: dict, user_mood: dict = None) -
 
     return context
 
-def detect_user_mood(user_message: str, client: OpenAI) -> dict:
+async def detect_user_mood(user_message: str, client: AsyncOpenAI) -> dict:
     """
     Detect emotional tone and context from user input.
     """
@@ -254,7 +366,7 @@ def detect_user_mood(user_message: str, client: OpenAI) -> dict:
     {{"emotion": "stressed", "stress_level": "high", "urgency": "ready-to-buy"}}
     """
 
-    response = client.chat.completions.create(
+    response = await client.chat.completions.create(
         model="deepseek/deepseek-chat",
         messages=[{"role": "user", "content": mood_prompt}],
         max_tokens=50,
@@ -266,50 +378,14 @@ def detect_user_mood(user_message: str, client: OpenAI) -> dict:
     except:
         return {"emotion": "casual", "stress_level": "medium", "urgency": "browsing"}
 
+def format_budget(budget_min, budget_max) -> str:
+    """
+    Budget as logged in every CRM event; "under RM300" has a minimum of 0, which is still a budget.
+    """
+    return f"RM{budget_min}-RM{budget_max}" if budget_min is not None else "Not specified"
+
 def extract_budget_from_text(user_message: str) -> tuple:
     """
     Extract budget constraints from user message.
     """
-    import re
-
-    # Pattern for "under RM100" or "below RM200", etc.
-    under_pattern = r'(?:under|below|less than|max|maximum)\s*(?:rm|RM)\s*(\d+)'
-    under_match = re.search(under_pattern, user_message, re.IGNORECASE)
-    if under_match:
-        max_budget = int(under_match.group(1))
-        return (0, max_budget)
-
-    # Also check for patterns without "RM" like "under 100"
-    under_pattern_no_rm = r'(?:under|below|less than|max|maximum)\s+(\d+)'
-    under_match_no_rm = re.search(under_pattern_no_rm, user_message, re.IGNORECASE)
-    if under_match_no_rm:
-        max_budget = int(under_match_no_rm.group(1))
-        return (0, max_budget)
-
-    around_pattern = r'(?:around|about|approximately)\s*(?:rm|RM)\s*(\d+)'
-    around_match = re.search(around_pattern, user_message, re.IGNORECASE)
-    if around_match:
-        amount = int(around_match.group(1))
-        return (amount - 50, amount + 50)
-
-    # Pattern for budget range "RM100-200", "between RM100 and RM200"
-    range_pattern = r'(?:rm|RM)\s*(\d+)\s*(?:-|to|and)\s*(?:rm|RM)?\s*(\d+)'
-    range_match = re.search(range_pattern, user_message, re.IGNORECASE)
-    if range_match:
-        return (int(range_match.group(1)), int(range_match.group(2)))
-
-    # Pattern for minimum budget "at least RM100", "minimum RM150"
-    min_pattern = r'(?:at least|minimum|min)\s*(?:rm|RM)\s*(\d+)'
-    min_match = re.search(min_pattern, user_message, re.IGNORECASE)
-    if min_match:
-        min_budget = int(min_match.group(1))
-        return (min_budget, 999999)
-
-    # Simple RM mention
-    simple_pattern = r'(?:rm|RM)\s*(\d+)'
-    simple_match = re.search(simple_pattern, user_message, re.IGNORECASE)
-    if simple_match:
-        amount = int(simple_match.group(1))
-        return (amount - 50, amount + 50)
-
-    return (None, None)
\ No newline at end of file
+    return extract_slots(user_message).budget
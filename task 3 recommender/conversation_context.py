@@ -0,0 +1,119 @@
+CHARS_PER_TOKEN = 4  # rough average for English and Manglish text, good enough for budgeting
+WINDOW_TOKENS = 1200
+SUMMARY_TOKENS = 300
+SUMMARY_LINE_CHARS = 160
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+class ConversationContext:
+    """
+    What the recommender sends to the LLM instead of the raw transcript:
+    the most recent messages that fit in `window_tokens`, a running summary of
+    older messages capped at `summary_tokens`, and structured state (current
+    product, budget, mood, search filters). Prompt size stays bounded however
+    long the session runs. One instance lives in the Streamlit session.
+    """
+
+    def __init__(self, window_tokens: int = WINDOW_TOKENS, summary_tokens: int = SUMMARY_TOKENS):
+        self.window_tokens = window_tokens
+        self.summary_tokens = summary_tokens
+        self.reset()
+
+    def reset(self):
+        self.window = []
+        self.summary_lines = []
+        self.omitted = 0
+        self.state = {"product": None, "budget": (None, None), "mood": None, "filters": {}, "intent": None}
+        self._seen = 0
+
+    def sync(self, chat_history: list):
+        """
+        Takes in the messages added since the last call. A shorter history means it was cleared.
+        """
+        if len(chat_history) < self._seen:
+            self.reset()
+        self.window.extend(chat_history[self._seen:])
+        self._seen = len(chat_history)
+        # The newest message always stays, even if it alone is over budget
+        while len(self.window) > 1 and sum(estimate_tokens(m["content"]) for m in self.window) > self.window_tokens:
+            self._summarise(self.window.pop(0))
+
+    def _summarise(self, message: dict):
+        speaker = "User" if message["role"] == "user" else "Bob"
+        self.summary_lines.append(f"{speaker}: {_clip(message['content'], SUMMARY_LINE_CHARS)}")
+        while len(self.summary_lines) > 1 and estimate_tokens("\n".join(self.summary_lines)) > self.summary_tokens:
+            self.summary_lines.pop(0)
+            self.omitted += 1
+
+    def update_state(self, product: dict = None, budget: tuple = (None, None), mood: dict = None,
+                     filters: dict = None, intent: str = None):
+        """
+        Records what this turn established; values not mentioned this turn are kept.
+        """
+        if product:
+            self.state["product"] = product
+        if budget[0] is not None:
+            self.state["budget"] = budget
+        if mood:
+            self.state["mood"] = mood
+        if filters:
+            self.state["filters"] = filters
+        if intent:
+            self.state["intent"] = intent
+
+    @property
+    def budget(self) -> tuple:
+        return self.state["budget"]
+
+    def summary_text(self) -> str:
+        lines = ([f"({self.omitted} earlier messages omitted)"] if self.omitted else []) + self.summary_lines
+        return "\n".join(lines) if lines else "(none)"
+
+    def state_text(self) -> str:
+        product = self.state["product"]
+        budget_min, budget_max = self.state["budget"]
+        mood = self.state["mood"] or {}
+        filters = self.state["filters"]
+        return "\n".join([
+            f"Current product: {product['name']} (RM{product['price']})" if product else "Current product: none yet",
+            f"Budget: RM{budget_min}-RM{budget_max}" if budget_min is not None else "Budget: Not specified",
+            f"Mood: {mood.get('emotion', 'casual')}, stress {mood.get('stress_level', 'medium')}, "
+            f"{mood.get('urgency', 'browsing')}" if mood else "Mood: unknown",
+            f"Looking for: {', '.join(f'{key}={value}' for key, value in filters.items())}" if filters else "Looking for: not specified",
+        ])
+
+    def routing_prompt(self) -> str:
+        earlier = "\n".join(f"{'User' if m['role'] == 'user' else 'Bob'}: {_clip(m['content'], SUMMARY_LINE_CHARS)}"
+                            for m in self.window[:-1])
+        return (
+            f"Conversation summary:\n{self.summary_text()}\n\n"
+            f"Current state:\n{self.state_text()}\n\n"
+            f"Recent messages:\n{earlier or '(none)'}\n\n"
+            f"User's LAST message: {self.window[-1]['content'] if self.window else ''}\n\n"
+            "Does the user's LAST message contain a NEW request for a type of shoe? Answer with only 'SEARCH' or 'REPLY'."
+        )
+
+    def context_block(self) -> str:
+        """
+        Summary and state for the answer's system prompt.
+        """
+        return f"--- EARLIER IN THIS CONVERSATION ---\n{self.summary_text()}\n\n--- CONVERSATION STATE ---\n{self.state_text()}"
+
+    def window_messages(self) -> list:
+        return [{"role": m["role"], "content": m["content"]} for m in self.window]
+
+    def stats(self) -> dict:
+        return {
+            "window_messages": len(self.window),
+            "window_tokens": sum(estimate_tokens(m["content"]) for m in self.window),
+            "summary_tokens": estimate_tokens(self.summary_text()),
+            "summarised_messages": len(self.summary_lines) + self.omitted,
+        }
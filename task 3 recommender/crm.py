@@ -2,8 +2,35 @@
 
 import streamlit as st
 import json
+import time
+import queue
+import atexit
+import asyncio
 import datetime
+import threading
 from libsql_client import create_client
+from crm_analytics import ensure_analytics_schema, write_statements
+from event_sink import event_sink, spill_sink
+
+CREATE_EVENTS_TABLE = """
+CREATE TABLE IF NOT EXISTS crm_events (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT,
+    event_type TEXT,
+    event_data TEXT,
+    user_message TEXT,
+    bot_response TEXT
+)
+"""
+
+QUEUE_MAXSIZE = 10_000
+BATCH_SIZE = 100  # 9 parameters per row stays under SQLite's variable limit
+# After the first event arrives, wait this long for the rest of the turn's events
+BATCH_LINGER_S = 0.2
+POLL_INTERVAL_S = 1.0
+WRITE_RETRIES = 2
+SHUTDOWN_TIMEOUT_S = 5.0
+
 
 class ShoeCRM:
     @staticmethod
@@ -19,35 +46,144 @@ class ShoeCRM:
     @staticmethod
     async def log_event(event_type: str, event_data: dict, user_message: str = None, bot_response: str = None):
         """
-        Creates a client, logs a single event to the database, and closes the client
+        Queues a single event for the background writer, mirrors it to the local
+        JSONL log and returns immediately
         """
-        client = ShoeCRM._get_client()
+        row = (
+            datetime.datetime.now().isoformat(),
+            event_type,
+            json.dumps(event_data),
+            user_message,
+            bot_response
+        )
+        event_queue.put(row)
+        event_sink.write_row(row)
+
+
+class CRMEventQueue:
+    """
+    Bounded in-memory queue drained by a background thread that owns one libsql
+    client and writes events in multi-row inserts, together with the hourly and
+    daily rollups in crm_analytics.py. The thread runs its own event
+    loop, so it outlives the per-turn asyncio.run() loops of the Streamlit app.
+    When the queue is full, or a batch still fails after retries, events go to
+    the spill sink (crm_spill.jsonl) instead of blocking the chat.
+    """
+
+    def __init__(self, client_factory, maxsize: int = QUEUE_MAXSIZE, batch_size: int = BATCH_SIZE,
+                 spill=spill_sink):
+        self.client_factory = client_factory
+        self.batch_size = batch_size
+        self.spill = spill
+        self._queue = queue.Queue(maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._atexit_registered = False
+        self.metrics = {"enqueued": 0, "written": 0, "batches": 0, "spilled": 0, "failed_flushes": 0}
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=lambda: asyncio.run(self._writer()), name="crm-event-writer", daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.close)
+                self._atexit_registered = True
+
+    def put(self, row: tuple):
+        self.start()
+        try:
+            self._queue.put_nowait(row)
+            self.metrics["enqueued"] += 1
+        except queue.Full:
+            print("[WARN] CRM event queue is full, spilling event to disk.")
+            self._spill([row])
+
+    def _next_batch(self) -> list:
         try:
-            await client.execute("""
-            CREATE TABLE IF NOT EXISTS crm_events (
-                id INTEGER PRIMARY KEY,
-                timestamp TEXT,
-                event_type TEXT,
-                event_data TEXT,
-                user_message TEXT,
-                bot_response TEXT
-            )
-            """)
-
-            await client.execute(
-                "INSERT INTO crm_events (timestamp, event_type, event_data, user_message, bot_response) VALUES (?, ?, ?, ?, ?)",
-                (
-                    datetime.datetime.now().isoformat(),
-                    event_type,
-                    json.dumps(event_data),
-                    user_message,
-                    bot_response
-                )
-            )
-            print(f"[DB LOG] Successfully logged event: {event_type}")
-
-        except Exception as e:
-            print(f"ERROR in CRM log_event: {e}")
-            st.error(f"CRM Logging Failed: {e}")
+            batch = [self._queue.get(timeout=POLL_INTERVAL_S)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + BATCH_LINGER_S
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 and not self._stopping.is_set()
+                             else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    async def _writer(self):
+        client = None
+        try:
+            while not (self._stopping.is_set() and self._queue.empty()):
+                batch = self._next_batch()
+                if batch:
+                    client = await self._write(client, batch)
         finally:
-            await client.close()
\ No newline at end of file
+            if client is not None:
+                await client.close()
+
+    async def _write(self, client, batch: list):
+        """
+        Inserts the batch in one statement, reconnecting between retries. Returns the client to reuse.
+        """
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                if client is None:
+                    client = self.client_factory()
+                    await client.execute(CREATE_EVENTS_TABLE)
+                    await ensure_analytics_schema(client)
+                # Events and their rollup increments commit together
+                await client.batch(write_statements(batch))
+                self.metrics["written"] += len(batch)
+                self.metrics["batches"] += 1
+                print(f"[DB LOG] Successfully logged {len(batch)} events: {', '.join(sorted({row[1] for row in batch}))}")
+                return client
+            except Exception as e:
+                self.metrics["failed_flushes"] += 1
+                print(f"ERROR in CRM flush (attempt {attempt + 1}/{WRITE_RETRIES + 1}): {e}")
+                if client is not None:
+                    try:
+                        await client.close()
+                    except Exception:
+                        pass
+                    client = None
+                await asyncio.sleep(0.5 * 2 ** attempt)
+        self._spill(batch)
+        return None
+
+    def _spill(self, rows: list):
+        """
+        Keeps events that never reached Turso in the crm_log.txt format so they can be replayed later.
+        """
+        self.spill.write_rows(rows)
+        self.spill.flush()
+        self.metrics["spilled"] += len(rows)
+
+    def close(self, timeout: float = SHUTDOWN_TIMEOUT_S):
+        """
+        Flushes what is queued, then stops the writer. Anything left after the timeout is spilled.
+        """
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        leftover = []
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if leftover:
+            self._spill(leftover)
+
+
+event_queue = CRMEventQueue(ShoeCRM._get_client)
+
+
+def get_crm_metrics() -> dict:
+    return {**event_queue.metrics, "queued": event_queue._queue.qsize()}
@@ -0,0 +1,265 @@
+import re
+import json
+import asyncio
+import datetime
+
+# Typed copies of the fields dashboards filter and group on, extracted from event_data at write time
+TYPED_COLUMNS = [("product_name", "TEXT"), ("mood", "TEXT"), ("price", "REAL"), ("budget_band", "TEXT")]
+
+ANALYTICS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS crm_rollups (
+        granularity TEXT,
+        bucket TEXT,
+        event_type TEXT,
+        dimension TEXT,
+        value TEXT,
+        count INTEGER NOT NULL DEFAULT 0,
+        price_sum REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (granularity, bucket, event_type, dimension, value)
+    )
+    """,
+    "CREATE TABLE IF NOT EXISTS crm_analytics_state (key TEXT PRIMARY KEY, value INTEGER)",
+    "CREATE INDEX IF NOT EXISTS idx_crm_events_type_time ON crm_events (event_type, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_crm_events_product ON crm_events (product_name, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_crm_events_mood ON crm_events (mood, timestamp)",
+]
+
+INSERT_COLUMNS = "(timestamp, event_type, event_data, user_message, bot_response, product_name, mood, price, budget_band)"
+UPSERT_ROLLUP = (
+    "INSERT INTO crm_rollups (granularity, bucket, event_type, dimension, value, count, price_sum) VALUES {values} "
+    "ON CONFLICT (granularity, bucket, event_type, dimension, value) DO UPDATE SET "
+    "count = count + excluded.count, price_sum = price_sum + excluded.price_sum"
+)
+# Bucket keys are prefixes of the ISO timestamp, so they sort and compare as text
+GRANULARITIES = {"hour": 13, "day": 10}
+# Upper bounds of the budget bands used for the search-failure breakdown
+BUDGET_BANDS = (100, 200, 300, 500)
+BACKFILL_CHUNK = 2000
+
+_budget_pattern = re.compile(r"RM\s*(-?\d+)\s*-\s*RM\s*(\d+)")
+
+
+def budget_band(budget_range) -> str:
+    """
+    Maps the logged "RM{min}-RM{max}" string to a coarse band on its upper bound.
+    """
+    match = _budget_pattern.search(budget_range or "")
+    if not match:
+        return "not specified"
+    upper = int(match.group(2))
+    lower_bound = 0
+    for bound in BUDGET_BANDS:
+        if upper <= bound:
+            return f"RM{lower_bound}-{bound}"
+        lower_bound = bound
+    return f"RM{BUDGET_BANDS[-1]}+"
+
+
+def typed_fields(event_type: str, event_data: dict) -> dict:
+    """
+    Pulls product, mood, price and budget out of the different event payloads the chatbot logs.
+    """
+    mood = event_data.get("user_mood") or event_data.get("final_mood") or event_data.get("mood")
+    if isinstance(mood, dict):
+        mood = mood.get("emotion")
+    price = event_data.get("price")
+    return {
+        "product_name": event_data.get("product_name") or event_data.get("product_recommended") or event_data.get("context_product"),
+        "mood": mood if isinstance(mood, str) else None,
+        "price": float(price) if isinstance(price, (int, float)) else None,
+        "budget_band": budget_band(event_data["budget_range"]) if "budget_range" in event_data else None,
+    }
+
+
+def rollup_values(events) -> list:
+    """
+    Aggregates (timestamp, event_type, typed fields) into rollup increments, one per key.
+    """
+    increments = {}
+    for timestamp, event_type, fields in events:
+        dimensions = [("all", "")] + [
+            (dimension, fields[column]) for dimension, column in
+            (("product", "product_name"), ("mood", "mood"), ("budget", "budget_band")) if fields[column]
+        ]
+        for granularity, length in GRANULARITIES.items():
+            for dimension, value in dimensions:
+                key = (granularity, timestamp[:length], event_type, dimension, value)
+                count, price_sum = increments.get(key, (0, 0.0))
+                increments[key] = (count + 1, price_sum + (fields["price"] or 0.0))
+    return [key + value for key, value in increments.items()]
+
+
+def _rollup_statement(values: list):
+    placeholders = ", ".join(["(?, ?, ?, ?, ?, ?, ?)"] * len(values))
+    return UPSERT_ROLLUP.format(values=placeholders), [item for row in values for item in row]
+
+
+def write_statements(rows: list) -> list:
+    """
+    One multi-row insert with the typed columns plus one multi-row rollup upsert,
+    meant to run together in a single client.batch() transaction.
+    """
+    events, insert_args = [], []
+    for timestamp, event_type, event_data, user_message, bot_response in rows:
+        try:
+            fields = typed_fields(event_type, json.loads(event_data))
+        except (json.JSONDecodeError, TypeError, AttributeError):
+            fields = typed_fields(event_type, {})
+        events.append((timestamp, event_type, fields))
+        insert_args += [timestamp, event_type, event_data, user_message, bot_response,
+                        fields["product_name"], fields["mood"], fields["price"], fields["budget_band"]]
+    placeholders = ", ".join(["(?, ?, ?, ?, ?, ?, ?, ?, ?)"] * len(rows))
+    return [
+        (f"INSERT INTO crm_events {INSERT_COLUMNS} VALUES {placeholders}", insert_args),
+        _rollup_statement(rollup_values(events)),
+    ]
+
+
+async def ensure_analytics_schema(client):
+    """
+    Adds the typed columns, indexes and rollup tables to an existing crm_events table.
+    Rows already there when the columns are first added are left for backfill().
+    """
+    existing = {row[1] for row in (await client.execute("PRAGMA table_info(crm_events)")).rows}
+    statements = [f"ALTER TABLE crm_events ADD COLUMN {name} {column_type}"
+                  for name, column_type in TYPED_COLUMNS if name not in existing]
+    statements += ANALYTICS_SCHEMA
+    statements += [
+        "INSERT OR IGNORE INTO crm_analytics_state (key, value) SELECT 'legacy_max_id', COALESCE(MAX(id), 0) FROM crm_events",
+        "INSERT OR IGNORE INTO crm_analytics_state (key, value) VALUES ('backfilled_through', 0)",
+    ]
+    await client.batch(statements)
+
+
+async def backfill(client=None, chunk_size: int = BACKFILL_CHUNK) -> int:
+    """
+    Fills the typed columns and rollups for events logged before the analytics
+    schema existed, in resumable chunks. Returns the number of events processed.
+    """
+    client, owned = await _client(client)
+    processed = 0
+    try:
+        await ensure_analytics_schema(client)
+        while True:
+            state = dict(tuple(row) for row in (await client.execute("SELECT key, value FROM crm_analytics_state")).rows)
+            rows = (await client.execute(
+                "SELECT id, timestamp, event_type, event_data FROM crm_events WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+                (state["backfilled_through"], state["legacy_max_id"], chunk_size)
+            )).rows
+            if not rows:
+                return processed
+            statements, events = [], []
+            for event_id, timestamp, event_type, event_data in rows:
+                try:
+                    fields = typed_fields(event_type, json.loads(event_data))
+                except (json.JSONDecodeError, TypeError, AttributeError):
+                    fields = typed_fields(event_type, {})
+                events.append((timestamp, event_type, fields))
+                statements.append((
+                    "UPDATE crm_events SET product_name = ?, mood = ?, price = ?, budget_band = ? WHERE id = ?",
+                    (fields["product_name"], fields["mood"], fields["price"], fields["budget_band"], event_id)
+                ))
+            statements.append(_rollup_statement(rollup_values(events)))
+            statements.append(("UPDATE crm_analytics_state SET value = ? WHERE key = 'backfilled_through'", (rows[-1][0],)))
+            await client.batch(statements)
+            processed += len(rows)
+            print(f"[INFO] Backfilled {processed} CRM events (through id {rows[-1][0]}).")
+    finally:
+        if owned:
+            await client.close()
+
+
+# --- Query API (reads only the rollups) ---
+
+async def _client(client):
+    if client is not None:
+        return client, False
+    from crm import ShoeCRM
+    return ShoeCRM._get_client(), True
+
+
+def _since(granularity: str, days: float = 0, hours: float = 0) -> str:
+    start = datetime.datetime.now() - datetime.timedelta(days=days, hours=hours)
+    return start.isoformat()[:GRANULARITIES[granularity]]
+
+
+async def _query(sql: str, args: tuple, client=None) -> list:
+    client, owned = await _client(client)
+    try:
+        return [tuple(row) for row in (await client.execute(sql, args)).rows]
+    finally:
+        if owned:
+            await client.close()
+
+
+async def top_products(days: int = 7, limit: int = 10, event_type: str = "Product Recommended", client=None) -> list:
+    """
+    [(product, count, average price)] for the last `days` days.
+    """
+    rows = await _query(
+        "SELECT value, SUM(count), SUM(price_sum) FROM crm_rollups "
+        "WHERE granularity = 'day' AND bucket >= ? AND event_type = ? AND dimension = 'product' "
+        "GROUP BY value ORDER BY SUM(count) DESC LIMIT ?",
+        (_since("day", days), event_type, limit), client
+    )
+    return [(product, count, price_sum / count if count else 0.0) for product, count, price_sum in rows]
+
+
+async def dimension_counts(dimension: str, event_type: str, days: int = 7, client=None) -> dict:
+    rows = await _query(
+        "SELECT value, SUM(count) FROM crm_rollups "
+        "WHERE granularity = 'day' AND bucket >= ? AND event_type = ? AND dimension = ? GROUP BY value",
+        (_since("day", days), event_type, dimension), client
+    )
+    return dict(rows)
+
+
+async def mood_distribution(days: int = 7, client=None) -> dict:
+    return await dimension_counts("mood", "User Context Analysis", days, client)
+
+
+async def search_failure_rate_by_budget(days: int = 7, client=None) -> dict:
+    """
+    {budget band: (failed searches, recommended, failure rate)}.
+    """
+    failed, recommended = await asyncio.gather(
+        dimension_counts("budget", "Search Failed", days, client),
+        dimension_counts("budget", "Product Recommended", days, client)
+    )
+    rates = {}
+    for band in sorted(set(failed) | set(recommended)):
+        total = failed.get(band, 0) + recommended.get(band, 0)
+        rates[band] = (failed.get(band, 0), recommended.get(band, 0), failed.get(band, 0) / total if total else 0.0)
+    return rates
+
+
+async def event_timeline(hours: int = 24, client=None) -> list:
+    """
+    [(hour bucket, event type, count)] for the last `hours` hours.
+    """
+    return await _query(
+        "SELECT bucket, event_type, count FROM crm_rollups "
+        "WHERE granularity = 'hour' AND bucket >= ? AND dimension = 'all' ORDER BY bucket",
+        (_since("hour", hours=hours),), client
+    )
+
+
+async def event_totals(days: int = 7, client=None) -> dict:
+    rows = await _query(
+        "SELECT event_type, SUM(count) FROM crm_rollups "
+        "WHERE granularity = 'day' AND bucket >= ? AND dimension = 'all' GROUP BY event_type",
+        (_since("day", days),), client
+    )
+    return dict(rows)
+
+
+if __name__ == "__main__":
+    async def main():
+        processed = await backfill()
+        print(f"Backfill complete: {processed} events")
+        print("Event totals (7 days):", await event_totals())
+        print("Top products (7 days):", await top_products())
+        print("Search failure rate by budget:", await search_failure_rate_by_budget())
+
+    asyncio.run(main())
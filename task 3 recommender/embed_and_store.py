@@ -1,11 +1,27 @@
 import os
 import time
 import json
+import queue
+import argparse
+import threading
+from itertools import islice
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pinecone import Pinecone, ServerlessSpec
 from dotenv import load_dotenv
 from sentence_transformers import SentenceTransformer
 
 from data_parser import get_product_data, create_embedding_text
+from slot_extractor import product_facets
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+BULK_BATCH_SIZE = 64
+UPSERT_BATCH_SIZE = 100
+UPLOAD_THREADS = 8
+# Encoded batches waiting for upload; when full, encoding pauses (backpressure)
+UPLOAD_QUEUE_SIZE = 32
+UPSERT_RETRIES = 3
+PROGRESS_INTERVAL_S = 5.0
 
 def setup_pinecone():
     """
@@ -41,10 +57,29 @@ def create_pinecone_index(pc: Pinecone, index_name: str):
     else:
         print(f"Index '{index_name}' already exists. Skipping creation.")
 
-def embed_and_upsert_data(pc: Pinecone, index_name: str):
+def product_metadata(product: dict) -> dict:
+    """
+    Pinecone metadata for a product (no null values allowed)
     """
-    Embeds product data and upserts it into the Pinecone index
+    return {
+        "name": product.get("name"),
+        "price": product.get("price"),
+        "original_price": product.get("original_price") or 0,
+        "discount_label": product.get("discount_label") or "",
+        "category": product.get("category"),
+        "url": product.get("url"),
+        "description": product.get("description"),
+        "features": json.dumps(product.get("features", {})),
+        **product_facets(product)
+    }
+
+def embed_and_upsert_data(pc: Pinecone, index_name: str, db_path: str = None):
     """
+    Embeds product data and upserts it into the Pinecone index. Each batch is recorded
+    in the catalog manifest and the catalog version is bumped, like catalog_ingest.py
+    """
+    from catalog_ingest import CatalogManifest, MANIFEST_PATH, manifest_entry
+
     print("Loading sentence transformer model 'all-MiniLM-L6-v2'...")
     model = SentenceTransformer('all-MiniLM-L6-v2')
 
@@ -53,48 +88,193 @@ def embed_and_upsert_data(pc: Pinecone, index_name: str):
 
     print(f"Preparing {len(products)} products for embedding...")
     index = pc.Index(index_name)
+    manifest = CatalogManifest(db_path or MANIFEST_PATH)
+    run = manifest.start_run()
 
     batch_size = 32
-    for i in range(0, len(products), batch_size):
-        batch = products[i:i + batch_size]
-
-        texts_to_embed = [create_embedding_text(p) for p in batch]
-
-        print(f"Embedding batch {i//batch_size + 1}...")
-        embeddings = model.encode(texts_to_embed).tolist()
-
-        vectors_to_upsert = []
-        for product, embedding in zip(batch, embeddings):
-            metadata = {
-                "name": product.get("name"),
-                "price": product.get("price"),
-                "original_price": product.get("original_price") or 0,
-                "discount_label": product.get("discount_label") or "",
-                "category": product.get("category"),
-                "url": product.get("url"),
-                "description": product.get("description"),
-                "features": json.dumps(product.get("features", {}))
-            }
-            vectors_to_upsert.append({
-                "id": product["id"],
-                "values": embedding,
-                "metadata": metadata
-            })
-
-        print(f"Upserting batch {i//batch_size + 1} to Pinecone...")
-        index.upsert(vectors=vectors_to_upsert)
+    try:
+        for i in range(0, len(products), batch_size):
+            batch = products[i:i + batch_size]
+
+            texts_to_embed = [create_embedding_text(p) for p in batch]
+
+            print(f"Embedding batch {i//batch_size + 1}...")
+            embeddings = model.encode(texts_to_embed).tolist()
+
+            vectors_to_upsert = []
+            for product, embedding in zip(batch, embeddings):
+                vectors_to_upsert.append({
+                    "id": product["id"],
+                    "values": embedding,
+                    "metadata": product_metadata(product)
+                })
+
+            print(f"Upserting batch {i//batch_size + 1} to Pinecone...")
+            index.upsert(vectors=vectors_to_upsert)
+            manifest.record([manifest_entry(p) for p in batch], run)
+    finally:
+        # Bumped even if a batch failed, since earlier batches are already in the index
+        manifest.bump_version()
+        manifest.close()
 
     print("\n✓ All products have been successfully embedded and stored in Pinecone!")
     stats = index.describe_index_stats()
     print(f"Total vectors in index: {stats['total_vector_count']}")
 
 
+# --- Bulk indexing: multi-process encoding feeding concurrent uploads ---
+
+_worker_model = None
+
+
+def _init_encoder(model_name: str, threads_per_worker: int):
+    """
+    Loads one model per worker process, with torch limited to its share of the cores.
+    """
+    global _worker_model
+    import torch
+    torch.set_num_threads(threads_per_worker)
+    _worker_model = SentenceTransformer(model_name)
+
+
+def _encode_batch(texts: list) -> list:
+    return _worker_model.encode(texts, batch_size=len(texts)).tolist()
+
+
+def _upload_worker(index, uploads: queue.Queue, progress: dict, lock: threading.Lock, uploaded: queue.SimpleQueue):
+    """
+    Upserts (vectors, manifest entries) batches from the queue until it receives None,
+    retrying with backoff. The entries of batches that made it are put on `uploaded`.
+    """
+    while True:
+        item = uploads.get()
+        if item is None:
+            return
+        vectors, entries = item
+        for attempt in range(UPSERT_RETRIES + 1):
+            try:
+                index.upsert(vectors=vectors)
+                with lock:
+                    progress["uploaded"] += len(vectors)
+                uploaded.put(entries)
+                break
+            except Exception as e:
+                if attempt == UPSERT_RETRIES:
+                    print(f"[ERROR] Upsert of {len(vectors)} vectors failed after {attempt + 1} attempts: {e}")
+                    with lock:
+                        progress["failed"] += len(vectors)
+                else:
+                    time.sleep(0.5 * 2 ** attempt)
+
+
+def bulk_embed_and_upsert(index, products, workers: int = None, batch_size: int = BULK_BATCH_SIZE,
+                          upload_threads: int = UPLOAD_THREADS, queue_size: int = UPLOAD_QUEUE_SIZE,
+                          model_name: str = MODEL_NAME, db_path: str = None, source: str = None) -> dict:
+    """
+    Re-indexes a (possibly streamed) catalog. Batches are encoded in a process pool
+    with at most two batches per worker in flight; finished batches go through a
+    bounded queue to `upload_threads` threads that upsert concurrently, so CPU and
+    network work overlap. Uploaded products are recorded in the catalog manifest and
+    the catalog version is bumped, so a later catalog_ingest.py run only re-embeds
+    what changed. `source` is the file `products` were read from (None for the
+    built-in catalog), recorded so the local index rebuilds from the same catalog.
+    Returns the throughput report.
+    """
+    from catalog_ingest import CatalogManifest, MANIFEST_PATH, content_hash, metadata_hash
+
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+    uploads = queue.Queue(maxsize=queue_size)
+    uploaded = queue.SimpleQueue()
+    progress = {"encoded": 0, "uploaded": 0, "failed": 0}
+    lock = threading.Lock()
+    uploaders = [threading.Thread(target=_upload_worker, args=(index, uploads, progress, lock, uploaded), daemon=True)
+                 for _ in range(upload_threads)]
+    for uploader in uploaders:
+        uploader.start()
+    manifest = CatalogManifest(db_path or MANIFEST_PATH)
+    run = manifest.start_run()
+
+    started = last_report = time.perf_counter()
+
+    def record_uploaded():
+        # The manifest's SQLite connection belongs to this thread, so uploaders only hand entries back
+        entries = []
+        while not uploaded.empty():
+            entries.extend(uploaded.get())
+        if entries:
+            manifest.record(entries, run)
+
+    def collect(batch, future):
+        vectors, entries = [], []
+        for product, embedding in zip(batch, future.result()):
+            metadata = product_metadata(product)
+            vectors.append({"id": product["id"], "values": embedding, "metadata": metadata})
+            entries.append((product["id"], content_hash(product), metadata_hash(metadata)))
+        for i in range(0, len(vectors), UPSERT_BATCH_SIZE):
+            # Blocks while the uploaders catch up
+            uploads.put((vectors[i:i + UPSERT_BATCH_SIZE], entries[i:i + UPSERT_BATCH_SIZE]))
+        progress["encoded"] += len(vectors)
+        record_uploaded()
+
+    print(f"[INFO] Bulk indexing with {workers} encoder processes, {upload_threads} upload threads, batch size {batch_size}")
+    try:
+        with ProcessPoolExecutor(workers, initializer=_init_encoder, initargs=(model_name, threads_per_worker)) as pool:
+            pending = deque()
+            iterator = iter(products)
+            while batch := list(islice(iterator, batch_size)):
+                pending.append((batch, pool.submit(_encode_batch, [create_embedding_text(p) for p in batch])))
+                if len(pending) >= 2 * workers:
+                    collect(*pending.popleft())
+                if time.perf_counter() - last_report >= PROGRESS_INTERVAL_S:
+                    last_report = time.perf_counter()
+                    elapsed = last_report - started
+                    print(f"[INFO] {progress['encoded']:,} encoded, {progress['uploaded']:,} uploaded "
+                          f"({progress['uploaded'] / elapsed:,.0f} products/s)")
+            while pending:
+                collect(*pending.popleft())
+    finally:
+        for _ in uploaders:
+            uploads.put(None)
+        for uploader in uploaders:
+            uploader.join()
+        record_uploaded()
+        version = manifest.bump_version(source) if progress["uploaded"] else manifest.version
+        manifest.close()
+
+    elapsed = time.perf_counter() - started
+    report = {**progress, "version": version, "seconds": elapsed,
+              "products_per_second": progress["uploaded"] / elapsed if elapsed else 0.0}
+    print(f"\n✓ Bulk indexing finished: {report['uploaded']:,} products in {elapsed:.1f}s "
+          f"({report['products_per_second']:,.0f} products/s), {report['failed']:,} failed")
+    return report
+
+
 if __name__ == "__main__":
     INDEX_NAME = "shoe-recommender-index"
 
+    parser = argparse.ArgumentParser(description="Embed the product catalog and store it in Pinecone.")
+    parser.add_argument("--bulk", action="store_true", help="multi-process encoding with concurrent uploads")
+    parser.add_argument("--source", help="catalog .jsonl or .csv for --bulk (default: built-in catalog)")
+    parser.add_argument("--workers", type=int, help="encoder processes (default: CPU count - 1)")
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE)
+    parser.add_argument("--upload-threads", type=int, default=UPLOAD_THREADS)
+    args = parser.parse_args()
+
     try:
         pinecone_client = setup_pinecone()
         create_pinecone_index(pinecone_client, INDEX_NAME)
-        embed_and_upsert_data(pinecone_client, INDEX_NAME)
+        if args.bulk:
+            from catalog_ingest import iter_products
+            bulk_embed_and_upsert(
+                pinecone_client.Index(INDEX_NAME, pool_threads=args.upload_threads),
+                iter_products(args.source),
+                workers=args.workers,
+                batch_size=args.batch_size,
+                upload_threads=args.upload_threads,
+                source=args.source
+            )
+        else:
+            embed_and_upsert_data(pinecone_client, INDEX_NAME)
     except Exception as e:
         print(f"An error occurred: {e}")
\ No newline at end of file
@@ -0,0 +1,282 @@
+import os
+import re
+import glob
+import gzip
+import json
+import time
+import atexit
+import shutil
+import datetime
+import threading
+from collections import Counter
+
+EVENT_LOG_PATH = "crm_log.txt"
+BUFFER_LINES = 64
+FLUSH_INTERVAL_S = 1.0
+MAX_BYTES = 50 * 1024 * 1024
+MAX_AGE_S = 24 * 3600
+KEEP_ROTATED = 30
+READ_BUFFER_BYTES = 1024 * 1024
+
+FUNNEL_STAGES = ["User Context Analysis", "Product Recommended", "User Follow-up Question", "Conversation Ended"]
+
+# Fields the funnel reader needs, matched on the raw line so most lines are never JSON-decoded
+_event_pattern = re.compile(rb'"event":\s*"((?:[^"\\]|\\.)*)"')
+_day_pattern = re.compile(rb'"timestamp":\s*"(\d{4}-\d{2}-\d{2})')
+
+
+def format_event(timestamp: str, event_type: str, event_data_json: str, user_message: str = None, bot_response: str = None) -> str:
+    """
+    One crm_log.txt line. event_data is passed already serialised so it is not encoded twice.
+    """
+    line = f'{{"timestamp": {json.dumps(timestamp)}, "event": {json.dumps(event_type)}, "data": {event_data_json}'
+    if user_message is not None:
+        line += f', "user_message": {json.dumps(user_message)}'
+    if bot_response is not None:
+        line += f', "bot_response": {json.dumps(bot_response)}'
+    return line + "}\n"
+
+
+class EventSink:
+    """
+    Append-only JSONL event log in the crm_log.txt format. Lines are buffered in
+    memory and written in batches (when the buffer fills, or every FLUSH_INTERVAL_S
+    from a daemon thread). The active file is rotated by size or age to a
+    timestamped name and gzipped in the background; only the newest
+    `keep_rotated` rotated files are kept.
+    """
+
+    def __init__(self, path: str = EVENT_LOG_PATH, buffer_lines: int = BUFFER_LINES, max_bytes: int = MAX_BYTES,
+                 max_age_s: float = MAX_AGE_S, keep_rotated: int = KEEP_ROTATED, compress: bool = True):
+        self.path = path
+        self.buffer_lines = buffer_lines
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.keep_rotated = keep_rotated
+        self.compress = compress
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._started_at = self._first_timestamp()
+        self._flusher = None
+        self.metrics = {"written": 0, "flushes": 0, "rotations": 0}
+
+    def _first_timestamp(self) -> float:
+        """
+        Age of the active file is measured from its first event.
+        """
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                first = json.loads(f.readline())
+            return datetime.datetime.fromisoformat(first["timestamp"]).timestamp()
+        except (OSError, ValueError, KeyError, TypeError):
+            return time.time()
+
+    def _start_flusher(self):
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_periodically, name="event-sink-flusher", daemon=True)
+            self._flusher.start()
+            atexit.register(self.flush)
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL_S)
+            self.flush()
+
+    def write_row(self, row: tuple):
+        """
+        Buffers one (timestamp, event_type, event_data_json, user_message, bot_response) row.
+        """
+        self.write_lines([format_event(*row)])
+
+    def write_rows(self, rows: list):
+        self.write_lines([format_event(*row) for row in rows])
+
+    def write_lines(self, lines: list):
+        with self._lock:
+            self._start_flusher()
+            self._buffer.extend(lines)
+            if len(self._buffer) >= self.buffer_lines:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        if self._should_rotate():
+            self._rotate()
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(self._buffer)
+        except OSError as e:
+            print(f"[WARN] Could not write {len(self._buffer)} events to {self.path}: {e}")
+            return
+        self.metrics["written"] += len(self._buffer)
+        self.metrics["flushes"] += 1
+        self._buffer = []
+
+    def _should_rotate(self) -> bool:
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return False
+        return size > 0 and (size >= self.max_bytes or time.time() - self._started_at >= self.max_age_s)
+
+    def _rotate(self):
+        base, extension = os.path.splitext(self.path)
+        rotated = f"{base}.{datetime.datetime.now().strftime('%Y%m%dT%H%M%S%f')}{extension}"
+        os.replace(self.path, rotated)
+        self._started_at = time.time()
+        self.metrics["rotations"] += 1
+        print(f"[INFO] Rotated {self.path} to {rotated}")
+        if self.compress:
+            threading.Thread(target=self._compress, args=(rotated,), daemon=True).start()
+        else:
+            self._prune()
+
+    def _compress(self, path: str):
+        # Written under a name readers never list, then renamed into place whole
+        temporary = path + ".gz.tmp"
+        try:
+            with open(path, "rb") as source, gzip.open(temporary, "wb") as target:
+                shutil.copyfileobj(source, target, READ_BUFFER_BYTES)
+            os.replace(temporary, path + ".gz")
+            os.remove(path)
+        except OSError as e:
+            print(f"[WARN] Could not compress {path}: {e}")
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+        self._prune()
+
+    def _prune(self):
+        for path in rotated_files(self.path)[:-self.keep_rotated or None]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def rotated_files(path: str = EVENT_LOG_PATH) -> list:
+    """
+    Rotated logs for `path`, oldest first (the timestamped names sort chronologically).
+    """
+    base, extension = os.path.splitext(path)
+    plain = glob.glob(f"{glob.escape(base)}.*{extension}")
+    # While a file is being compressed both copies exist; the uncompressed one is read
+    compressed = [name for name in glob.glob(f"{glob.escape(base)}.*{extension}.gz") if name[:-3] not in plain]
+    return sorted(plain + compressed, key=lambda name: name[len(base):].removesuffix(".gz"))
+
+
+def log_files(path: str = EVENT_LOG_PATH) -> list:
+    return rotated_files(path) + ([path] if os.path.exists(path) else [])
+
+
+def _open(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb", buffering=READ_BUFFER_BYTES)
+
+
+def iter_lines(path: str = EVENT_LOG_PATH):
+    """
+    Raw lines from every rotated and active log file, oldest first.
+    """
+    for file_path in log_files(path):
+        try:
+            f = _open(file_path)
+        except FileNotFoundError:
+            # Compressed (or pruned) since it was listed
+            if file_path.endswith(".gz") or not os.path.exists(file_path + ".gz"):
+                continue
+            f = _open(file_path + ".gz")
+        with f:
+            yield from f
+
+
+def iter_events(path: str = EVENT_LOG_PATH):
+    """
+    Parsed events from every rotated and active log file, oldest first. Bad lines are skipped.
+    """
+    for line in iter_lines(path):
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            continue
+
+
+def funnel_metrics(path: str = EVENT_LOG_PATH, top: int = 10) -> dict:
+    """
+    Streams the logs once in constant memory. Only the event name and day are read
+    from most lines; just the recommendation lines are decoded, for product counts.
+    """
+    counts = Counter()
+    per_day = Counter()
+    products = Counter()
+    lines = 0
+    for line in iter_lines(path):
+        match = _event_pattern.search(line)
+        if not match:
+            continue
+        lines += 1
+        event = match.group(1).decode("utf-8")
+        counts[event] += 1
+        day = _day_pattern.search(line)
+        if day:
+            per_day[(day.group(1).decode(), event)] += 1
+        if event == "Product Recommended":
+            try:
+                products[json.loads(line)["data"].get("product_name")] += 1
+            except (json.JSONDecodeError, KeyError, AttributeError):
+                pass
+
+    searches = counts["Product Recommended"] + counts["Search Failed"]
+    return {
+        "events": lines,
+        "counts": dict(counts),
+        "funnel": [(stage, counts[stage]) for stage in FUNNEL_STAGES],
+        "recommendation_rate": counts["Product Recommended"] / searches if searches else 0.0,
+        "search_failure_rate": counts["Search Failed"] / searches if searches else 0.0,
+        "follow_up_rate": counts["User Follow-up Question"] / counts["Product Recommended"] if counts["Product Recommended"] else 0.0,
+        "top_products": products.most_common(top),
+        "per_day": {f"{day} {event}": count for (day, event), count in sorted(per_day.items())},
+    }
+
+
+event_sink = EventSink(EVENT_LOG_PATH)
+spill_sink = EventSink("crm_spill.jsonl")
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    if len(sys.argv) > 1:
+        print(json.dumps(funnel_metrics(sys.argv[1]), indent=2))
+        sys.exit()
+
+    # Benchmark: write a synthetic log with rotation, then stream it back
+    events = ["User Context Analysis", "Product Recommended", "Search Failed", "User Follow-up Question", "Conversation Ended"]
+    with tempfile.TemporaryDirectory() as directory:
+        sink = EventSink(os.path.join(directory, "crm_log.txt"), buffer_lines=1024, max_bytes=8 * 1024 * 1024)
+        total = 500_000
+        started = time.perf_counter()
+        for i in range(total):
+            event = events[i % len(events)]
+            data = {"product_name": f"SHOE {i % 50}", "price": 199.0} if event == "Product Recommended" else {"user_mood": "casual"}
+            sink.write_row((datetime.datetime.now().isoformat(), event, json.dumps(data), "hello bro", None))
+        sink.flush()
+        written_s = time.perf_counter() - started
+        time.sleep(1)  # let background compression finish
+        files = log_files(sink.path)
+        size = sum(os.path.getsize(f) for f in files)
+        print(f"Wrote {total:,} events in {written_s:.2f}s ({total / written_s:,.0f}/s); "
+              f"{len(files)} files, {size / 1e6:.1f} MB on disk after compression")
+
+        started = time.perf_counter()
+        metrics = funnel_metrics(sink.path)
+        read_s = time.perf_counter() - started
+        print(f"Funnel over {metrics['events']:,} events in {read_s:.2f}s ({metrics['events'] / read_s:,.0f}/s)")
+        print("Funnel:", metrics["funnel"])
+        print(f"Recommendation rate: {metrics['recommendation_rate']:.0%}, follow-up rate: {metrics['follow_up_rate']:.0%}")
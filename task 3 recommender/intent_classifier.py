@@ -0,0 +1,248 @@
+import json
+import time
+import numpy as np
+
+from event_sink import EVENT_LOG_PATH, iter_events
+
+CONFIDENCE_THRESHOLD = 0.6
+# Softmax temperature over cosine similarities to the class centroids
+TEMPERATURE = 0.05
+# How much the previous turns pull the intent features (a reply depends on what Bob just said)
+CONTEXT_WEIGHT = 0.35
+CONTEXT_TURNS = 2
+HISTORY_LIMIT = 2000
+
+MOOD_HEADS = ("emotion", "stress_level", "urgency")
+DEFAULT_MOOD = {"emotion": "casual", "stress_level": "medium", "urgency": "browsing"}
+
+# Hand-labelled seed examples: (message, labels)
+SEED_EXAMPLES = [
+    ("hello bro, got kid shoes for running ah?", {"intent": "SEARCH", "emotion": "casual", "stress_level": "low", "urgency": "browsing"}),
+    ("can recommend a women running shoe ah? also got any discounts?", {"intent": "SEARCH", "emotion": "budget-conscious", "stress_level": "low", "urgency": "considering"}),
+    ("I need running shoes for my marathon next week, urgent!", {"intent": "SEARCH", "emotion": "urgent", "stress_level": "high", "urgency": "ready-to-buy"}),
+    ("looking for something comfy to walk around all day", {"intent": "SEARCH", "emotion": "casual", "stress_level": "low", "urgency": "browsing"}),
+    ("any shoes under RM200? money tight this month", {"intent": "SEARCH", "emotion": "budget-conscious", "stress_level": "medium", "urgency": "considering"}),
+    ("so excited, just signed up for my first 10k! what shoes should I get?", {"intent": "SEARCH", "emotion": "excited", "stress_level": "low", "urgency": "considering"}),
+    ("my feet hurt so much after work, need something with cushioning pls", {"intent": "SEARCH", "emotion": "stressed", "stress_level": "high", "urgency": "ready-to-buy"}),
+    ("show me casual sneakers for men", {"intent": "SEARCH", "emotion": "casual", "stress_level": "low", "urgency": "browsing"}),
+    ("actually do you have something for my son instead?", {"intent": "SEARCH", "emotion": "indecisive", "stress_level": "medium", "urgency": "considering"}),
+    ("I keep buying the wrong shoes, nothing fits, help me find one that works", {"intent": "SEARCH", "emotion": "frustrated", "stress_level": "high", "urgency": "ready-to-buy"}),
+    ("got any asics for women?", {"intent": "SEARCH", "emotion": "casual", "stress_level": "low", "urgency": "browsing"}),
+    ("need new trainers asap, gym tomorrow", {"intent": "SEARCH", "emotion": "urgent", "stress_level": "medium", "urgency": "ready-to-buy"}),
+    ("is this shoe on discount or is this the original price?", {"intent": "REPLY", "emotion": "budget-conscious", "stress_level": "low", "urgency": "considering"}),
+    ("sure, share the link!", {"intent": "REPLY", "emotion": "happy", "stress_level": "low", "urgency": "ready-to-buy"}),
+    ("ok I'll take it, how do I order?", {"intent": "REPLY", "emotion": "happy", "stress_level": "low", "urgency": "ready-to-buy"}),
+    ("does it come in bigger sizes?", {"intent": "REPLY", "emotion": "casual", "stress_level": "low", "urgency": "considering"}),
+    ("hmm not sure leh, is it really worth the price?", {"intent": "REPLY", "emotion": "indecisive", "stress_level": "medium", "urgency": "considering"}),
+    ("wah nice! that one looks so good", {"intent": "REPLY", "emotion": "excited", "stress_level": "low", "urgency": "considering"}),
+    ("how long is the delivery?", {"intent": "REPLY", "emotion": "casual", "stress_level": "low", "urgency": "ready-to-buy"}),
+    ("thanks bro", {"intent": "REPLY", "emotion": "happy", "stress_level": "low", "urgency": "browsing"}),
+    ("can I return it if it doesn't fit?", {"intent": "REPLY", "emotion": "indecisive", "stress_level": "medium", "urgency": "considering"}),
+    ("why so expensive one? this is ridiculous", {"intent": "REPLY", "emotion": "frustrated", "stress_level": "high", "urgency": "browsing"}),
+    ("ok tq, bye", {"intent": "REPLY", "emotion": "happy", "stress_level": "low", "urgency": "browsing"}),
+    ("is it good for flat feet?", {"intent": "REPLY", "emotion": "stressed", "stress_level": "medium", "urgency": "considering"}),
+]
+
+classifier_metrics = {"turns": 0, "mood_local": 0, "intent_local": 0, "total_predict_ms": 0.0}
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class TurnPrediction:
+    """
+    Labels with their softmax confidence for each head.
+    """
+
+    def __init__(self, labels: dict, confidences: dict, threshold: float = CONFIDENCE_THRESHOLD):
+        self.labels = labels
+        self.confidences = confidences
+        self.threshold = threshold
+
+    @property
+    def mood(self) -> dict:
+        return {head: self.labels.get(head, DEFAULT_MOOD[head]) for head in MOOD_HEADS}
+
+    @property
+    def intent(self) -> str:
+        return self.labels.get("intent", "SEARCH")
+
+    @property
+    def mood_confident(self) -> bool:
+        return all(self.confidences.get(head, 0) >= self.threshold for head in MOOD_HEADS)
+
+    @property
+    def intent_confident(self) -> bool:
+        return self.confidences.get("intent", 0) >= self.threshold
+
+
+class TurnClassifier:
+    """
+    Nearest-centroid classifier over MiniLM embeddings for the mood heads
+    (emotion, stress level, urgency) and the SEARCH/REPLY intent.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.centroids = {}  # head -> (labels, centroid matrix)
+
+    def _features(self, texts, contexts=None):
+        embeddings = _normalize(self.model.encode(list(texts), normalize_embeddings=True))
+        if contexts is None:
+            return embeddings, embeddings
+        context_embeddings = np.zeros_like(embeddings)
+        with_context = [i for i, context in enumerate(contexts) if context]
+        if with_context:
+            context_embeddings[with_context] = self.model.encode([contexts[i] for i in with_context], normalize_embeddings=True)
+        return embeddings, _normalize(embeddings + CONTEXT_WEIGHT * context_embeddings)
+
+    def fit(self, examples: list):
+        """
+        `examples` items: {"text", "context" (optional), "emotion", "stress_level", "urgency", "intent"};
+        any head may be missing. Each head gets one normalized centroid per label.
+        """
+        if not examples:
+            return self
+        message_features, intent_features = self._features(
+            [e["text"] for e in examples], [e.get("context", "") for e in examples]
+        )
+        for head in MOOD_HEADS + ("intent",):
+            features = intent_features if head == "intent" else message_features
+            rows = {}
+            for i, example in enumerate(examples):
+                label = example.get(head)
+                if label:
+                    rows.setdefault(label, []).append(i)
+            if len(rows) < 2:
+                continue
+            labels = sorted(rows)
+            centroids = np.vstack([features[rows[label]].mean(axis=0) for label in labels])
+            self.centroids[head] = (labels, _normalize(centroids))
+        return self
+
+    def predict(self, message: str, context: str = "", threshold: float = CONFIDENCE_THRESHOLD) -> TurnPrediction:
+        started = time.perf_counter()
+        message_features, intent_features = self._features([message], [context])
+        labels, confidences = {}, {}
+        for head, (head_labels, centroids) in self.centroids.items():
+            features = intent_features[0] if head == "intent" else message_features[0]
+            similarities = centroids @ features
+            weights = np.exp((similarities - similarities.max()) / TEMPERATURE)
+            probabilities = weights / weights.sum()
+            best = int(np.argmax(probabilities))
+            labels[head] = head_labels[best]
+            confidences[head] = float(probabilities[best])
+        classifier_metrics["total_predict_ms"] += (time.perf_counter() - started) * 1000
+        return TurnPrediction(labels, confidences, threshold)
+
+
+def context_from_history(chat_history: list, turns: int = CONTEXT_TURNS) -> str:
+    """
+    The messages before the last one, most recent last.
+    """
+    return " ".join(message["content"] for message in chat_history[-(turns + 1):-1])
+
+
+def example_from_event(event_type: str, data: dict, user_message: str):
+    """
+    The training example an LLM-labelled turn yields, or None. Turns this
+    classifier labelled itself (mood_source/intent_source "local") are skipped so
+    it never trains on its own output.
+    """
+    if not user_message:
+        return None
+    if event_type == "User Context Analysis" and isinstance(data.get("mood"), dict) and data.get("mood_source", "llm") == "llm":
+        mood = data["mood"]
+        return {"text": user_message, **{head: mood.get(head) for head in MOOD_HEADS}}
+    if event_type == "Chat Interaction Complete" and data.get("intent_source", "llm") == "llm":
+        return {"text": user_message, "intent": "SEARCH" if data.get("had_product_search") else "REPLY"}
+    return None
+
+
+def load_log_examples(path: str = EVENT_LOG_PATH) -> list:
+    """
+    Labels from the local JSONL event log (rotated files included). Current lines
+    carry the message as a top-level "user_message" and are labelled like the
+    CRM rows; legacy lines only have "user_query"/"question" in their data, where
+    recommendations follow searches and follow-ups are replies.
+    """
+    examples = []
+    for entry in iter_events(path):
+        event_type, data = entry.get("event"), entry.get("data") or {}
+        if entry.get("user_message"):
+            example = example_from_event(event_type, data, entry["user_message"])
+            if example:
+                examples.append(example)
+        elif event_type in ("Product Recommended", "Search Failed") and data.get("user_query"):
+            examples.append({"text": data["user_query"], "intent": "SEARCH"})
+        elif event_type == "User Follow-up Question" and data.get("question"):
+            examples.append({"text": data["question"], "intent": "REPLY"})
+    return examples
+
+
+async def load_crm_examples(limit: int = HISTORY_LIMIT) -> list:
+    """
+    Labels the LLM produced in earlier turns, read back from crm_events.
+    """
+    from crm import ShoeCRM
+
+    client = ShoeCRM._get_client()
+    try:
+        result = await client.execute(
+            "SELECT event_type, event_data, user_message FROM crm_events "
+            "WHERE event_type IN ('User Context Analysis', 'Chat Interaction Complete') AND user_message IS NOT NULL "
+            "ORDER BY id DESC LIMIT ?",
+            (limit,)
+        )
+    finally:
+        await client.close()
+
+    examples = []
+    for event_type, event_data, user_message in result.rows:
+        try:
+            data = json.loads(event_data)
+        except (json.JSONDecodeError, TypeError):
+            continue
+        example = example_from_event(event_type, data, user_message)
+        if example:
+            examples.append(example)
+    return examples
+
+
+_classifier = None
+
+
+async def get_classifier() -> TurnClassifier:
+    """
+    Process-wide classifier trained on the seed examples, the local event log
+    and (when the CRM is reachable) the LLM's historical labels.
+    """
+    global _classifier
+    if _classifier is None:
+        try:
+            from query_engine import get_retriever
+            model = get_retriever().model
+        except Exception:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer('all-MiniLM-L6-v2')
+
+        examples = [{"text": text, **labels} for text, labels in SEED_EXAMPLES] + load_log_examples()
+        try:
+            examples += await load_crm_examples()
+        except Exception as e:
+            print(f"[WARN] Could not load CRM history for the classifier: {e}")
+        _classifier = TurnClassifier(model).fit(examples)
+        print(f"[INFO] Turn classifier trained on {len(examples)} examples.")
+    return _classifier
+
+
+def get_classifier_metrics() -> dict:
+    turns = classifier_metrics["turns"]
+    return {
+        **classifier_metrics,
+        "mood_local_rate": classifier_metrics["mood_local"] / turns if turns else 0.0,
+        "intent_local_rate": classifier_metrics["intent_local"] / turns if turns else 0.0,
+        "avg_predict_ms": classifier_metrics["total_predict_ms"] / turns if turns else 0.0,
+    }
@@ -0,0 +1,291 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+
+from data_parser import create_embedding_text
+from query_engine import MODEL_NAME, print_results, structure_results
+from slot_extractor import product_facets
+from embed_and_store import product_metadata
+from catalog_ingest import (MANIFEST_PATH, catalog_hash, get_catalog_source, get_catalog_version, iter_products,
+                            on_catalog_change)
+
+LOCAL_INDEX_PATH = "product_index.npz"
+# Below this fraction of the catalog passing the filters, gather the rows first;
+# above it, one full matrix-vector product is cheaper than copying rows
+GATHER_SELECTIVITY = 0.25
+
+
+def load_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(MODEL_NAME)
+
+
+class LocalProductIndex:
+    """
+    In-process product index: a row-normalized float32 embedding matrix plus
+    columnar arrays for the filterable fields. Filters become boolean masks,
+    scoring is one matrix-vector product and top-k uses argpartition.
+    Results have the same shape as Pinecone's ({'matches': [{'id', 'score', 'metadata'}]}).
+    """
+
+    def __init__(self, embeddings, ids, metadata, model=None):
+        self.embeddings = np.array(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(self.embeddings, axis=1, keepdims=True)
+        self.embeddings /= np.where(norms == 0, 1, norms)
+        self.ids = np.asarray(ids, dtype=object)
+        self.metadata = metadata
+        self.price = np.array([m.get("price") or 0 for m in metadata], dtype=np.float32)
+        self.original_price = np.array([m.get("original_price") or 0 for m in metadata], dtype=np.float32)
+        self.on_sale = self.original_price > self.price
+        self.categories, self.category_codes = np.unique(
+            np.array([m.get("category") or "" for m in metadata], dtype=object).astype(str), return_inverse=True
+        )
+        # Older saved indexes lack the facet fields, so derive them from the stored metadata
+        facets = [{key: m.get(key, value) for key, value in product_facets(m).items()} for m in metadata]
+        self.facets = {key: np.array([f[key] for f in facets], dtype=object) for key in ("audience", "activity", "brand")}
+        self._model = model
+        # What the index was built from; a saved index is rebuilt when either changes
+        self.catalog_hash = None
+        self.catalog_version = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = load_model()
+        return self._model
+
+    @classmethod
+    def from_products(cls, products, model=None, batch_size: int = 256):
+        """
+        Embeds products with the same text and metadata layout as embed_and_store.py.
+        """
+        model = model or load_model()
+        texts = [create_embedding_text(p) for p in products]
+        embeddings = model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+        metadata = [product_metadata(product) for product in products]
+        index = cls(embeddings, [p["id"] for p in products], metadata, model)
+        index.catalog_hash = catalog_hash(products)
+        return index
+
+    def save(self, path: str = LOCAL_INDEX_PATH):
+        np.savez(path, embeddings=self.embeddings, ids=self.ids.astype(str),
+                 metadata=np.array([json.dumps(m) for m in self.metadata]),
+                 catalog_hash=np.array(self.catalog_hash or ""), catalog_version=np.array(self.catalog_version or 0))
+
+    @classmethod
+    def load(cls, path: str = LOCAL_INDEX_PATH, model=None):
+        data = np.load(path)
+        index = cls(data["embeddings"], list(data["ids"]), [json.loads(m) for m in data["metadata"]], model)
+        # Indexes saved before these fields existed load with None and are rebuilt
+        if "catalog_hash" in data.files:
+            index.catalog_hash = str(data["catalog_hash"]) or None
+            index.catalog_version = int(data["catalog_version"])
+        return index
+
+    def warm_up(self):
+        started = time.perf_counter()
+        self.search("running shoes", top_k=1)
+        print(f"[INFO] Local index warmed up in {time.perf_counter() - started:.2f}s.")
+
+    def filter_mask(self, budget_range: tuple = (None, None), categories=None, on_sale=None, filters: dict = None):
+        """
+        Vectorised predicates over the columnar fields. Returns None when nothing is filtered.
+        `filters` take the same facet equality filters as ProductRetriever.search().
+        """
+        mask = None
+
+        def combine(current, condition):
+            return condition if current is None else current & condition
+
+        if budget_range[0] is not None and budget_range[1] is not None:
+            mask = combine(mask, (self.price >= budget_range[0]) & (self.price <= budget_range[1]))
+        if categories:
+            wanted = np.flatnonzero(np.isin(self.categories, [categories] if isinstance(categories, str) else list(categories)))
+            mask = combine(mask, np.isin(self.category_codes, wanted))
+        for key, value in (filters or {}).items():
+            if key == "on_sale":
+                on_sale = value
+            else:
+                # Like Pinecone, an unknown field matches nothing
+                mask = combine(mask, self.facets[key] == value if key in self.facets else np.zeros(len(self.ids), dtype=bool))
+        if on_sale is not None:
+            mask = combine(mask, self.on_sale == on_sale)
+        return mask
+
+    def search_vector(self, vector, top_k: int = 3, budget_range: tuple = (None, None), categories=None, on_sale=None,
+                      filters: dict = None):
+        """
+        Returns (row indices, cosine scores) of the best matches, best first.
+        """
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1)
+        mask = self.filter_mask(budget_range, categories, on_sale, filters)
+
+        if mask is None:
+            rows = None
+            scores = self.embeddings @ query
+        else:
+            selected = np.flatnonzero(mask)
+            if len(selected) == 0:
+                return selected, np.zeros(0, dtype=np.float32)
+            if len(selected) < GATHER_SELECTIVITY * len(mask):
+                rows = selected
+                scores = self.embeddings[rows] @ query
+            else:
+                rows = None
+                scores = np.where(mask, self.embeddings @ query, -np.inf)
+
+        candidates = int(mask.sum()) if mask is not None and rows is None else len(scores)
+        k = min(top_k, candidates)
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        best = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        best = best[np.argsort(-scores[best])][:k]
+        return (rows[best] if rows is not None else best), scores[best]
+
+    def search(self, query_text: str, top_k: int = 3, budget_range: tuple = (None, None), verbose: bool = False,
+               filters: dict = None, categories=None, on_sale=None, query_vector=None):
+        """
+        Same interface and result shape as ProductRetriever.search().
+        """
+        if query_vector is None:
+            query_vector = self.model.encode(query_text)
+        rows, scores = self.search_vector(query_vector, top_k, budget_range, categories, on_sale, filters)
+        query_results = {"matches": [
+            {"id": str(self.ids[row]), "score": float(score), "metadata": self.metadata[row]}
+            for row, score in zip(rows, scores)
+        ]}
+        if verbose:
+            print(f"\nQuery: '{query_text}'")
+            print_results(query_results)
+        return query_results
+
+    def search_products(self, query_text: str, top_k: int = 3, budget_range: tuple = (None, None)) -> list:
+        return structure_results(self.search(query_text, top_k, budget_range))
+
+
+_local_index = None
+_local_index_lock = threading.Lock()
+# Set by the on_catalog_change hook (same process) or a manifest change (another process re-indexed)
+_local_index_stale = False
+_manifest_mtime = None
+
+
+def _manifest_changed() -> bool:
+    global _manifest_mtime
+    try:
+        mtime = os.stat(MANIFEST_PATH).st_mtime_ns
+    except OSError:
+        mtime = None
+    changed, _manifest_mtime = mtime != _manifest_mtime, mtime
+    return changed
+
+
+def _mark_stale(version: int):
+    global _local_index_stale
+    _local_index_stale = True
+
+
+def load_catalog_products() -> list:
+    """
+    The catalog the vector index was last built from: the source file recorded in the
+    manifest, or the built-in catalog when none was (or the file has since moved).
+    """
+    source = get_catalog_source()
+    if source and not os.path.exists(source):
+        print(f"[WARN] Indexed catalog {source} no longer exists, using the built-in catalog.")
+        source = None
+    return list(iter_products(source))
+
+
+def load_or_build_index(path: str = LOCAL_INDEX_PATH, products=None, model=None) -> LocalProductIndex:
+    """
+    Loads the saved index if it was built from the same catalog content and catalog
+    version, otherwise re-embeds the catalog and saves the result.
+    """
+    products = list(products) if products is not None else load_catalog_products()
+    expected_hash, version = catalog_hash(products), get_catalog_version()
+    if os.path.exists(path):
+        index = LocalProductIndex.load(path, model)
+        if index.catalog_hash == expected_hash and index.catalog_version == version:
+            return index
+        print("[INFO] Local product index is out of date with the catalog, rebuilding...")
+    else:
+        print("[INFO] Building local product index from the catalog...")
+    index = LocalProductIndex.from_products(products, model)
+    index.catalog_version = version
+    index.save(path)
+    return index
+
+
+def get_local_index(path: str = LOCAL_INDEX_PATH) -> LocalProductIndex:
+    """
+    Process-wide local index, loaded from disk or built from the indexed catalog on
+    first use and rebuilt after any indexing path bumps the catalog version. Callers
+    should not hold on to the returned index across requests.
+    """
+    global _local_index, _local_index_stale
+    if _local_index is None or _local_index_stale or _manifest_changed():
+        with _local_index_lock:
+            if _local_index is None:
+                _manifest_changed()
+                _local_index = load_or_build_index(path)
+                on_catalog_change(_mark_stale)
+            elif _local_index_stale or get_catalog_version() != _local_index.catalog_version:
+                _local_index_stale = False
+                print(f"[INFO] Catalog version changed since version {_local_index.catalog_version}, reloading the local index...")
+                # Reuse the loaded model; only the catalog changed
+                _local_index = load_or_build_index(path, model=_local_index._model)
+    return _local_index
+
+
+def build_synthetic_index(size: int, dimension: int = 384, seed: int = 0) -> LocalProductIndex:
+    """
+    Random catalog with realistic price and category spreads for benchmarking.
+    """
+    rng = np.random.default_rng(seed)
+    categories = ["Men's Running", "Men's Casual", "Women's Running", "Women's Casual",
+                  "Kids' Running", "Kids' Trainers", "Kids' Lifestyle", "Unisex Training"]
+    prices = np.round(rng.uniform(80, 900, size), 0)
+    discounted = rng.random(size) < 0.3
+    metadata = [{
+        "name": f"SKU {i}",
+        "price": float(prices[i]),
+        "original_price": float(prices[i] * 1.4) if discounted[i] else 0,
+        "category": categories[i % len(categories)],
+    } for i in range(size)]
+    embeddings = rng.standard_normal((size, dimension), dtype=np.float32)
+    return LocalProductIndex(embeddings, [f"SKU-{i}" for i in range(size)], metadata)
+
+
+def _time_ms(function, repeats: int = 20):
+    function()
+    started = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - started) * 1000 / repeats
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(1)
+    query = rng.standard_normal(384, dtype=np.float32)
+    print("--- Local index (synthetic catalogs, embedding excluded) ---")
+    for size in (1_000, 10_000, 100_000, 300_000):
+        index = build_synthetic_index(size)
+        unfiltered = _time_ms(lambda: index.search_vector(query, 3))
+        budget = _time_ms(lambda: index.search_vector(query, 3, (200, 400)))
+        narrow = _time_ms(lambda: index.search_vector(query, 3, (200, 400), categories="Women's Running", on_sale=True))
+        print(f"{size:>8,} SKUs: unfiltered {unfiltered:7.2f} ms | budget {budget:7.2f} ms | budget+category+sale {narrow:7.2f} ms")
+
+    print("\n--- Real catalog: local vs Pinecone (embedding included) ---")
+    local = get_local_index()
+    query_text = "a bouncy shoe that is good for running"
+    print(f"Local:    {_time_ms(lambda: local.search(query_text, 3, (200, 600))):7.2f} ms")
+    try:
+        from query_engine import ProductRetriever
+        remote = ProductRetriever()
+        print(f"Pinecone: {_time_ms(lambda: remote.search(query_text, 3, (200, 600)), repeats=5):7.2f} ms")
+    except Exception as e:
+        print(f"Pinecone: skipped ({e})")
@@ -0,0 +1,75 @@
+import streamlit as st
+import asyncio
+import pandas as pd
+from crm import ShoeCRM
+from crm_analytics import top_products, mood_distribution, search_failure_rate_by_budget, event_timeline, event_totals
+
+st.set_page_config(page_title="CRM Analytics", page_icon="📊", layout="wide")
+
+
+async def load_dashboard(days: int, hours: int):
+    """
+    Runs every dashboard query on one client; all of them read the rollup tables only
+    """
+    client = ShoeCRM._get_client()
+    try:
+        return await asyncio.gather(
+            event_totals(days, client=client),
+            top_products(days, client=client),
+            mood_distribution(days, client=client),
+            search_failure_rate_by_budget(days, client=client),
+            event_timeline(hours, client=client)
+        )
+    finally:
+        await client.close()
+
+
+@st.cache_data(ttl=60, show_spinner="Loading CRM analytics... 📊")
+def get_dashboard(days: int, hours: int):
+    return asyncio.run(load_dashboard(days, hours))
+
+
+st.title("📊 CRM Analytics")
+
+days = st.sidebar.slider("Period (days)", 1, 90, 7)
+hours = st.sidebar.slider("Timeline (hours)", 6, 168, 24)
+
+try:
+    totals, products, moods, failure_rates, timeline = get_dashboard(days, hours)
+except Exception as e:
+    st.error(f"Could not load CRM analytics: {e}")
+    st.stop()
+
+columns = st.columns(4)
+for column, event_type in zip(columns, ["User Context Analysis", "Product Recommended", "Search Failed", "Conversation Ended"]):
+    column.metric(event_type, f"{totals.get(event_type, 0):,}")
+
+left, right = st.columns(2)
+with left:
+    st.subheader("🏆 Top Recommended Products")
+    if products:
+        st.dataframe(pd.DataFrame(products, columns=["Product", "Recommendations", "Avg Price (RM)"]),
+                     hide_index=True, use_container_width=True)
+    else:
+        st.info("No recommendations in this period.")
+with right:
+    st.subheader("😊 Customer Mood")
+    if moods:
+        st.bar_chart(pd.Series(moods, name="Turns").sort_values(ascending=False))
+    else:
+        st.info("No mood data in this period.")
+
+st.subheader("🔍 Search Failure Rate by Budget")
+if failure_rates:
+    st.dataframe(pd.DataFrame(
+        [(band, failed, recommended, f"{rate:.0%}") for band, (failed, recommended, rate) in failure_rates.items()],
+        columns=["Budget", "Failed", "Recommended", "Failure Rate"]
+    ), hide_index=True, use_container_width=True)
+else:
+    st.info("No searches in this period.")
+
+st.subheader("⏱️ Events per Hour")
+if timeline:
+    st.line_chart(pd.DataFrame(timeline, columns=["Hour", "Event", "Count"]).pivot(index="Hour", columns="Event", values="Count").fillna(0))
+else:
+    st.info("No events in this period.")
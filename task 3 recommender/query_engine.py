@@ -1,57 +1,146 @@
 import os
 import json
+import time
+import threading
 from pinecone import Pinecone
 from dotenv import load_dotenv
 from sentence_transformers import SentenceTransformer
 
-def run_query(query_text: str, top_k: int = 3, budget_range: tuple = (None, None)):
-    """
-    Takes a user query, embeds it, and retrieves the top_k most relevant products with the budget filtering.
-    """
-    load_dotenv()
+INDEX_NAME = "shoe-recommender-index"
+MODEL_NAME = 'all-MiniLM-L6-v2'
 
-    print("Initializing connections...")
 
-    api_key = os.getenv("PINECONE_API_KEY")
-    if not api_key:
-        raise ValueError("PINECONE_API_KEY not found in .env file")
-    pc = Pinecone(api_key=api_key)
-
-    print("Loading sentence transformer model...")
-    model = SentenceTransformer('all-MiniLM-L6-v2')
+class ProductRetriever:
+    """
+    Long-lived search handle: the embedding model, Pinecone client and index are
+    created once, so each search only costs one embedding and one query.
+    """
 
-    index_name = "shoe-recommender-index"
-    if index_name not in pc.list_indexes().names():
-        raise ValueError(f"Index '{index_name}' does not exist. Please run embed_and_store.py first.")
+    def __init__(self, index_name: str = INDEX_NAME, model_name: str = MODEL_NAME):
+        load_dotenv()
+
+        api_key = os.getenv("PINECONE_API_KEY")
+        if not api_key:
+            raise ValueError("PINECONE_API_KEY not found in .env file")
+        self.pc = Pinecone(api_key=api_key)
+
+        if index_name not in self.pc.list_indexes().names():
+            raise ValueError(f"Index '{index_name}' does not exist. Please run embed_and_store.py first.")
+        self.index = self.pc.Index(index_name)
+
+        print("[INFO] Loading sentence transformer model...")
+        self.model = SentenceTransformer(model_name)
+        print(f"[INFO] Retriever ready on Pinecone index '{index_name}'.")
+
+    def warm_up(self):
+        """
+        Runs one embedding and one query so the first real search doesn't pay for lazy initialisation.
+        """
+        started = time.perf_counter()
+        self.index.query(vector=self.model.encode("running shoes").tolist(), top_k=1)
+        print(f"[INFO] Retriever warmed up in {time.perf_counter() - started:.2f}s.")
+
+    def search(self, query_text: str, top_k: int = 3, budget_range: tuple = (None, None), verbose: bool = False,
+               filters: dict = None, query_vector=None):
+        """
+        Embeds the query and retrieves the top_k most relevant products with the budget filtering.
+        `filters` are exact matches on the ingested facets (audience, activity, brand, on_sale).
+        Pass `query_vector` if the query is already embedded.
+        Returns the raw Pinecone results (with 'matches').
+        """
+        if query_vector is None:
+            query_vector = self.model.encode(query_text)
+        query_embedding = query_vector.tolist()
+
+        filter_dict = {}
+        if budget_range[0] is not None and budget_range[1] is not None:
+            filter_dict = {
+                "price": {
+                    "$gte": budget_range[0],
+                    "$lte": budget_range[1]
+                }
+            }
+        for key, value in (filters or {}).items():
+            filter_dict[key] = {"$eq": value}
+
+        query_results = self.index.query(
+            vector=query_embedding,
+            top_k=top_k,
+            include_metadata=True,
+            filter=filter_dict if filter_dict else None
+        )
+
+        if verbose:
+            print(f"\nQuery: '{query_text}'")
+            if filter_dict:
+                print(f"Applying filters: {filter_dict}")
+            print_results(query_results)
+        return query_results
 
-    index = pc.Index(index_name)
-    print("Successfully connected to Pinecone index.")
+    def search_products(self, query_text: str, top_k: int = 3, budget_range: tuple = (None, None)) -> list:
+        """
+        Same as search() but returns a list of plain product dicts.
+        """
+        return structure_results(self.search(query_text, top_k, budget_range))
 
-    print(f"\nEmbedding your query: '{query_text}'")
-    query_embedding = model.encode(query_text).tolist()
 
-    filter_dict = {}
-    if budget_range[0] is not None and budget_range[1] is not None:
-        filter_dict = {
-            "price": {
-                "$gte": budget_range[0],
-                "$lte": budget_range[1]
-            }
-        }
-        print(f"Applying budget filter: RM{budget_range[0]} - RM{budget_range[1]}")
+_retriever = None
+_use_local_index = None
+_retriever_lock = threading.Lock()
 
-    print("Querying Pinecone to find the best matches...")
-    query_results = index.query(
-        vector=query_embedding,
-        top_k=top_k,
-        include_metadata=True,
-        filter=filter_dict if filter_dict else None
-    )
 
+def get_retriever():
+    """
+    Process-wide retriever, created on first use. Set RETRIEVER_BACKEND=local to
+    search the in-process NumPy index (local_index.py) instead of Pinecone; that
+    index is fetched on every call because it is rebuilt when the catalog changes.
+    """
+    global _retriever, _use_local_index
+    if _use_local_index is None:
+        with _retriever_lock:
+            if _use_local_index is None:
+                load_dotenv()
+                _use_local_index = os.getenv("RETRIEVER_BACKEND", "pinecone").lower() == "local"
+    if _use_local_index:
+        from local_index import get_local_index
+        return get_local_index()
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                _retriever = ProductRetriever()
+    return _retriever
+
+
+def structure_results(query_results) -> list:
+    """
+    Turns Pinecone matches into plain dicts with parsed features.
+    """
+    products = []
+    for result in query_results['matches']:
+        metadata = result['metadata']
+        try:
+            features = json.loads(metadata.get('features', '{}'))
+        except (json.JSONDecodeError, TypeError):
+            features = {}
+        products.append({
+            "id": result['id'],
+            "score": result['score'],
+            "name": metadata.get('name'),
+            "price": metadata.get('price'),
+            "original_price": metadata.get('original_price'),
+            "on_sale": metadata.get('original_price', 0) > metadata.get('price', 0),
+            "category": metadata.get('category'),
+            "description": metadata.get('description'),
+            "features": features,
+        })
+    return products
+
+
+def print_results(query_results):
     print("\n--- Top Recommendations ---")
     if not query_results['matches']:
         print("No matches found.")
-        return query_results
+        return
 
     for i, result in enumerate(query_results['matches']):
         metadata = result['metadata']
@@ -74,12 +163,71 @@ def run_query(query_text: str, top_k: int = 3, budget_range: tuple = (None, None
 
     print("\n---------------------------\n")
 
+
+def run_query(query_text: str, top_k: int = 3, budget_range: tuple = (None, None), verbose: bool = False,
+              filters: dict = None, use_cache: bool = True):
+    """
+    Takes a user query, embeds it, and retrieves the top_k most relevant products with the budget filtering.
+    Uses the shared retriever; pass verbose=True to print the matches.
+    `filters` (e.g. from slot_extractor) are pushed down as metadata filters. They are ordered
+    most confident first; if nothing matches, the last one is dropped and the search retried.
+    Results are cached (result_cache.py) by query text and by nearest cached embedding
+    until they expire or the catalog is re-ingested; callers must not modify them.
+    """
+    from result_cache import get_result_cache, cache_metrics
+
+    retriever = get_retriever()
+    cache = get_result_cache() if use_cache else None
+    if cache is not None:
+        started = time.perf_counter()
+        text_key = cache.text_key(query_text, top_k, budget_range, filters)
+        cached = cache.get(text_key)
+        if cached is not None:
+            cache_metrics["text_hits"] += 1
+            cache_metrics["total_hit_us"] += (time.perf_counter() - started) * 1e6
+            if verbose:
+                print(f"\nQuery: '{query_text}' (cached)")
+                print_results(cached)
+            return cached
+
+    query_vector = retriever.model.encode(query_text)
+    if cache is not None:
+        started = time.perf_counter()
+        cached = cache.get_similar(query_vector, top_k, budget_range, filters)
+        if cached is not None:
+            cache.put(text_key, cached)
+            cache_metrics["vector_hits"] += 1
+            cache_metrics["total_hit_us"] += (time.perf_counter() - started) * 1e6
+            if verbose:
+                print(f"\nQuery: '{query_text}' (cached)")
+                print_results(cached)
+            return cached
+        cache_metrics["misses"] += 1
+
+    relaxed_filters = dict(filters or {})
+    while True:
+        query_results = retriever.search(query_text, top_k=top_k, budget_range=budget_range, verbose=verbose,
+                                         filters=relaxed_filters, query_vector=query_vector)
+        if query_results['matches'] or not relaxed_filters:
+            break
+        relaxed = list(relaxed_filters)[-1]
+        relaxed_filters.pop(relaxed)
+        print(f"[INFO] No matches, relaxing the '{relaxed}' filter...")
+
+    if cache is not None:
+        cache.put(text_key, query_results)
+        cache.put_similar(query_vector, top_k, budget_range, filters, query_results)
     return query_results
 
 if __name__ == "__main__":
 
     try:
         user_query = "a bouncy shoe that is good for running"
-        run_query(user_query)
+        retriever = get_retriever()
+        retriever.warm_up()
+        for attempt in range(3):
+            started = time.perf_counter()
+            run_query(user_query, verbose=attempt == 0, use_cache=False)
+            print(f"Search {attempt + 1}: {(time.perf_counter() - started) * 1000:.0f} ms")
     except Exception as e:
-        print(f"An error occurred: {e}")
\ No newline at end of file
+        print(f"An error occurred: {e}")
@@ -0,0 +1,199 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+
+from catalog_ingest import MANIFEST_PATH, get_catalog_version, on_catalog_change
+
+CACHE_SIZE = 2048
+CACHE_TTL_S = 15 * 60
+# A cached embedding answers a new query when their cosine similarity is at least this;
+# rephrasings of the same request (case, punctuation, word order) typically score above it
+SIMILARITY_THRESHOLD = 0.97
+
+cache_metrics = {"text_hits": 0, "vector_hits": 0, "misses": 0, "evictions": 0, "expirations": 0,
+                 "invalidations": 0, "total_hit_us": 0.0}
+
+
+def _normalize_text(query_text: str) -> str:
+    return " ".join(query_text.lower().split())
+
+
+def _normalize_budget(budget_range: tuple):
+    low, high = budget_range if budget_range else (None, None)
+    return None if low is None or high is None else (float(low), float(high))
+
+
+def _normalize_filters(filters: dict) -> tuple:
+    # Order is kept: run_query relaxes filters from the end, so it can change the result
+    return tuple((key, value) for key, value in (filters or {}).items())
+
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / (np.linalg.norm(vector) or 1)
+
+
+class ResultCache:
+    """
+    LRU cache of ranked search results with a per-entry TTL. Entries are looked up
+    first by normalized query text (no embedding needed), then by nearest neighbour:
+    the query embedding is compared by cosine similarity against the cached
+    embeddings with the same top_k, budget and filters. The whole cache is dropped
+    when any indexing path bumps the catalog version: directly through the
+    on_catalog_change hook in the same process, and from the manifest file's
+    modification time when another process re-indexed.
+    """
+
+    def __init__(self, max_size: int = CACHE_SIZE, ttl_s: float = CACHE_TTL_S, manifest_path: str = MANIFEST_PATH,
+                 similarity_threshold: float = SIMILARITY_THRESHOLD):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self.manifest_path = manifest_path
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()
+        # scope (top_k, budget, filters) -> {entry key: unit embedding}
+        self._vectors = {}
+        self._next_vector_id = 0
+        self._lock = threading.Lock()
+        self._manifest_mtime = self._mtime()
+        self.catalog_version = get_catalog_version(manifest_path)
+
+    def _mtime(self):
+        try:
+            return os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _check_catalog(self):
+        mtime = self._mtime()
+        if mtime == self._manifest_mtime:
+            return
+        self._manifest_mtime = mtime
+        version = get_catalog_version(self.manifest_path)
+        if version != self.catalog_version:
+            print(f"[INFO] Catalog version {self.catalog_version} -> {version}, clearing {len(self._entries)} cached results.")
+            self.catalog_version = version
+            self._clear()
+            cache_metrics["invalidations"] += 1
+
+    def _clear(self):
+        self._entries.clear()
+        self._vectors.clear()
+
+    def _drop(self, key: tuple):
+        del self._entries[key]
+        if key[0] == "vector":
+            scope = key[1]
+            del self._vectors[scope][key]
+            if not self._vectors[scope]:
+                del self._vectors[scope]
+
+    def text_key(self, query_text: str, top_k: int, budget_range: tuple, filters: dict) -> tuple:
+        return ("text", _normalize_text(query_text), top_k, _normalize_budget(budget_range), _normalize_filters(filters))
+
+    def _nearest(self, scope: tuple, unit: np.ndarray):
+        # Returns the cached key whose embedding is most similar to `unit`, if it clears the threshold
+        vectors = self._vectors.get(scope)
+        if not vectors:
+            return None
+        keys = list(vectors)
+        similarities = np.stack([vectors[key] for key in keys]) @ unit
+        best = int(np.argmax(similarities))
+        return keys[best] if similarities[best] >= self.similarity_threshold else None
+
+    def _lookup(self, key: tuple):
+        expires_at, value = self._entries[key]
+        if expires_at < time.monotonic():
+            self._drop(key)
+            cache_metrics["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get(self, key: tuple):
+        with self._lock:
+            self._check_catalog()
+            if key not in self._entries:
+                return None
+            return self._lookup(key)
+
+    def get_similar(self, vector, top_k: int, budget_range: tuple, filters: dict):
+        scope = (top_k, _normalize_budget(budget_range), _normalize_filters(filters))
+        with self._lock:
+            self._check_catalog()
+            key = self._nearest(scope, _unit(vector))
+            return self._lookup(key) if key is not None else None
+
+    def _store(self, key: tuple, value):
+        self._entries[key] = (time.monotonic() + self.ttl_s, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._drop(next(iter(self._entries)))
+            cache_metrics["evictions"] += 1
+
+    def put(self, key: tuple, value):
+        with self._lock:
+            self._store(key, value)
+
+    def put_similar(self, vector, top_k: int, budget_range: tuple, filters: dict, value):
+        scope = (top_k, _normalize_budget(budget_range), _normalize_filters(filters))
+        unit = _unit(vector)
+        with self._lock:
+            # A near-duplicate embedding refreshes the existing entry instead of adding another
+            key = self._nearest(scope, unit)
+            if key is None:
+                key = ("vector", scope, self._next_vector_id)
+                self._next_vector_id += 1
+                self._vectors.setdefault(scope, {})[key] = unit
+            self._store(key, value)
+
+    def invalidate(self, version: int = None):
+        with self._lock:
+            if version is not None:
+                self.catalog_version = version
+            self._clear()
+            cache_metrics["invalidations"] += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache()
+                on_catalog_change(_result_cache.invalidate)
+    return _result_cache
+
+
+def get_cache_metrics() -> dict:
+    hits = cache_metrics["text_hits"] + cache_metrics["vector_hits"]
+    lookups = hits + cache_metrics["misses"]
+    return {
+        **cache_metrics,
+        "size": len(_result_cache) if _result_cache is not None else 0,
+        "hit_rate": hits / lookups if lookups else 0.0,
+        "avg_hit_us": cache_metrics["total_hit_us"] / hits if hits else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    from query_engine import run_query, get_retriever
+
+    get_retriever().warm_up()
+    queries = ["women running shoe with discount", "kids running shoes", "Women running shoe with discount!",
+               "something comfy for walking", "kids  running  shoes"]
+    for round_number in range(3):
+        for query in queries:
+            started = time.perf_counter()
+            run_query(query, filters={"audience": "Women"} if "women" in query.lower() else None)
+            print(f"Round {round_number + 1}: {(time.perf_counter() - started) * 1e6:9.0f} µs  {query!r}")
+    print(get_cache_metrics())
@@ -0,0 +1,169 @@
+import re
+
+# Slots at or above this confidence become metadata filters on the product search
+FILTER_CONFIDENCE = 0.7
+# A slot mentioned with two different values keeps the latest one at reduced confidence
+CONFLICT_PENALTY = 0.6
+OPEN_ENDED_MAX = 999999
+
+BRANDS = ["ASICS", "NIKE", "ADIDAS", "PUMA", "NEW BALANCE"]
+
+# term -> (slot, value, confidence); matched as whole words, case-insensitively
+TERMS = {}
+
+
+def _add_terms(slot, value, confidence, *terms):
+    for term in terms:
+        TERMS[term] = (slot, value, confidence)
+
+
+_add_terms("audience", "Women", 0.9, "women", "woman", "womens", "ladies", "lady", "female")
+_add_terms("audience", "Women", 0.75, "wife", "girlfriend", "mum", "mom", "mother")
+_add_terms("audience", "Men", 0.9, "men", "man", "mens", "male", "guys")
+_add_terms("audience", "Men", 0.75, "husband", "boyfriend", "dad", "father")
+_add_terms("audience", "Kids", 0.9, "kid", "kids", "children", "child", "junior", "juniors", "toddler")
+_add_terms("audience", "Kids", 0.75, "son", "daughter", "boy", "boys", "girl", "girls")
+_add_terms("activity", "Running", 0.9, "running", "runner", "runners", "jog", "jogging", "marathon", "5k", "10k")
+_add_terms("activity", "Running", 0.75, "run")
+_add_terms("activity", "Casual", 0.85, "casual", "everyday", "walking", "slip-on", "slip on")
+_add_terms("activity", "Lifestyle", 0.8, "lifestyle", "fashion", "school")
+_add_terms("activity", "Trainers", 0.8, "trainer", "trainers", "training", "gym")
+_add_terms("on_sale", True, 0.9, "on sale", "discount", "discounts", "discounted", "promo", "promotion")
+_add_terms("on_sale", True, 0.75, "sale", "offer", "offers", "deal", "deals")
+for _brand in BRANDS:
+    _add_terms("brand", _brand, 0.95, _brand.lower())
+
+_term_alternation = "|".join(
+    re.escape(term).replace(r"\ ", r"\s+") for term in sorted(TERMS, key=len, reverse=True)
+)
+
+# One pass over the message: budget phrasings (checked in the same priority order
+# as the old sequential patterns) and every vocabulary term, as named alternatives
+SLOT_PATTERN = re.compile(
+    r"(?P<under>\b(?:under|below|less\s+than|maximum|max)(?:\s*rm\s*(?P<under_rm>\d+)|\s+(?P<under_plain>\d+)))"
+    r"|(?P<around>\b(?:around|about|approximately)\s*rm\s*(?P<around_amount>\d+))"
+    r"|(?P<range>\brm\s*(?P<range_low>\d+)\s*(?:-|to|and)\s*(?:rm)?\s*(?P<range_high>\d+))"
+    r"|(?P<at_least>\b(?:at\s+least|minimum|min)\s*rm\s*(?P<at_least_amount>\d+))"
+    r"|(?P<amount>\brm\s*(?P<amount_value>\d+))"
+    rf"|\b(?P<term>{_term_alternation})\b",
+    re.IGNORECASE
+)
+
+
+class Slots:
+    """
+    What one message says about the wanted product. `confidence` has an entry for every filled slot.
+    """
+
+    def __init__(self):
+        self.budget = (None, None)
+        self.audience = None
+        self.activity = None
+        self.brand = None
+        self.on_sale = None
+        self.confidence = {}
+
+    def filters(self, min_confidence: float = FILTER_CONFIDENCE) -> dict:
+        """
+        Metadata filters for run_query, most confident first (run_query relaxes from the end).
+        """
+        slots = [(slot, getattr(self, slot)) for slot in ("audience", "activity", "brand", "on_sale")]
+        confident = [(slot, value) for slot, value in slots
+                     if value is not None and self.confidence.get(slot, 0) >= min_confidence]
+        confident.sort(key=lambda item: -self.confidence[item[0]])
+        return dict(confident)
+
+    def to_dict(self) -> dict:
+        return {
+            "budget": self.budget,
+            "audience": self.audience,
+            "activity": self.activity,
+            "brand": self.brand,
+            "on_sale": self.on_sale,
+            "confidence": self.confidence,
+        }
+
+
+def _budget_match(match):
+    """
+    (priority, budget range, confidence) for a budget alternative, lower priority wins.
+    """
+    if match.group("under"):
+        if match.group("under_rm"):
+            return 0, (0, int(match.group("under_rm"))), 0.95
+        return 1, (0, int(match.group("under_plain"))), 0.8
+    if match.group("around"):
+        amount = int(match.group("around_amount"))
+        return 2, (amount - 50, amount + 50), 0.9
+    if match.group("range"):
+        return 3, (int(match.group("range_low")), int(match.group("range_high"))), 0.95
+    if match.group("at_least"):
+        return 4, (int(match.group("at_least_amount")), OPEN_ENDED_MAX), 0.9
+    amount = int(match.group("amount_value"))
+    return 5, (amount - 50, amount + 50), 0.6
+
+
+def extract_slots(user_message: str) -> Slots:
+    """
+    Extracts budget, audience, activity, brand and the discount flag in a single regex scan.
+    """
+    slots = Slots()
+    best_budget = None
+    for match in SLOT_PATTERN.finditer(user_message):
+        term = match.group("term")
+        if term is None:
+            candidate = _budget_match(match)
+            if best_budget is None or candidate[0] < best_budget[0]:
+                best_budget = candidate
+            continue
+
+        slot, value, confidence = TERMS[" ".join(term.lower().split())]
+        current = getattr(slots, slot)
+        if current is None or current == value:
+            slots.confidence[slot] = max(confidence, slots.confidence.get(slot, 0))
+        else:
+            slots.confidence[slot] = confidence * CONFLICT_PENALTY
+        setattr(slots, slot, value)
+
+    if best_budget is not None:
+        slots.budget = best_budget[1]
+        slots.confidence["budget"] = best_budget[2]
+    return slots
+
+
+def product_facets(product: dict) -> dict:
+    """
+    Filterable metadata derived from a product (or its stored metadata), added at ingestion.
+    """
+    category = product.get("category") or ""
+    separator = next((separator for separator in ("'s ", "' ") if separator in category), None)
+    audience, activity = category.split(separator, 1) if separator else ("Unisex", category)
+    name = (product.get("name") or "").upper()
+    return {
+        "audience": audience,
+        "activity": activity,
+        "brand": next((brand for brand in BRANDS if name.startswith(brand)), "OTHER"),
+        "on_sale": (product.get("original_price") or 0) > (product.get("price") or 0),
+    }
+
+
+if __name__ == "__main__":
+    import time
+
+    messages = [
+        "hello, got any recommendation for women running shoe and got discount ah?",
+        "hello bro, got kid shoes for running ah?",
+        "need asics for my husband, under RM300",
+        "something casual around rm 150 for my daughter",
+        "between RM100 and RM250 pls, new balance if got",
+        "ok tq, bye",
+    ]
+    for message in messages:
+        slots = extract_slots(message)
+        print(f"{message}\n  budget={slots.budget} filters={slots.filters()} confidence={slots.confidence}")
+
+    started = time.perf_counter()
+    for _ in range(20_000):
+        for message in messages:
+            extract_slots(message)
+    print(f"\n{(time.perf_counter() - started) / (20_000 * len(messages)) * 1e6:.1f} µs per message")